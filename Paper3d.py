@@ -1,16 +1,450 @@
 import numpy as np
+from multiprocessing import Pool, shared_memory
 from rich.console import Console
 from rich.color import Color
 from rich.style import Style
 from rich.text import Text
 import math
+import sys
+from array import array
+from typing import Dict, List, Tuple
+
+from asc3_styles import DEFAULT_PALETTE
 
 # Initialize the console for colored output
 console = Console()
 
+# Primitive kinds, in the order they are drawn for every grid node. A kind
+# is also the index of its glyph in the lookup table; 0 means an empty cell.
+NODE, X_LINE, Y_LINE, Z_LINE = 1, 2, 3, 4
+
+# Number of grid nodes rasterized per batch, to bound temporary arrays.
+_NODE_CHUNK = 1 << 15
+
+# The kept i, j and k indices of a part of the grid (see _grid_lattice)
+Lattice = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+# Shared-memory views attached by each worker process.
+_worker_state: Dict[str, np.ndarray] = {}
+
+
+def _grid_lattice(width: int, height: int, depth: int, cell_size: float, perspective_factor: float,
+                  canvas_width: int, canvas_height: int,
+                  lines_per_cell: float = 1.0) -> List[Lattice]:
+    """
+    Chooses the grid lines worth rasterizing on a canvas.
+
+    Rows and columns of nodes that project outside the canvas at every depth
+    are culled, keeping one beyond each side so edges leaving the canvas are
+    still drawn. On depth layers where two or more neighbouring lines project
+    into one cell, only every n-th line is kept, n a power of two, so the
+    spacing is close to a cell again; the edges between kept nodes cover the
+    dropped ones. Layers that keep the same lines form a band, so lines are
+    only dropped on the layers where they crowd together, and a grid whose
+    lines and layers are at least a cell apart on screen is drawn in full.
+    The grid edges are always kept.
+    lines_per_cell scales how many lines must share a cell before any are
+    dropped.
+
+    Returns:
+        The bands from the first depth layer to the last, each as the kept
+        i, j and k indices, sorted. Neighbouring bands share the layer
+        between them, so the z edges across it are drawn.
+    """
+    ii, jj, kk = np.arange(width + 1), np.arange(height + 1), np.arange(depth + 1)
+    scale = 1 - (kk - depth / 2) * cell_size * perspective_factor
+    if cell_size <= 0 or scale.min() <= _NEAR:
+        # Layers at or behind the eye are flipped and unbounded; draw everything
+        return [(ii, jj, kk)]
+
+    def kept(count: int, half_canvas: float, spacing: float, step: int) -> np.ndarray:
+        reach = (half_canvas + 1) / spacing
+        lo = max(int(math.floor(count / 2 - reach)) // step * step - step, 0)
+        hi = min(int(math.ceil(count / 2 + reach)) + step, count)
+        return np.unique(np.append(np.arange(lo, hi, step), hi))
+
+    # Lines are spaced most tightly on the farthest layer, so the lines that
+    # miss the canvas there miss it on every layer
+    tightest = scale.min() * cell_size
+    ii = kept(width, canvas_width / 2, tightest, 1)
+    jj = kept(height, canvas_height / 2, tightest, 1)
+
+    # Neighbouring layers are at most this many cells apart on screen, which
+    # is the length of the longest visible z edge
+    reach = max(np.abs(ii - width / 2).max(), np.abs(jj - height / 2).max()) * cell_size
+    spread = reach * cell_size * abs(perspective_factor)
+    step = depth if spread == 0 else max(int(lines_per_cell / spread), 1)
+    kk = np.unique(np.append(np.arange(0, depth, max(step, 1)), depth))
+
+    # The step of every layer, rounded down to a power of two so that few
+    # bands are needed; a band runs to the first layer of the next
+    crowding = lines_per_cell / (scale[kk] * cell_size)
+    steps = (2 ** np.floor(np.log2(np.maximum(crowding, 1)))).astype(np.int64)
+    firsts = np.concatenate(([0], np.flatnonzero(np.diff(steps)) + 1)).tolist()
+    bands = []
+    for first, last in zip(firsts, firsts[1:] + [len(kk) - 1]):
+        if first == last and bands:
+            # The last layer on its own, already drawn by the band before
+            break
+        band_kk = kk[first:last + 1]
+        spacing = scale[band_kk].min() * cell_size
+        bands.append((kept(width, canvas_width / 2, spacing, int(steps[first])),
+                      kept(height, canvas_height / 2, spacing, int(steps[first])), band_kk))
+    return bands
+
+
+def _project_grid(ii: np.ndarray, jj: np.ndarray, kk: np.ndarray, dims: Tuple[int, int, int],
+                  cell_size: float, perspective_factor: float,
+                  center_x: int, center_y: int, rounded: bool = True) -> np.ndarray:
+    """
+    Projects the grid nodes at indices ii x jj x kk at once.
+
+    Returns:
+        np.ndarray: An (N, 2) array of screen (x, y) coordinates, with nodes
+        ordered by i, then j, then k. They are rounded to int64 cells unless
+        rounded is False.
+    """
+    width, height, depth = dims
+    i, j, k = np.meshgrid(ii, jj, kk, indexing='ij')
+    x = (i.ravel() - width / 2) * cell_size
+    y = (j.ravel() - height / 2) * cell_size
+    z = (k.ravel() - depth / 2) * cell_size
+    scale = 1 - z * perspective_factor
+    proj = np.empty((x.size, 2))
+    proj[:, 0] = center_x + x * scale
+    proj[:, 1] = center_y + y * scale
+    return np.rint(proj).astype(np.int64) if rounded else proj
+
+
+def _expand_runs(starts: np.ndarray, lengths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Expands runs into (owner, position) pairs, one per cell of every run."""
+    owner = np.repeat(np.arange(starts.size), lengths)
+    offsets = np.arange(owner.size) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return owner, starts[owner] + offsets
+
+
+def _rasterize_nodes(proj: np.ndarray, lattice: Lattice, dims: Tuple[int, int, int], start: int, stop: int,
+                     canvas_width: int, canvas_height: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rasterizes the node and the three outgoing edges of lattice nodes
+    start..stop.
+
+    proj holds the projected nodes of the lattice, a part of the grid with
+    dims cells along each axis. Edges are culled against the canvas before
+    they are expanded into cells, and each is rasterized with one cell per
+    step along its projected length.
+
+    Returns:
+        Tuple of flat canvas indices, primitive kinds and draw order keys for
+        every cell that is drawn. A higher order key was drawn later. Keys
+        follow the place of nodes in the whole grid, so lattices painted
+        separately overlap as in one pass over the grid.
+    """
+    ii, jj, kk = lattice
+    width, height, depth = len(ii) - 1, len(jj) - 1, len(kk) - 1
+    stride_x = (height + 1) * (depth + 1)
+    stride_y = depth + 1
+    n = np.arange(start, stop)
+    node_ids = (ii[n // stride_x] * (dims[1] + 1) + jj[(n // stride_y) % (height + 1)]) * (dims[2] + 1) \
+        + kk[n % (depth + 1)]
+    px, py = proj[start:stop, 0], proj[start:stop, 1]
+    flats, kinds, orders = [], [], []
+
+    def emit(cx, cy, owner, kind):
+        keep = (cx >= 0) & (cx < canvas_width) & (cy >= 0) & (cy < canvas_height)
+        flats.append(cy[keep] * canvas_width + cx[keep])
+        kinds.append(np.full(int(keep.sum()), kind, dtype=np.uint8))
+        orders.append(4 * node_ids[owner[keep] - start] + (kind - 1))
+
+    # Nodes
+    emit(px, py, n, NODE)
+
+    # Draw x-axis lines along the row of the first node
+    sel = np.nonzero(n // stride_x < width)[0]
+    x2, y2 = proj[n[sel] + stride_x, 0], proj[n[sel] + stride_x, 1]
+    rows_ok = (py[sel] >= 0) & (py[sel] < canvas_height) & (y2 >= 0) & (y2 < canvas_height)
+    sel, x2 = sel[rows_ok], x2[rows_ok]
+    lo = np.maximum(np.minimum(px[sel], x2) + 1, 0)
+    hi = np.minimum(np.maximum(px[sel], x2), canvas_width)
+    owner, cx = _expand_runs(lo, np.maximum(hi - lo, 0))
+    emit(cx, py[sel][owner], n[sel][owner], X_LINE)
+
+    # Draw y-axis lines along the column of the first node
+    sel = np.nonzero((n // stride_y) % (height + 1) < height)[0]
+    x2, y2 = proj[n[sel] + stride_y, 0], proj[n[sel] + stride_y, 1]
+    cols_ok = (px[sel] >= 0) & (px[sel] < canvas_width) & (x2 >= 0) & (x2 < canvas_width)
+    sel, y2 = sel[cols_ok], y2[cols_ok]
+    lo = np.maximum(np.minimum(py[sel], y2) + 1, 0)
+    hi = np.minimum(np.maximum(py[sel], y2), canvas_height)
+    owner, cy = _expand_runs(lo, np.maximum(hi - lo, 0))
+    emit(px[sel][owner], cy, n[sel][owner], Y_LINE)
+
+    # Draw z-axis lines one cell per step along their visible part
+    sel = np.nonzero(n % (depth + 1) < depth)[0]
+    x1, y1 = px[sel], py[sel]
+    x2, y2 = proj[n[sel] + 1, 0], proj[n[sel] + 1, 1]
+    keep, t0, t1 = _clip_segments(x1, y1, x2, y2, canvas_width, canvas_height)
+    sel, x1, y1, x2, y2 = sel[keep], x1[keep], y1[keep], x2[keep], y2[keep]
+    length = np.maximum(np.abs(x2 - x1), np.abs(y2 - y1))
+    first = np.ceil(t0[keep] * length).astype(np.int64)
+    last = np.floor(t1[keep] * length).astype(np.int64)
+    owner, step = _expand_runs(first, np.maximum(last - first + 1, 0))
+    t = step / np.maximum(length[owner], 1)
+    cx = np.rint(x1[owner] + (x2 - x1)[owner] * t).astype(np.int64)
+    cy = np.rint(y1[owner] + (y2 - y1)[owner] * t).astype(np.int64)
+    emit(cx, cy, n[sel][owner], Z_LINE)
+
+    return np.concatenate(flats), np.concatenate(kinds), np.concatenate(orders)
+
+
+def _paint(order_plane: np.ndarray, kind_plane: np.ndarray, flat: np.ndarray,
+           kind: np.ndarray, order: np.ndarray):
+    """Paints cells into the planes; on overlap the highest order key wins."""
+    np.maximum.at(order_plane, flat, order)
+    won = order_plane[flat] == order
+    kind_plane[flat[won]] = kind[won]
+
+
+def _paint_range(proj: np.ndarray, lattice: Lattice, dims: Tuple[int, int, int], start: int, stop: int,
+                 order_plane: np.ndarray, kind_plane: np.ndarray,
+                 canvas_width: int, canvas_height: int):
+    """Rasterizes lattice nodes start..stop into the planes in bounded batches."""
+    for lo in range(start, stop, _NODE_CHUNK):
+        hi = min(lo + _NODE_CHUNK, stop)
+        _paint(order_plane, kind_plane,
+               *_rasterize_nodes(proj, lattice, dims, lo, hi, canvas_width, canvas_height))
+
+
+def _init_worker(names: Dict[str, str], proj_shape: Tuple[int, int],
+                 plane_shape: Tuple[int, int]):
+    """Attaches a worker process to the shared projection and canvas planes."""
+    for key, dtype, shape in (('proj', np.int64, proj_shape),
+                              ('order', np.int64, plane_shape),
+                              ('kind', np.uint8, plane_shape)):
+        shm = shared_memory.SharedMemory(name=names[key])
+        _worker_state[key + '_shm'] = shm
+        _worker_state[key] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+
+def _rasterize_share(task: Tuple[int, Tuple[int, int, int], List[Tuple[Lattice, int, int, int, int]], int, int]):
+    """Rasterizes one worker's share of the grid into its own plane slot."""
+    slot, dims, ranges, canvas_width, canvas_height = task
+    for lattice, offset, size, start, stop in ranges:
+        _paint_range(_worker_state['proj'][offset:offset + size], lattice, dims, start, stop,
+                     _worker_state['order'][slot], _worker_state['kind'][slot],
+                     canvas_width, canvas_height)
+
+
+def _rasterize_parallel(projs: List[np.ndarray], lattices: List[Lattice], dims: Tuple[int, int, int],
+                        workers: int, canvas_width: int, canvas_height: int) -> np.ndarray:
+    """
+    Rasterizes the grid across worker processes through shared memory.
+
+    The projected nodes of every lattice are laid end to end and every
+    worker paints an equal share of them into a private slot of the shared
+    order and kind planes. The slots are then merged by keeping, for each
+    cell, the kind from the slot with the highest order key, which gives
+    exactly the same canvas as a single sequential pass.
+    """
+    proj = np.concatenate(projs)
+    sizes = [len(band) for band in projs]
+    offsets = np.cumsum([0] + sizes).tolist()
+    cells = canvas_width * canvas_height
+    plane_shape = (workers, cells)
+    blocks = {
+        'proj': shared_memory.SharedMemory(create=True, size=proj.nbytes),
+        'order': shared_memory.SharedMemory(create=True, size=workers * cells * 8),
+        'kind': shared_memory.SharedMemory(create=True, size=workers * cells),
+    }
+    try:
+        np.ndarray(proj.shape, dtype=np.int64, buffer=blocks['proj'].buf)[:] = proj
+        order = np.ndarray(plane_shape, dtype=np.int64, buffer=blocks['order'].buf)
+        kind = np.ndarray(plane_shape, dtype=np.uint8, buffer=blocks['kind'].buf)
+        order.fill(-1)
+        kind.fill(0)
+
+        bounds = np.linspace(0, len(proj), workers + 1).astype(int).tolist()
+        tasks = []
+        for slot in range(workers):
+            # The part of every lattice that falls in this worker's share
+            lo, hi = bounds[slot], bounds[slot + 1]
+            ranges = [(lattice, offset, size, max(lo - offset, 0), min(hi - offset, size))
+                      for lattice, offset, size in zip(lattices, offsets, sizes)
+                      if lo < offset + size and offset < hi]
+            tasks.append((slot, dims, ranges, canvas_width, canvas_height))
+        names = {key: shm.name for key, shm in blocks.items()}
+        with Pool(workers, initializer=_init_worker,
+                  initargs=(names, proj.shape, plane_shape)) as pool:
+            pool.map(_rasterize_share, tasks)
+
+        # Depth-aware reduction: the latest drawn cell across all slots wins
+        winner = order.argmax(axis=0)
+        merged = kind[winner, np.arange(cells)]
+        merged[order[winner, np.arange(cells)] < 0] = 0
+        return merged
+    finally:
+        for shm in blocks.values():
+            shm.close()
+            shm.unlink()
+
+
+def _grid_kinds(width: int, height: int, depth: int, cell_size: float, perspective_factor: float,
+                canvas_width: int, canvas_height: int, workers: int, lod: bool = True) -> np.ndarray:
+    """Rasterizes the grid into a (canvas_height, canvas_width) plane of kinds."""
+    # Center the projection
+    center_x = canvas_width // 2
+    center_y = canvas_height // 2
+
+    dims = (width, height, depth)
+    if lod:
+        lattices = _grid_lattice(width, height, depth, cell_size, perspective_factor,
+                                 canvas_width, canvas_height)
+    else:
+        lattices = [(np.arange(width + 1), np.arange(height + 1), np.arange(depth + 1))]
+    projs = [_project_grid(ii, jj, kk, dims, cell_size, perspective_factor, center_x, center_y)
+             for ii, jj, kk in lattices]
+
+    if workers > 1:
+        kind_plane = _rasterize_parallel(projs, lattices, dims, workers, canvas_width, canvas_height)
+    else:
+        order_plane = np.full(canvas_width * canvas_height, -1, dtype=np.int64)
+        kind_plane = np.zeros(canvas_width * canvas_height, dtype=np.uint8)
+        for proj, lattice in zip(projs, lattices):
+            _paint_range(proj, lattice, dims, 0, len(proj), order_plane, kind_plane,
+                         canvas_width, canvas_height)
+    return kind_plane.reshape(canvas_height, canvas_width)
+
+
+# Characters of increasing density, and the color they are drawn in at full
+# intensity, for the antialiased mode
+DENSITY_RAMP = ' .:-=+*#%@'
+_DENSITY_COLOR = (0, 180, 255)
+
+# Samples taken per cell along each edge in the antialiased mode
+_SUBSAMPLES = 3
+
+
+def _lattice_weights(kept: np.ndarray) -> np.ndarray:
+    """Returns how many grid lines each kept line stands for."""
+    return np.append(np.diff(kept), 1).astype(np.float64)
+
+
+def _splat(coverage: np.ndarray, x: np.ndarray, y: np.ndarray, weight: np.ndarray,
+           canvas_width: int, canvas_height: int):
+    """
+    Adds weighted samples to the coverage buffer, sharing each one between
+    the four cells around it by its subcell position. Cell centers are at
+    whole screen coordinates.
+    """
+    x0, y0 = np.floor(x), np.floor(y)
+    fx, fy = x - x0, y - y0
+    x0, y0 = x0.astype(np.int64), y0.astype(np.int64)
+    cx = np.concatenate((x0, x0 + 1, x0, x0 + 1))
+    cy = np.concatenate((y0, y0, y0 + 1, y0 + 1))
+    share = np.concatenate(((1 - fx) * (1 - fy), fx * (1 - fy), (1 - fx) * fy, fx * fy))
+    share *= np.tile(weight, 4)
+    keep = (cx >= 0) & (cx < canvas_width) & (cy >= 0) & (cy < canvas_height)
+    coverage += np.bincount(cy[keep] * canvas_width + cx[keep], share[keep], minlength=coverage.size)
+
+
+def _accumulate_nodes(proj: np.ndarray, dims: Tuple[int, int, int], weights: Tuple[np.ndarray, ...],
+                      start: int, stop: int, coverage: np.ndarray,
+                      canvas_width: int, canvas_height: int):
+    """
+    Accumulates the coverage of the node and the three outgoing edges of
+    grid nodes start..stop. Every edge is clipped to the canvas and sampled
+    _SUBSAMPLES times per cell of its visible length, and every sample adds
+    the number of grid lines its edge stands for, spread over its length.
+    """
+    width, height, depth = dims
+    stride_x = (height + 1) * (depth + 1)
+    stride_y = depth + 1
+    n = np.arange(start, stop)
+    i, j, k = n // stride_x, (n // stride_y) % (height + 1), n % (depth + 1)
+    w_i, w_j, w_k = weights
+    px, py = proj[start:stop, 0], proj[start:stop, 1]
+    xs, ys, shares = [px], [py], [w_i[i] * w_j[j] * w_k[k]]
+
+    for sel, stride, weight in ((np.nonzero(i < width)[0], stride_x, w_j[j] * w_k[k]),
+                                (np.nonzero(j < height)[0], stride_y, w_i[i] * w_k[k]),
+                                (np.nonzero(k < depth)[0], 1, w_i[i] * w_j[j])):
+        x1, y1 = px[sel], py[sel]
+        x2, y2 = proj[n[sel] + stride, 0], proj[n[sel] + stride, 1]
+        keep, t0, t1 = _clip_segments(x1, y1, x2, y2, canvas_width, canvas_height)
+        sel, x1, y1, x2, y2 = sel[keep], x1[keep], y1[keep], x2[keep], y2[keep]
+        t0, span = t0[keep], t1[keep] - t0[keep]
+        length = np.maximum(np.abs(x2 - x1), np.abs(y2 - y1)) * span
+        samples = np.ceil(length * _SUBSAMPLES).astype(np.int64) + 1
+        owner, step = _expand_runs(np.zeros(len(sel), dtype=np.int64), samples)
+        t = t0[owner] + span[owner] * ((step + 0.5) / samples[owner])
+        share = weight[sel] * np.maximum(length, 1e-9) / samples
+        xs.append(x1[owner] + (x2 - x1)[owner] * t)
+        ys.append(y1[owner] + (y2 - y1)[owner] * t)
+        shares.append(share[owner])
+
+    _splat(coverage, np.concatenate(xs), np.concatenate(ys), np.concatenate(shares),
+           canvas_width, canvas_height)
+
+
+def _grid_coverage(width: int, height: int, depth: int, cell_size: float, perspective_factor: float,
+                   canvas_width: int, canvas_height: int, lod: bool = True) -> np.ndarray:
+    """
+    Accumulates the grid into a (canvas_height, canvas_width) float buffer of
+    coverage, where a cell crossed by one line gets about 1.
+    """
+    center_x = canvas_width // 2
+    center_y = canvas_height // 2
+
+    # Thinned out lines are weighted by the lines they stand for, so the
+    # lattice can be coarser than for hard lines without losing density
+    if lod:
+        lattices = _grid_lattice(width, height, depth, cell_size, perspective_factor,
+                                 canvas_width, canvas_height, lines_per_cell=2.0)
+    else:
+        lattices = [(np.arange(width + 1), np.arange(height + 1), np.arange(depth + 1))]
+
+    coverage = np.zeros(canvas_width * canvas_height)
+    for band, (ii, jj, kk) in enumerate(lattices):
+        proj = _project_grid(ii, jj, kk, (width, height, depth), cell_size, perspective_factor,
+                             center_x, center_y, rounded=False)
+        dims = (len(ii) - 1, len(jj) - 1, len(kk) - 1)
+        weights = (_lattice_weights(ii), _lattice_weights(jj), _lattice_weights(kk))
+        if band < len(lattices) - 1:
+            # The last layer is the next band's first; count it there only
+            weights[2][-1] = 0
+        for lo in range(0, len(proj), _NODE_CHUNK):
+            _accumulate_nodes(proj, dims, weights, lo, min(lo + _NODE_CHUNK, len(proj)), coverage,
+                              canvas_width, canvas_height)
+    return coverage.reshape(canvas_height, canvas_width)
+
+
+def _density_levels(coverage: np.ndarray, levels: int) -> np.ndarray:
+    """
+    Maps coverage to ramp levels in one step. Levels follow the logarithm
+    of coverage relative to the densest cell, so both a lone line and the
+    differences inside a dense volume stay visible.
+    """
+    top = np.log1p(coverage.max(initial=0.0))
+    if top <= 0:
+        return np.zeros(coverage.shape, dtype=np.uint8)
+    level = np.ceil(np.log1p(coverage) / top * (levels - 1) - 0.05)
+    return np.clip(level, 0, levels - 1).astype(np.uint8)
+
+
+def _density_colors(levels: int) -> List[Tuple[int, int, int]]:
+    """Returns the color of every ramp level, from dim to full intensity."""
+    return [tuple(int(round(c * (0.25 + 0.75 * level / max(levels - 1, 1)))) for c in _DENSITY_COLOR)
+            for level in range(levels)]
+
+
 def generate_paper3d_design(width: int, height: int, depth: int,
                            cell_size: float = 1.0,
-                           perspective_factor: float = 0.5) -> List[List[str]]:
+                           perspective_factor: float = 0.5,
+                           canvas_width: int = 80,
+                           canvas_height: int = 40,
+                           workers: int = 1,
+                           lod: bool = True,
+                           antialias: bool = False) -> List[str]:
     """
     Generates a 2D ASCII representation of a 3D grid, simulating a paper-like
     geometric pattern.
@@ -21,15 +455,21 @@ def generate_paper3d_design(width: int, height: int, depth: int,
         depth (int): The depth of the 3D grid (z-axis).
         cell_size (float): The size of each cell in the grid.
         perspective_factor (float): Controls the perspective distortion.
+        canvas_width (int): The width of the output canvas in characters.
+        canvas_height (int): The height of the output canvas in characters.
+        workers (int): The number of processes used to rasterize the grid.
+            With more than one, the canvas planes live in shared memory.
+        lod (bool): Cull grid lines that miss the canvas and thin out lines
+            packed closer than one cell, so the work is bounded by the canvas
+            size rather than the grid size.
+        antialias (bool): Accumulate the coverage of every line per cell
+            and draw it with the DENSITY_RAMP characters and brightness,
+            instead of overwriting cells with line characters. Always
+            rasterized in this process.
 
     Returns:
-        List[List[str]]: A 2D list of characters representing the design.
+        List[str]: The rendered lines of the design.
     """
-    # Create an empty canvas
-    canvas_width = 80
-    canvas_height = 40
-    canvas = [[' ' for _ in range(canvas_width)] for _ in range(canvas_height)]
-    
     # Define a set of characters for drawing the lines
     characters = {
         'x_line': '-',
@@ -44,75 +484,516 @@ def generate_paper3d_design(width: int, height: int, depth: int,
     y_style = Style(color=Color.from_rgb(255, 0, 180))   # Magenta
     z_style = Style(color=Color.from_rgb(180, 255, 0))   # Yellow
 
-    # Center the projection
-    center_x = canvas_width // 2
-    center_y = canvas_height // 2
+    # Glyph lookup table indexed by primitive kind
+    glyphs = np.array([
+        ' ',
+        node_style.render(characters['node']),
+        x_style.render(characters['x_line']),
+        y_style.render(characters['y_line']),
+        z_style.render(characters['z_line']),
+    ], dtype=object)
+
+    if antialias:
+        colors = _density_colors(len(DENSITY_RAMP))
+        ramp = np.array([' '] + [Style(color=Color.from_rgb(*color)).render(char)
+                                 for char, color in zip(DENSITY_RAMP[1:], colors[1:])], dtype=object)
+        coverage = _grid_coverage(width, height, depth, cell_size, perspective_factor,
+                                  canvas_width, canvas_height, lod)
+        return ["".join(row) for row in ramp[_density_levels(coverage, len(DENSITY_RAMP))]]
 
-    def project_3d_to_2d(x: float, y: float, z: float) -> Tuple[int, int]:
-        """Projects a 3D point to 2D screen coordinates with perspective."""
-        # Scale the coordinates for projection
-        screen_x = center_x + x * (1 - z * perspective_factor)
-        screen_y = center_y + y * (1 - z * perspective_factor)
-        return int(round(screen_x)), int(round(screen_y))
-
-    # Iterate through the 3D grid and draw the lines and nodes
-    for i in range(width + 1):
-        for j in range(height + 1):
-            for k in range(depth + 1):
-                x, y, z = (i - width / 2) * cell_size, \
-                          (j - height / 2) * cell_size, \
-                          (k - depth / 2) * cell_size
-
-                # Project the current node
-                proj_x, proj_y = project_3d_to_2d(x, y, z)
-                if 0 <= proj_x < canvas_width and 0 <= proj_y < canvas_height:
-                    canvas[proj_y][proj_x] = node_style.render(characters['node'])
-
-                # Draw x-axis lines
-                if i < width:
-                    next_x, next_y, next_z = ((i + 1) - width / 2) * cell_size, \
-                                             (j - height / 2) * cell_size, \
-                                             (k - depth / 2) * cell_size
-                    proj_x2, proj_y2 = project_3d_to_2d(next_x, next_y, next_z)
-                    # Draw a line between the two points
-                    if 0 <= proj_y < canvas_height and 0 <= proj_y2 < canvas_height:
-                        start = min(proj_x, proj_x2)
-                        end = max(proj_x, proj_x2)
-                        for cx in range(start + 1, end):
-                            if 0 <= cx < canvas_width:
-                                canvas[proj_y][cx] = x_style.render(characters['x_line'])
-                
-                # Draw y-axis lines
-                if j < height:
-                    next_x, next_y, next_z = (i - width / 2) * cell_size, \
-                                             ((j + 1) - height / 2) * cell_size, \
-                                             (k - depth / 2) * cell_size
-                    proj_x2, proj_y2 = project_3d_to_2d(next_x, next_y, next_z)
-                    # Draw a line between the two points
-                    if 0 <= proj_x < canvas_width and 0 <= proj_x2 < canvas_width:
-                        start = min(proj_y, proj_y2)
-                        end = max(proj_y, proj_y2)
-                        for cy in range(start + 1, end):
-                            if 0 <= cy < canvas_height:
-                                canvas[cy][proj_x] = y_style.render(characters['y_line'])
-
-                # Draw z-axis lines
-                if k < depth:
-                    next_x, next_y, next_z = (i - width / 2) * cell_size, \
-                                             (j - height / 2) * cell_size, \
-                                             ((k + 1) - depth / 2) * cell_size
-                    proj_x2, proj_y2 = project_3d_to_2d(next_x, next_y, next_z)
-                    # Draw a line between the two points
-                    for step in np.linspace(0, 1, num=10):
-                        cx = int(round(proj_x + (proj_x2 - proj_x) * step))
-                        cy = int(round(proj_y + (proj_y2 - proj_y) * step))
-                        if 0 <= cx < canvas_width and 0 <= cy < canvas_height:
-                            canvas[cy][cx] = z_style.render(characters['z_line'])
+    kind_plane = _grid_kinds(width, height, depth, cell_size, perspective_factor,
+                             canvas_width, canvas_height, workers, lod)
 
     # Flatten the canvas to a list of strings
+    canvas = glyphs[kind_plane]
     output_lines = ["".join(row) for row in canvas]
     return output_lines
 
+# Scene kinds: nodes, then edges by their on-screen slope
+_SCENE_NODE, _SCENE_FLAT, _SCENE_STEEP, _SCENE_RISING, _SCENE_FALLING = 1, 2, 3, 4, 5
+
+# Smallest perspective scale kept; points at or behind the eye are culled
+_NEAR = 1e-3
+
+
+def _project_scene(points: np.ndarray, scale: float, perspective_factor: float,
+                   center_x: float, center_y: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Projects every point of a scene in one batch.
+
+    Returns:
+        Tuple of the (N, 2) float screen coordinates, the (N,) depths (larger
+        is farther away) and the (N,) mask of points in front of the eye.
+    """
+    p = points * scale
+    perspective = 1 - p[:, 2] * perspective_factor
+    screen = np.empty((len(p), 2))
+    screen[:, 0] = center_x + p[:, 0] * perspective
+    screen[:, 1] = center_y + p[:, 1] * perspective
+    return screen, p[:, 2], perspective > _NEAR
+
+
+def _clip_segments(x0: np.ndarray, y0: np.ndarray, x1: np.ndarray, y1: np.ndarray,
+                   canvas_width: int, canvas_height: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Clips segments to the canvas with the Liang-Barsky algorithm.
+
+    Returns:
+        Tuple of the mask of segments that reach the canvas and the start and
+        end parameters (t0, t1) of their visible part.
+    """
+    dx, dy = x1 - x0, y1 - y0
+    t0, t1 = np.zeros(len(x0)), np.ones(len(x0))
+    keep = np.ones(len(x0), dtype=bool)
+    for p, q in ((-dx, x0 + 0.5), (dx, canvas_width - 0.5 - x0),
+                 (-dy, y0 + 0.5), (dy, canvas_height - 0.5 - y0)):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            r = q / p
+        keep &= (p != 0) | (q >= 0)
+        t0 = np.where(p < 0, np.maximum(t0, r), t0)
+        t1 = np.where(p > 0, np.minimum(t1, r), t1)
+    return keep & (t0 <= t1), t0, t1
+
+
+def _rasterize_edges(screen: np.ndarray, depth: np.ndarray, edges: np.ndarray,
+                     canvas_width: int, canvas_height: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Rasterizes the visible part of every edge.
+
+    Each edge is clipped to the canvas first and then sampled once per cell
+    along its longer axis, so the work is proportional to the number of
+    cells actually covered.
+
+    Returns:
+        Tuple of flat canvas indices, scene kinds and depths of every cell.
+    """
+    a, b = edges[:, 0], edges[:, 1]
+    x0, y0, x1, y1 = screen[a, 0], screen[a, 1], screen[b, 0], screen[b, 1]
+    dx, dy = x1 - x0, y1 - y0
+    kind = np.where(np.abs(dy) * 2 < np.abs(dx), _SCENE_FLAT,
+                    np.where(np.abs(dx) * 2 < np.abs(dy), _SCENE_STEEP,
+                             np.where(dx * dy < 0, _SCENE_RISING, _SCENE_FALLING))).astype(np.uint8)
+
+    keep, t0, t1 = _clip_segments(x0, y0, x1, y1, canvas_width, canvas_height)
+    sel = np.nonzero(keep)[0]
+    t0, t1 = t0[sel], t1[sel]
+    span = t1 - t0
+    samples = np.ceil(np.maximum(np.abs(dx[sel]), np.abs(dy[sel])) * span).astype(np.int64) + 1
+    owner, step = _expand_runs(np.zeros(len(sel), dtype=np.int64), samples)
+    t = t0[owner] + span[owner] * (step / np.maximum(samples[owner] - 1, 1))
+    edge = sel[owner]
+
+    cx = np.rint(x0[edge] + dx[edge] * t).astype(np.int64)
+    cy = np.rint(y0[edge] + dy[edge] * t).astype(np.int64)
+    inside = (cx >= 0) & (cx < canvas_width) & (cy >= 0) & (cy < canvas_height)
+    z = depth[a[edge]] + (depth[b[edge]] - depth[a[edge]]) * t
+    return cy[inside] * canvas_width + cx[inside], kind[edge[inside]], z[inside]
+
+
+def _paint_depth(depth_plane: np.ndarray, kind_plane: np.ndarray, flat: np.ndarray,
+                 kind: np.ndarray, depth: np.ndarray):
+    """Paints cells into the planes; on overlap the nearest cell wins."""
+    np.minimum.at(depth_plane, flat, depth)
+    won = depth_plane[flat] == depth
+    kind_plane[flat[won]] = kind[won]
+
+
+def _scene_kinds(points: np.ndarray, edges: np.ndarray, scale: float, perspective_factor: float,
+                 canvas_width: int, canvas_height: int, center: Tuple[float, float, float]) -> np.ndarray:
+    """Rasterizes a scene into a (canvas_height, canvas_width) plane of scene kinds."""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+    edges = np.empty((0, 2), dtype=np.int64) if edges is None else np.asarray(edges, dtype=np.int64).reshape(-1, 2)
+
+    depth_plane = np.full(canvas_width * canvas_height, np.inf)
+    kind_plane = np.zeros(canvas_width * canvas_height, dtype=np.uint8)
+
+    if len(points):
+        if center is None:
+            center = (points.min(axis=0) + points.max(axis=0)) / 2
+        points = points - np.asarray(center, dtype=np.float64)
+        if scale is None:
+            reach = np.abs(points[:, :2]).max(axis=0)
+            room = np.array([canvas_width / 2 - 1, canvas_height / 2 - 1])
+            scale = float(np.min(room / np.maximum(reach, 1e-9)))
+
+        screen, depth, visible = _project_scene(points, scale, perspective_factor,
+                                                canvas_width // 2, canvas_height // 2)
+        _paint_scene(depth_plane, kind_plane, screen, depth, visible, edges, canvas_width, canvas_height)
+
+    return kind_plane.reshape(canvas_height, canvas_width)
+
+
+def _paint_scene(depth_plane: np.ndarray, kind_plane: np.ndarray, screen: np.ndarray, depth: np.ndarray,
+                 visible: np.ndarray, edges: np.ndarray, canvas_width: int, canvas_height: int):
+    """Rasterizes projected points and edges into the depth and kind planes."""
+    # Frustum culling: drop edges with an endpoint behind the eye
+    edges = edges[visible[edges[:, 0]] & visible[edges[:, 1]]]
+    for lo in range(0, len(edges), _NODE_CHUNK):
+        _paint_depth(depth_plane, kind_plane,
+                     *_rasterize_edges(screen, depth, edges[lo:lo + _NODE_CHUNK],
+                                       canvas_width, canvas_height))
+
+    # Nodes are painted last, so they win ties with their own edges
+    cell = np.rint(screen).astype(np.int64)
+    shown = visible & (cell[:, 0] >= 0) & (cell[:, 0] < canvas_width) \
+        & (cell[:, 1] >= 0) & (cell[:, 1] < canvas_height)
+    _paint_depth(depth_plane, kind_plane, cell[shown, 1] * canvas_width + cell[shown, 0],
+                 np.full(int(shown.sum()), _SCENE_NODE, dtype=np.uint8), depth[shown])
+
+
+def render_scene(points: np.ndarray, edges: np.ndarray = None,
+                 scale: float = None,
+                 perspective_factor: float = 0.0,
+                 canvas_width: int = 80,
+                 canvas_height: int = 40,
+                 center: Tuple[float, float, float] = None) -> List[str]:
+    """
+    Renders an arbitrary scene of points and edges, such as a 3d-network graph.
+
+    All points are projected once, with the same perspective model as the
+    grid. Points behind the eye and edges touching them are culled, edges are
+    clipped to the canvas before they are rasterized, and overlapping cells
+    keep the nearest primitive, so the cost follows the visible geometry.
+
+    Args:
+        points (np.ndarray): An (N, 3) array of point positions.
+        edges (np.ndarray): An (E, 2) array of point index pairs.
+        scale (float): Characters per scene unit. By default the scene is
+            scaled to fit the canvas.
+        perspective_factor (float): Controls the perspective distortion.
+        canvas_width (int): The width of the output canvas in characters.
+        canvas_height (int): The height of the output canvas in characters.
+        center (tuple): The scene point drawn at the center of the canvas.
+            Defaults to the center of the scene's bounding box.
+
+    Returns:
+        List[str]: The rendered lines of the scene.
+    """
+    kind_plane = _scene_kinds(points, edges, scale, perspective_factor,
+                              canvas_width, canvas_height, center)
+    return _styled_lines(kind_plane)
+
+
+def _styled_lines(kind_plane: np.ndarray) -> List[str]:
+    """Converts a plane of scene kinds to lines styled for the console."""
+    # Same styles as the grid, one per scene kind
+    glyphs = np.array([
+        ' ',
+        Style(color=Color.from_rgb(255, 165, 0)).render('•'),
+        Style(color=Color.from_rgb(0, 180, 255)).render('-'),
+        Style(color=Color.from_rgb(255, 0, 180)).render('|'),
+        Style(color=Color.from_rgb(180, 255, 0)).render('/'),
+        Style(color=Color.from_rgb(180, 255, 0)).render('\\'),
+    ], dtype=object)
+    return ["".join(row) for row in glyphs[kind_plane]]
+
+
+# Characters and colors of the grid and scene kinds, for plain canvases
+_KIND_CHARS = ' •-|/\\'
+_KIND_COLORS = [None, (255, 165, 0), (0, 180, 255), (255, 0, 180), (180, 255, 0), (180, 255, 0)]
+
+
+def _plane_to_canvas(plane: np.ndarray, chars: str, colors: List) -> Tuple[List[str], List[array]]:
+    """
+    Converts a plane of lookup indices to character rows and palette style
+    id rows. Index 0 is always plain.
+    """
+    codes = np.array([ord(char) for char in chars], dtype=np.uint32)
+    style_ids = np.array([0] + [DEFAULT_PALETTE.intern(color) for color in colors[1:]],
+                         dtype=np.uint16)
+    text = codes[plane].tobytes().decode('utf-32-le')
+    width = plane.shape[1]
+    rows = [text[y * width:(y + 1) * width] for y in range(plane.shape[0])]
+    return rows, [array('H', row.tobytes()) for row in style_ids[plane]]
+
+
+def _kinds_to_canvas(kind_plane: np.ndarray) -> Tuple[List[str], List[array]]:
+    """Converts a plane of kinds to character rows and palette style id rows."""
+    return _plane_to_canvas(kind_plane, _KIND_CHARS, _KIND_COLORS)
+
+
+def paper3d_canvas(width: int, height: int, depth: int,
+                   cell_size: float = 1.0,
+                   perspective_factor: float = 0.5,
+                   canvas_width: int = 80,
+                   canvas_height: int = 40,
+                   workers: int = 1,
+                   lod: bool = True) -> Tuple[List[str], List[array]]:
+    """
+    Rasterizes the grid like generate_paper3d_design, but returns plain
+    character rows and style id rows from the shared palette, as the
+    exporters in asc3_export expect.
+    """
+    return _kinds_to_canvas(_grid_kinds(width, height, depth, cell_size, perspective_factor,
+                                        canvas_width, canvas_height, workers, lod))
+
+
+def paper3d_density_canvas(width: int, height: int, depth: int,
+                           cell_size: float = 1.0,
+                           perspective_factor: float = 0.5,
+                           canvas_width: int = 80,
+                           canvas_height: int = 40,
+                           lod: bool = True) -> Tuple[List[str], List[array]]:
+    """
+    Rasterizes the grid like generate_paper3d_design(antialias=True), but
+    returns plain character rows and style id rows from the shared palette.
+    """
+    coverage = _grid_coverage(width, height, depth, cell_size, perspective_factor,
+                              canvas_width, canvas_height, lod)
+    return _plane_to_canvas(_density_levels(coverage, len(DENSITY_RAMP)), DENSITY_RAMP,
+                            _density_colors(len(DENSITY_RAMP)))
+
+
+def scene_canvas(points: np.ndarray, edges: np.ndarray = None,
+                 scale: float = None,
+                 perspective_factor: float = 0.0,
+                 canvas_width: int = 80,
+                 canvas_height: int = 40,
+                 center: Tuple[float, float, float] = None) -> Tuple[List[str], List[array]]:
+    """
+    Rasterizes a scene like render_scene, but returns plain character rows
+    and style id rows from the shared palette.
+    """
+    return _kinds_to_canvas(_scene_kinds(points, edges, scale, perspective_factor,
+                                         canvas_width, canvas_height, center))
+
+
+# Cameras and scenes. Objects are point sets with edges, each placed in the
+# world by a 4x4 model matrix. Every frame the model matrices are stacked
+# with the camera's view and projection matrices into one (objects, 4, 4)
+# array in a single matmul, and every point of every object is transformed
+# by its object's matrix in one batched multiply, so a scene of many
+# objects costs about the same as one object with all their points.
+
+
+def translation(x: float, y: float, z: float) -> np.ndarray:
+    """Returns the 4x4 matrix that moves points by (x, y, z)."""
+    matrix = np.eye(4)
+    matrix[:3, 3] = (x, y, z)
+    return matrix
+
+
+def scaling(x: float, y: float = None, z: float = None) -> np.ndarray:
+    """Returns the 4x4 matrix that scales points, uniformly if only x is given."""
+    return np.diag([x, x if y is None else y, x if z is None else z, 1.0])
+
+
+def rotation(axis: str, degrees: float) -> np.ndarray:
+    """
+    Returns the 4x4 matrix that rotates points about the 'x', 'y' or 'z'
+    axis, counterclockwise looking down the axis.
+    """
+    if axis not in ('x', 'y', 'z'):
+        raise ValueError(f"Unsupported axis '{axis}'. Expected 'x', 'y' or 'z'.")
+    c, s = math.cos(math.radians(degrees)), math.sin(math.radians(degrees))
+    i, j = {'x': (1, 2), 'y': (2, 0), 'z': (0, 1)}[axis]
+    matrix = np.eye(4)
+    matrix[i, i], matrix[i, j], matrix[j, i], matrix[j, j] = c, -s, s, c
+    return matrix
+
+
+def grid_mesh(width: int, height: int, depth: int,
+              cell_size: float = 1.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Builds the points and edges of a width x height x depth grid of nodes,
+    centered on the origin, for adding to a Scene.
+
+    Returns:
+        Tuple of the (N, 3) points and (E, 2) edges.
+    """
+    ii, jj, kk = np.meshgrid(np.arange(width), np.arange(height), np.arange(depth), indexing='ij')
+    points = np.stack([ii.ravel() - (width - 1) / 2, jj.ravel() - (height - 1) / 2,
+                       kk.ravel() - (depth - 1) / 2], axis=1) * cell_size
+    index = np.arange(width * height * depth).reshape(width, height, depth)
+    edges = [np.stack([index[:-1].ravel(), index[1:].ravel()], axis=1),
+             np.stack([index[:, :-1].ravel(), index[:, 1:].ravel()], axis=1),
+             np.stack([index[:, :, :-1].ravel(), index[:, :, 1:].ravel()], axis=1)]
+    return points, np.concatenate(edges)
+
+
+class Camera:
+    """
+    A camera looking from a position at a target, with a perspective or
+    orthographic projection.
+
+    Canvas cells are taller than they are wide, so the projection stretches
+    x by cell_aspect (cell height / cell width) to keep shapes in proportion.
+    """
+
+    def __init__(self, position=(0.0, 0.0, 10.0), target=(0.0, 0.0, 0.0), up=(0.0, 1.0, 0.0),
+                 fov: float = 60.0, near: float = 0.1, far: float = 1000.0,
+                 cell_aspect: float = 2.0, orthographic: bool = False, view_height: float = 10.0):
+        """
+        Args:
+            position (tuple): Where the camera is.
+            target (tuple): The point it looks at.
+            up (tuple): The direction that is up on the canvas.
+            fov (float): The vertical field of view in degrees.
+            near (float): Points closer than this are culled.
+            far (float): Points farther than this are culled.
+            cell_aspect (float): The height of a canvas cell over its width.
+            orthographic (bool): Project without perspective.
+            view_height (float): The world height the canvas shows when
+                orthographic.
+        """
+        self.position = np.asarray(position, dtype=np.float64)
+        self.target = np.asarray(target, dtype=np.float64)
+        self.up = np.asarray(up, dtype=np.float64)
+        self.fov = fov
+        self.near = near
+        self.far = far
+        self.cell_aspect = cell_aspect
+        self.orthographic = orthographic
+        self.view_height = view_height
+
+    def view_matrix(self) -> np.ndarray:
+        """Returns the matrix from world to camera space, looking down -z."""
+        forward = self.target - self.position
+        forward /= np.linalg.norm(forward)
+        right = np.cross(forward, self.up)
+        right /= np.linalg.norm(right)
+        up = np.cross(right, forward)
+        view = np.eye(4)
+        view[0, :3], view[1, :3], view[2, :3] = right, up, -forward
+        view[:3, 3] = -view[:3, :3] @ self.position
+        return view
+
+    def projection_matrix(self, canvas_width: int, canvas_height: int) -> np.ndarray:
+        """Returns the matrix from camera space to clip space for a canvas."""
+        aspect = canvas_width / (canvas_height * self.cell_aspect)
+        near, far = self.near, self.far
+        projection = np.zeros((4, 4))
+        if self.orthographic:
+            projection[0, 0] = 2 / (self.view_height * aspect)
+            projection[1, 1] = 2 / self.view_height
+            projection[2, 2] = -2 / (far - near)
+            projection[2, 3] = -(far + near) / (far - near)
+            projection[3, 3] = 1
+        else:
+            focal = 1 / math.tan(math.radians(self.fov) / 2)
+            projection[0, 0] = focal / aspect
+            projection[1, 1] = focal
+            projection[2, 2] = (far + near) / (near - far)
+            projection[2, 3] = 2 * far * near / (near - far)
+            projection[3, 2] = -1
+        return projection
+
+
+class Scene:
+    """
+    Objects of points and edges placed in the world by model matrices.
+
+    The points of all objects are kept packed in one array with the index
+    of their object, rebuilt only when objects are added, so a frame only
+    changes matrices.
+    """
+
+    def __init__(self):
+        self._points: List[np.ndarray] = []
+        self._edges: List[np.ndarray] = []
+        self.transforms: List[np.ndarray] = []
+        self._packed = None
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def add(self, points: np.ndarray, edges: np.ndarray = None, transform: np.ndarray = None) -> int:
+        """
+        Adds an object.
+
+        Args:
+            points (np.ndarray): An (N, 3) array of points in object space.
+            edges (np.ndarray): An (E, 2) array of point index pairs.
+            transform (np.ndarray): The 4x4 model matrix; identity by default.
+
+        Returns:
+            int: The index of the object, for set_transform.
+        """
+        self._points.append(np.asarray(points, dtype=np.float64).reshape(-1, 3))
+        self._edges.append(np.empty((0, 2), dtype=np.int64) if edges is None
+                           else np.asarray(edges, dtype=np.int64).reshape(-1, 2))
+        self.transforms.append(np.eye(4) if transform is None else np.asarray(transform, dtype=np.float64))
+        self._packed = None
+        return len(self._points) - 1
+
+    def set_transform(self, index: int, transform: np.ndarray):
+        """Replaces the model matrix of an object."""
+        self.transforms[index] = np.asarray(transform, dtype=np.float64)
+
+    def _pack(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Returns the homogeneous points, their object indices and the edges of all objects."""
+        if self._packed is None:
+            sizes = [len(points) for points in self._points]
+            offsets = np.cumsum([0] + sizes[:-1])
+            points = np.ones((sum(sizes), 4))
+            if sizes:
+                points[:, :3] = np.concatenate(self._points)
+            owner = np.repeat(np.arange(len(sizes)), sizes)
+            edges = np.concatenate([edges + offset for edges, offset in zip(self._edges, offsets)]) \
+                if sizes else np.empty((0, 2), dtype=np.int64)
+            self._packed = (points, owner, edges)
+        return self._packed
+
+    def project(self, camera: Camera, canvas_width: int,
+                canvas_height: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Projects the points of every object onto a canvas.
+
+        Returns:
+            Tuple of the (N, 2) float screen coordinates, the (N,) depths
+            as normalized device z (-1 at the near plane, 1 at the far
+            plane; it grows with distance, but not linearly under
+            perspective) and the (N,) mask of points between the near and
+            far planes.
+        """
+        points, owner, _ = self._pack()
+        screen, depth = np.empty((len(points), 2)), np.empty(len(points))
+        if not len(points):
+            return screen, depth, np.zeros(0, dtype=bool)
+
+        # One matmul stacks projection, view and every model matrix
+        camera_matrix = camera.projection_matrix(canvas_width, canvas_height) @ camera.view_matrix()
+        matrices = camera_matrix @ np.stack(self.transforms)
+        for lo in range(0, len(points), _NODE_CHUNK):
+            hi = lo + _NODE_CHUNK
+            clip = np.matmul(matrices[owner[lo:hi]], points[lo:hi, :, None])[:, :, 0]
+            w = clip[:, 3]
+            safe = np.where(np.abs(w) > _NEAR, w, _NEAR)
+            screen[lo:hi, 0] = (clip[:, 0] / safe + 1) * canvas_width / 2 - 0.5
+            screen[lo:hi, 1] = (1 - clip[:, 1] / safe) * canvas_height / 2 - 0.5
+            depth[lo:hi] = clip[:, 2] / safe
+        # Normalized depth runs from -1 at the near plane to 1 at the far plane
+        visible = (depth >= -1) & (depth <= 1)
+        return screen, depth, visible
+
+    def kinds(self, camera: Camera, canvas_width: int = 80, canvas_height: int = 40) -> np.ndarray:
+        """Rasterizes the scene into a (canvas_height, canvas_width) plane of scene kinds."""
+        depth_plane = np.full(canvas_width * canvas_height, np.inf)
+        kind_plane = np.zeros(canvas_width * canvas_height, dtype=np.uint8)
+        if len(self):
+            screen, depth, visible = self.project(camera, canvas_width, canvas_height)
+            _paint_scene(depth_plane, kind_plane, screen, depth, visible, self._pack()[2],
+                         canvas_width, canvas_height)
+        return kind_plane.reshape(canvas_height, canvas_width)
+
+    def render(self, camera: Camera, canvas_width: int = 80, canvas_height: int = 40) -> List[str]:
+        """
+        Renders the scene as seen by a camera, styled like render_scene.
+
+        Returns:
+            List[str]: The rendered lines of the scene.
+        """
+        return _styled_lines(self.kinds(camera, canvas_width, canvas_height))
+
+    def canvas(self, camera: Camera, canvas_width: int = 80,
+               canvas_height: int = 40) -> Tuple[List[str], List[array]]:
+        """
+        Rasterizes the scene like render, but returns plain character rows
+        and style id rows from the shared palette.
+        """
+        return _kinds_to_canvas(self.kinds(camera, canvas_width, canvas_height))
+
+
 if __name__ == "__main__":
     # Define the parameters for the design
     grid_width = 8
@@ -129,4 +1010,10 @@ if __name__ == "__main__":
     for line in design_output:
         console.print(line)
     console.print("\n" + "=" * 82 + "\n", style="bold white")
-                    
+
+    # Preview a network written by network3d.py, if one was given
+    if len(sys.argv) > 1:
+        from network3d import load_network
+        scene_points, scene_edges = load_network(sys.argv[1])
+        for line in render_scene(scene_points, scene_edges, perspective_factor=0.002):
+            console.print(line)
@@ -0,0 +1,262 @@
+# asc3.py
+#
+# Command line tools for Asc3.
+#
+#     python asc3.py batch programs.jsonl > results.jsonl
+#
+# batch reads one Asc3 program per line of JSON, renders the programs on a
+# pool of worker processes and writes one JSON result per program. Only a
+# bounded window of programs is in flight at a time, so memory stays flat
+# however long the input is. Every result carries the byte offset up to
+# which all input has been handled; pass it to --resume-from to continue
+# after a crash. A throughput and latency summary is printed to stderr.
+#
+# A program line is either a list of commands (see Asc3Core.run_program) or
+# an object:
+#
+#     {"id": "banner", "width": 80, "height": 24, "fill_char": " ",
+#      "ansi": false, "program": [{"command": "define_font", ...}, ...]}
+#
+# A program without an id is identified by the byte offset of its line, which
+# stays the same when a run is resumed.
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from asc3_diagnostics import LEVEL_NAMES, WARNING, Diagnostics
+from paper_py import Asc3Core
+
+# Latencies kept for the summary percentiles
+_LATENCY_SAMPLES = 10000
+
+
+def render_program(line: bytes, defaults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Renders one program line.
+
+    Args:
+        line (bytes): The JSON text of the program.
+        defaults (dict): Values for width, height, fill_char and ansi where
+            the program gives none.
+
+    Returns:
+        dict: The rendered output and the warnings raised while rendering,
+        or the error that stopped the program. Any error is reported this
+        way, so one bad program never stops a batch.
+    """
+    messages: List[str] = []
+    spec: Dict[str, Any] = {}
+    # A channel of the program's own, so its warnings never mix with those
+    # of other cores in the process
+    diagnostics = Diagnostics(level=WARNING,
+                              sink=lambda level, message: messages.append(f"{LEVEL_NAMES[level]}: {message}"))
+    try:
+        program = json.loads(line)
+        if isinstance(program, list):
+            program = {'program': program}
+        if not isinstance(program, dict):
+            raise TypeError(f"A program must be a JSON object or list, not {type(program).__name__}.")
+        spec = program
+        options = dict(defaults, **{key: spec[key] for key in defaults if key in spec})
+        core = Asc3Core(options['width'], options['height'], options['fill_char'], diagnostics=diagnostics)
+        core.run_program(spec.get('program', []))
+        output = core.render_ansi() if options['ansi'] else core.render()
+    except Exception as e:
+        diagnostics.report()
+        return {'id': spec.get('id'), 'error': f"{type(e).__name__}: {e}", 'warnings': messages}
+    result = {'id': spec.get('id'), 'output': output}
+    if messages:
+        result['warnings'] = messages
+    return result
+
+
+def _file_name(program_id: Any) -> Optional[str]:
+    """
+    Returns the name of the file a program's output is written to, or None
+    if its id could reach outside the output directory.
+    """
+    name = f"{program_id}.txt"
+    separators = {'/', '\\', os.sep, os.altsep} - {None}
+    if '..' in name or '\x00' in name or any(separator in name for separator in separators):
+        return None
+    return name
+
+
+def _read_lines(stream, offset: int) -> Iterator[Tuple[int, int, bytes]]:
+    """Yields (start offset, end offset, line) for every non-blank line."""
+    for line in stream:
+        start, offset = offset, offset + len(line)
+        if line.strip():
+            yield start, offset, line
+
+
+def _open_input(path: str, offset: int):
+    """Opens the input in binary mode, positioned at offset."""
+    if path == '-':
+        stream = sys.stdin.buffer
+        remaining = offset
+        while remaining:
+            skipped = len(stream.read(min(remaining, 1 << 20)))
+            if not skipped:
+                break
+            remaining -= skipped
+        return stream
+    stream = open(path, 'rb')
+    stream.seek(offset)
+    return stream
+
+
+class _Summary:
+    """Counts programs and samples their latencies for the summary."""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.input_bytes = 0
+        self.latencies: List[float] = []
+        self._random = random.Random(0)
+        self.start = time.perf_counter()
+
+    def add(self, result: Dict[str, Any], size: int, latency: float):
+        self.count += 1
+        self.errors += 'error' in result
+        self.input_bytes += size
+        # Reservoir sampling keeps the percentiles honest in bounded memory
+        if len(self.latencies) < _LATENCY_SAMPLES:
+            self.latencies.append(latency)
+        else:
+            slot = self._random.randrange(self.count)
+            if slot < _LATENCY_SAMPLES:
+                self.latencies[slot] = latency
+
+    def report(self, out):
+        elapsed = time.perf_counter() - self.start
+        print(f"{self.count} programs ({self.errors} failed) in {elapsed:.2f}s: "
+              f"{self.count / max(elapsed, 1e-9):.1f} programs/s, "
+              f"{self.input_bytes / max(elapsed, 1e-9) / 1e6:.2f} MB/s", file=out)
+        if self.latencies:
+            ordered = sorted(self.latencies)
+            percentiles = ', '.join(
+                f"p{p} {ordered[min(int(len(ordered) * p / 100), len(ordered) - 1)] * 1000:.1f}ms"
+                for p in (50, 95, 99))
+            print(f"latency: {percentiles}, max {ordered[-1] * 1000:.1f}ms", file=out)
+
+
+def batch(args) -> int:
+    """Runs the batch command."""
+    defaults = {'width': args.width, 'height': args.height, 'fill_char': args.fill_char, 'ansi': args.ansi}
+    window = args.window or 4 * max(args.workers, 1)
+    out = sys.stdout if args.output == '-' else open(args.output, 'a' if args.resume_from else 'w')
+    if args.output_dir:
+        os.makedirs(args.output_dir, exist_ok=True)
+    summary = _Summary()
+
+    # Lines in flight, by start offset, in input order; the first one is
+    # the offset up to which everything has been handled
+    in_flight: 'OrderedDict[int, int]' = OrderedDict()
+    read_to = args.resume_from
+
+    def finish(start: int, end: int, submitted: float, result: Dict[str, Any]):
+        del in_flight[start]
+        if result.get('id') is None:
+            result['id'] = start
+        if args.output_dir and 'output' in result:
+            name = _file_name(result['id'])
+            if name is None:
+                del result['output']
+                result['error'] = f"ValueError: Id {result['id']!r} cannot be used as a file name."
+            else:
+                path = os.path.join(args.output_dir, name)
+                with open(path, 'w', encoding='utf-8') as file:
+                    file.write(result.pop('output'))
+                    file.write('\n')
+                result['file'] = path
+        summary.add(result, end - start, time.perf_counter() - submitted)
+        result['offset'] = start
+        result['resume'] = next(iter(in_flight), read_to)
+        out.write(json.dumps(result, ensure_ascii=False))
+        out.write('\n')
+
+    stream = _open_input(args.input, args.resume_from)
+    executor = ProcessPoolExecutor(args.workers) if args.workers > 1 else None
+    pending = deque()
+
+    def collect(limit: int):
+        # Ordered output waits for the oldest program, unordered output for
+        # whichever finishes first
+        while len(pending) > limit:
+            if args.unordered:
+                done, _ = wait([entry[0] for entry in pending], return_when=FIRST_COMPLETED)
+                finished = [entry for entry in pending if entry[0] in done]
+                for entry in finished:
+                    pending.remove(entry)
+            else:
+                finished = [pending.popleft()]
+            for future, *entry in finished:
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # The worker itself failed, not the program
+                    result = {'id': None, 'error': f"{type(e).__name__}: {e}"}
+                finish(*entry, result)
+
+    try:
+        for start, end, line in _read_lines(stream, args.resume_from):
+            in_flight[start] = end
+            read_to = end
+            submitted = time.perf_counter()
+            if executor is None:
+                finish(start, end, submitted, render_program(line, defaults))
+                continue
+            pending.append((executor.submit(render_program, line, defaults), start, end, submitted))
+            collect(window - 1)
+        collect(0)
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+        if stream is not sys.stdin.buffer:
+            stream.close()
+        out.flush()
+        if out is not sys.stdout:
+            out.close()
+
+    summary.report(sys.stderr)
+    print(f"resume offset: {read_to}", file=sys.stderr)
+    return 1 if summary.errors else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog='asc3', description="Asc3 command line tools.")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    batch_parser = commands.add_parser('batch', help="render a JSONL stream of Asc3 programs")
+    batch_parser.add_argument('input', nargs='?', default='-', help="JSONL file of programs (default: stdin)")
+    batch_parser.add_argument('-o', '--output', default='-', help="JSONL file of results (default: stdout)")
+    batch_parser.add_argument('--output-dir', help="write each rendering to <id>.txt here instead of inline")
+    batch_parser.add_argument('-j', '--workers', type=int, default=os.cpu_count() or 1,
+                              help="worker processes (1 renders in this process)")
+    batch_parser.add_argument('--window', type=int, default=0,
+                              help="most programs in flight (default: 4 per worker)")
+    batch_parser.add_argument('--unordered', action='store_true',
+                              help="write results as they finish instead of in input order")
+    batch_parser.add_argument('--resume-from', type=int, default=0, metavar='OFFSET',
+                              help="skip this many bytes of input, as given by a result's resume field")
+    batch_parser.add_argument('--width', type=int, default=80, help="default canvas width")
+    batch_parser.add_argument('--height', type=int, default=24, help="default canvas height")
+    batch_parser.add_argument('--fill-char', default=' ', help="default fill character")
+    batch_parser.add_argument('--ansi', action='store_true', help="render styles as ANSI escape sequences")
+    batch_parser.set_defaults(run=batch)
+
+    args = parser.parse_args(argv)
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
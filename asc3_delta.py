@@ -0,0 +1,302 @@
+# asc3_delta.py
+#
+# Delta encoding between two Asc3Core canvas states. A delta lists the runs
+# of cells whose character or style changed, so a client holding the
+# previous frame can catch up by applying only what changed. Keyframes
+# describe a whole frame (as runs over a blank canvas) so that late joiners
+# can start from any keyframe.
+#
+# Runs carry palette style ids. The serialized forms carry a table of the
+# styles themselves instead, so a receiver with another palette can intern
+# them into its own. Serializing takes the palette of the encoding core and
+# parsing the palette of the receiving one.
+
+import json
+import operator
+import struct
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from asc3_styles import StylePalette, style_from_json, style_runs, style_to_json
+
+# Binary format: magic, version, flags, seq, base seq, width, height,
+# number of styles, number of runs.
+_MAGIC = b'A3D'
+_VERSION = 2
+_HEADER = struct.Struct('<3sBBIIHHHI')
+_RUN = struct.Struct('<HHHH')
+_FLAG_KEYFRAME = 1
+_NO_STYLE = 0xFFFF
+
+
+# A frame row: the row's text, its style ids as bytes and, when some cell
+# holds more than one character, its cells
+FrameRow = Tuple[str, bytes, Optional[Tuple[str, ...]]]
+
+
+class Run(NamedTuple):
+    """
+    A horizontal run of changed cells starting at (row, col), all in one
+    style, given as a palette style id.
+    """
+    row: int
+    col: int
+    text: str
+    style: int = 0
+
+
+class Delta(NamedTuple):
+    """
+    The changes that turn frame base into frame seq.
+
+    A keyframe applies to a blank canvas of the given size, so it can be
+    applied whatever frame the client holds; its base is ignored.
+    """
+    seq: int
+    base: int
+    keyframe: bool
+    width: int
+    height: int
+    runs: List[Run]
+
+
+def _row_codes(row: str) -> np.ndarray:
+    return np.frombuffer(row.encode('utf-32-le'), dtype=np.uint32)
+
+
+def _row_styles(row: bytes) -> np.ndarray:
+    return np.frombuffer(row, dtype=np.uint16)
+
+
+def _row_cells(row: FrameRow) -> Sequence[str]:
+    text, _, cells = row
+    return text if cells is None else cells
+
+
+def _changed_cells(old: FrameRow, new: FrameRow) -> np.ndarray:
+    """Compares two frame rows cell by cell."""
+    if old[2] is None and new[2] is None:
+        return _row_codes(old[0]) != _row_codes(new[0])
+    return np.fromiter(map(operator.ne, _row_cells(old), _row_cells(new)), dtype=bool, count=len(new[1]) // 2)
+
+
+def diff_rows(previous: Sequence[FrameRow], current: Sequence[FrameRow], merge_gap: int = 4) -> List[Run]:
+    """
+    Finds the runs of cells that differ between two frames.
+
+    Frames are sequences of rows as frame_rows captures them. A cell
+    differs if its characters or its style do.
+    Equal rows are skipped with a single comparison. Changed cells that are
+    at most merge_gap cells apart are merged, since a short stretch of
+    unchanged text is cheaper to resend than a new run header, and merged
+    stretches are split where the style changes.
+
+    Args:
+        previous (list): The rows of the previous frame.
+        current (list): The rows of the current frame.
+        merge_gap (int): The largest unchanged gap merged into a run.
+
+    Returns:
+        list: The changed runs, in row order.
+    """
+    runs = []
+    for y, (old, new) in enumerate(zip(previous, current)):
+        if old == new:
+            continue
+        styles = _row_styles(new[1])
+        changed = np.flatnonzero(_changed_cells(old, new) | (_row_styles(old[1]) != styles))
+        cells = _row_cells(new)
+        breaks = np.flatnonzero(np.diff(changed) > merge_gap + 1)
+        starts = np.concatenate(([changed[0]], changed[breaks + 1]))
+        ends = np.concatenate((changed[breaks], [changed[-1]])) + 1
+        for start, end in zip(starts.tolist(), ends.tolist()):
+            for run_start, run_end, style_id in style_runs(styles[start:end]):
+                run_start, run_end = start + run_start, start + run_end
+                runs.append(Run(y, run_start, ''.join(cells[run_start:run_end]), style_id))
+    return runs
+
+
+def frame_rows(canvas: Sequence[Sequence[str]], style_rows: Sequence) -> List[FrameRow]:
+    """
+    Captures a canvas (a list of rows of cells) and its style id rows as
+    immutable frame rows.
+    """
+    rows = []
+    for row, style_row in zip(canvas, style_rows):
+        text = ''.join(row)
+        rows.append((text, style_row.tobytes(), None if len(text) == len(row) else tuple(row)))
+    return rows
+
+
+def blank_frame(width: int, height: int, fill_char: str = ' ') -> List[FrameRow]:
+    """The frame rows of a blank canvas, which keyframes are encoded against."""
+    return [(fill_char * width, bytes(2 * width), None)] * height
+
+
+class DeltaEncoder:
+    """
+    Produces a stream of deltas from successive frames of a core.
+
+    A keyframe is emitted for the first frame, every keyframe_interval
+    frames after that, whenever the canvas size changes and on request, for
+    example when a new client subscribes.
+    """
+
+    def __init__(self, keyframe_interval: int = 30, merge_gap: int = 4):
+        """
+        Args:
+            keyframe_interval (int): Frames between two keyframes.
+            merge_gap (int): The largest unchanged gap merged into a run.
+        """
+        self.keyframe_interval = keyframe_interval
+        self.merge_gap = merge_gap
+        self.seq = -1
+        self._previous: Optional[List[FrameRow]] = None
+        self._size = None
+        self._fill_char = ' '
+        self._since_keyframe = 0
+        self._keyframe_requested = False
+
+    def request_keyframe(self):
+        """Makes the next encoded frame a keyframe."""
+        self._keyframe_requested = True
+
+    def encode(self, core) -> Delta:
+        """
+        Encodes the current canvas of a core against the previous frame.
+
+        Args:
+            core (Asc3Core): The core whose canvas is the new frame.
+
+        Returns:
+            Delta: A delta, or a keyframe when one is due.
+        """
+        rows = frame_rows(core.canvas, core.style_rows)
+        width, height = core.canvas_width, core.canvas_height
+        self.seq += 1
+        self._since_keyframe += 1
+
+        keyframe = (self._previous is None or self._keyframe_requested
+                    or self._since_keyframe >= self.keyframe_interval
+                    or self._size != (width, height))
+        if keyframe:
+            delta = Delta(self.seq, self.seq, True, width, height,
+                          diff_rows(blank_frame(width, height, core.fill_char), rows, self.merge_gap))
+            self._since_keyframe = 0
+            self._keyframe_requested = False
+        else:
+            delta = Delta(self.seq, self.seq - 1, False, width, height,
+                          diff_rows(self._previous, rows, self.merge_gap))
+        self._previous = rows
+        self._size = (width, height)
+        self._fill_char = core.fill_char
+        return delta
+
+    def keyframe(self) -> Delta:
+        """
+        Encodes the last frame again as a keyframe, without changing the
+        stream: the next delta still applies on top of it. This lets a client
+        that joins or falls behind catch up without a keyframe for everyone.
+
+        Raises:
+            ValueError: If no frame was encoded yet.
+        """
+        if self._previous is None:
+            raise ValueError("No frame was encoded yet.")
+        width, height = self._size
+        return Delta(self.seq, self.seq, True, width, height,
+                     diff_rows(blank_frame(width, height, self._fill_char), self._previous, self.merge_gap))
+
+
+def run_styles(delta: Delta) -> List[int]:
+    """Returns the style ids of a delta's styled runs, in order of first use."""
+    return list(dict.fromkeys(run.style for run in delta.runs if run.style))
+
+
+def to_dict(delta: Delta, palette: StylePalette) -> dict:
+    """
+    Converts a delta to plain JSON-compatible data. The styles used are
+    listed once in 'styles', and a styled run ends with its index there.
+    """
+    styles = run_styles(delta)
+    style_index = {style_id: index for index, style_id in enumerate(styles)}
+    return {
+        'seq': delta.seq,
+        'base': delta.base,
+        'key': delta.keyframe,
+        'w': delta.width,
+        'h': delta.height,
+        'styles': [style_to_json(palette.styles[style_id]) for style_id in styles],
+        'runs': [[run.row, run.col, run.text] + ([style_index[run.style]] if run.style else [])
+                 for run in delta.runs],
+    }
+
+
+def from_dict(obj: dict, palette: StylePalette) -> Delta:
+    """
+    Builds a delta from data produced by to_dict, interning its styles into
+    a palette.
+    """
+    ids = [palette.intern_style(style_from_json(item)) for item in obj.get('styles', [])]
+    return Delta(obj['seq'], obj['base'], obj['key'], obj['w'], obj['h'],
+                 [Run(row, col, text, ids[style[0]] if style else 0) for row, col, text, *style in obj['runs']])
+
+
+def to_json(delta: Delta, palette: StylePalette) -> str:
+    """Serializes a delta as compact JSON."""
+    return json.dumps(to_dict(delta, palette), separators=(',', ':'), ensure_ascii=False)
+
+
+def from_json(data: str, palette: StylePalette) -> Delta:
+    """Parses a delta serialized with to_json."""
+    return from_dict(json.loads(data), palette)
+
+
+def to_bytes(delta: Delta, palette: StylePalette) -> bytes:
+    """
+    Serializes a delta in the compact binary format.
+
+    The header is followed by the style table (length-prefixed UTF-8 JSON
+    styles) and then one record per run: row, column, style index and text
+    length, followed by the UTF-8 text.
+    """
+    styles = run_styles(delta)
+    style_index = {style_id: index for index, style_id in enumerate(styles)}
+    parts = [_HEADER.pack(_MAGIC, _VERSION, _FLAG_KEYFRAME if delta.keyframe else 0,
+                          delta.seq, delta.base, delta.width, delta.height,
+                          len(styles), len(delta.runs))]
+    for style_id in styles:
+        style = json.dumps(style_to_json(palette.styles[style_id]), separators=(',', ':')).encode('utf-8')
+        parts.append(struct.pack('<H', len(style)))
+        parts.append(style)
+    for run in delta.runs:
+        text = run.text.encode('utf-8')
+        parts.append(_RUN.pack(run.row, run.col, style_index.get(run.style, _NO_STYLE), len(text)))
+        parts.append(text)
+    return b''.join(parts)
+
+
+def from_bytes(data: bytes, palette: StylePalette) -> Delta:
+    """Parses a delta serialized with to_bytes, interning its styles into a palette."""
+    magic, version, flags, seq, base, width, height, style_count, run_count = \
+        _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("Not an Asc3 delta, or an unsupported version.")
+
+    offset = _HEADER.size
+    ids = []
+    for _ in range(style_count):
+        (length,) = struct.unpack_from('<H', data, offset)
+        offset += 2
+        ids.append(palette.intern_style(style_from_json(json.loads(data[offset:offset + length]))))
+        offset += length
+
+    runs = []
+    for _ in range(run_count):
+        row, col, style, length = _RUN.unpack_from(data, offset)
+        offset += _RUN.size
+        text = data[offset:offset + length].decode('utf-8')
+        offset += length
+        runs.append(Run(row, col, text, 0 if style == _NO_STYLE else ids[style]))
+    return Delta(seq, base, bool(flags & _FLAG_KEYFRAME), width, height, runs)
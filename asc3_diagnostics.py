@@ -0,0 +1,127 @@
+# asc3_diagnostics.py
+#
+# The diagnostics channel of the Asc3 cores. Drawing code never prints:
+# messages are kept in a bounded buffer and missing glyphs are only counted,
+# and everything is written out in one go when a core renders. The channel
+# is silent by default; raise its level to see messages, or turn on strict
+# mode to have problems raise DiagnosticError where they happen.
+
+import sys
+from collections import Counter
+from typing import Callable, List, Optional, Tuple
+
+# Message levels, matching the logging module
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: 'Debug', INFO: 'Info', WARNING: 'Warning', ERROR: 'Error'}
+
+
+class DiagnosticError(ValueError):
+    """Raised in strict mode for errors and missing glyphs."""
+
+
+def print_sink(level: int, message: str):
+    """The default sink: writes 'Level: message' lines to stderr."""
+    print(f"{LEVEL_NAMES.get(level, level)}: {message}", file=sys.stderr)
+
+
+class Diagnostics:
+    """
+    Collects messages from drawing code and reports them once per render.
+
+    Recording a message or a missing glyph does no I/O: messages at or above
+    the level are appended to a bounded buffer and missing glyphs are added
+    to per-(font, character) counters. report() then hands everything to the
+    sink, with one summary line per font for the missing glyphs.
+    """
+
+    # Most messages buffered between two reports; later ones are counted
+    MAX_PENDING = 1000
+
+    def __init__(self, level: int = OFF, strict: bool = False,
+                 sink: Callable[[int, str], None] = print_sink):
+        """
+        Args:
+            level (int): The lowest level kept (OFF keeps nothing).
+            strict (bool): Raise DiagnosticError for errors and missing
+                glyphs instead of recording them.
+            sink (callable): Receives (level, message) when reporting.
+        """
+        self.level = level
+        self.strict = strict
+        self.sink = sink
+        self.missing_glyphs: Counter = Counter()
+        self._pending: List[Tuple[int, str]] = []
+        self._dropped = 0
+
+    def configure(self, level: Optional[int] = None, strict: Optional[bool] = None,
+                  sink: Optional[Callable[[int, str], None]] = None):
+        """Changes the level, strict mode or sink; None leaves a setting alone."""
+        if level is not None:
+            self.level = level
+        if strict is not None:
+            self.strict = strict
+        if sink is not None:
+            self.sink = sink
+
+    def record(self, level: int, message: str):
+        """
+        Records a message.
+
+        Raises:
+            DiagnosticError: In strict mode, for errors.
+        """
+        if self.strict and level >= ERROR:
+            raise DiagnosticError(message)
+        if level >= self.level:
+            if len(self._pending) < self.MAX_PENDING:
+                self._pending.append((level, message))
+            else:
+                self._dropped += 1
+
+    def info(self, message: str):
+        self.record(INFO, message)
+
+    def warning(self, message: str):
+        self.record(WARNING, message)
+
+    def error(self, message: str):
+        self.record(ERROR, message)
+
+    def missing_glyph(self, font_name: str, char: str, count: int = 1):
+        """
+        Counts characters that were not in a font.
+
+        Raises:
+            DiagnosticError: In strict mode.
+        """
+        if self.strict:
+            raise DiagnosticError(f"Character '{char}' not in font '{font_name}'.")
+        self.missing_glyphs[(font_name, char)] += count
+
+    def report(self):
+        """Writes out everything recorded since the last report and resets."""
+        if self.missing_glyphs:
+            if WARNING >= self.level:
+                by_font = {}
+                for (font_name, char), count in sorted(self.missing_glyphs.items()):
+                    by_font.setdefault(font_name, []).append(f"'{char}' x{count}")
+                for font_name, chars in by_font.items():
+                    self.sink(WARNING, f"Characters not in font '{font_name}': {', '.join(chars)}.")
+            self.missing_glyphs.clear()
+
+        if self._pending:
+            pending, self._pending = self._pending, []
+            for level, message in pending:
+                self.sink(level, message)
+        if self._dropped:
+            self.sink(WARNING, f"{self._dropped} more messages were dropped.")
+            self._dropped = 0
+
+
+# The channel shared by every core
+DIAGNOSTICS = Diagnostics()
@@ -0,0 +1,180 @@
+# asc3_export.py
+#
+# HTML and SVG exporters for Asc3 canvases. A canvas is a sequence of rows
+# of cells with a matching sequence of style id rows (see asc3_styles).
+# Every horizontal run of one style becomes a single element, every interned
+# style becomes one CSS class, and output is written row by row to any
+# file-like object, so both the output size and the time spent follow the
+# number of style runs rather than the number of cells.
+
+from html import escape
+from typing import Iterable, List, Optional, Sequence, TextIO, Tuple, Union
+
+import numpy as np
+
+from asc3_styles import DEFAULT_PALETTE, StylePalette, color_rgb, style_runs
+from asc3_width import cell_offsets, strip_pad
+
+
+def _hex(color) -> str:
+    return '#%02x%02x%02x' % tuple(color_rgb(color))
+
+
+def _used_styles(style_rows: Sequence) -> List[int]:
+    """Returns the ids of every non-plain style used on a canvas."""
+    if not len(style_rows):
+        return []
+    used = np.unique(np.frombuffer(b''.join(row.tobytes() for row in style_rows), dtype=np.uint16))
+    return [int(style_id) for style_id in used if style_id]
+
+
+def style_css(palette: StylePalette, style_id: int, svg: bool = False) -> str:
+    """
+    Builds the CSS declarations of an interned style.
+
+    Args:
+        palette (StylePalette): The palette the id belongs to.
+        style_id (int): The style id.
+        svg (bool): Color text with fill instead of color, and leave the
+            background to the exporter's rectangles.
+
+    Returns:
+        str: The declarations, such as 'color:#ff00ff;font-weight:bold'.
+    """
+    style = palette.styles[style_id]
+    declarations = []
+    if style.fg is not None:
+        declarations.append(f"{'fill' if svg else 'color'}:{_hex(style.fg)}")
+    if style.bg is not None and not svg:
+        declarations.append(f"background-color:{_hex(style.bg)}")
+    if style.bold:
+        declarations.append("font-weight:bold")
+    if style.underline:
+        declarations.append("text-decoration:underline")
+    return ';'.join(declarations)
+
+
+def _row_runs(row: Union[str, Sequence[str]], ids) -> List[Tuple[int, int, int, str]]:
+    """Returns (start cell, end cell, style id, text) for every style run of a row."""
+    text, offsets = cell_offsets(row)
+    runs = []
+    for start, end, style_id in style_runs(ids):
+        first, last = (start, end) if offsets is None else (offsets[start], offsets[end])
+        runs.append((start, end, style_id, text[first:last]))
+    return runs
+
+
+def write_html(out: TextIO, rows: Iterable[Union[str, Sequence[str]]], style_rows: Sequence,
+               palette: StylePalette = DEFAULT_PALETTE, title: Optional[str] = 'Asc3',
+               standalone: bool = True):
+    """
+    Writes a canvas as HTML.
+
+    Plain runs are written as text; every other run is one <span> with the
+    class of its style, so a row costs one element per style change.
+
+    Args:
+        out (TextIO): Where to write the HTML.
+        rows (iterable): The rows of cells, or strings with one character
+            per cell; they may be produced lazily.
+        style_rows (sequence): The style id rows.
+        palette (StylePalette): The palette the style ids belong to.
+        title (str): The page title.
+        standalone (bool): Write a whole page rather than only the <pre>.
+    """
+    if standalone:
+        out.write(f'<!DOCTYPE html>\n<html lang="en">\n<head>\n<meta charset="UTF-8">\n'
+                  f'<title>{escape(title or "")}</title>\n')
+    out.write('<style>\n.asc3 { font-family: monospace; line-height: 1.1; }\n')
+    for style_id in _used_styles(style_rows):
+        out.write(f'.asc3 .s{style_id} {{ {style_css(palette, style_id)} }}\n')
+    out.write('</style>\n')
+    if standalone:
+        out.write('</head>\n<body>\n')
+
+    out.write('<pre class="asc3">')
+    for y, (row, ids) in enumerate(zip(rows, style_rows)):
+        if y:
+            out.write('\n')
+        parts = []
+        for _, _, style_id, text in _row_runs(row, ids):
+            run = escape(strip_pad(text), quote=False)
+            parts.append(f'<span class="s{style_id}">{run}</span>' if style_id else run)
+        out.write(''.join(parts))
+    out.write('</pre>\n')
+
+    if standalone:
+        out.write('</body>\n</html>\n')
+
+
+def write_svg(out: TextIO, rows: Iterable[Union[str, Sequence[str]]], style_rows: Sequence,
+              palette: StylePalette = DEFAULT_PALETTE, cell_width: float = 8.4,
+              cell_height: float = 16.0, font_size: float = 14.0,
+              foreground: str = '#e0e0e0', background: Optional[str] = '#000000'):
+    """
+    Writes a canvas as SVG.
+
+    Every run of one style becomes one <text> element stretched to exactly
+    its cells, preceded by a <rect> if the style has a background. Runs of
+    plain spaces are skipped.
+
+    Args:
+        out (TextIO): Where to write the SVG.
+        rows (iterable): The rows of cells, or strings with one character
+            per cell; they may be produced lazily.
+        style_rows (sequence): The style id rows.
+        palette (StylePalette): The palette the style ids belong to.
+        cell_width (float): The width of a cell in pixels.
+        cell_height (float): The height of a cell in pixels.
+        font_size (float): The font size in pixels.
+        foreground (str): The color of plain text.
+        background (str): The canvas background, or None for transparent.
+    """
+    height = len(style_rows)
+    width = len(style_rows[0]) if height else 0
+    out.write(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width * cell_width:g}" '
+              f'height="{height * cell_height:g}" font-family="monospace" font-size="{font_size:g}">\n')
+    out.write(f'<style>\ntext {{ white-space: pre; fill: {foreground}; }}\n')
+    for style_id in _used_styles(style_rows):
+        out.write(f'.s{style_id} {{ {style_css(palette, style_id, svg=True)} }}\n')
+    out.write('</style>\n')
+    if background:
+        out.write(f'<rect width="100%" height="100%" fill="{background}"/>\n')
+
+    baseline = cell_height * 0.8
+    for y, (row, ids) in enumerate(zip(rows, style_rows)):
+        top = y * cell_height
+        parts = []
+        for start, end, style_id, text in _row_runs(row, ids):
+            run = strip_pad(text)
+            style = palette.styles[style_id]
+            x = start * cell_width
+            length = (end - start) * cell_width
+            if style.bg is not None:
+                parts.append(f'<rect x="{x:g}" y="{top:g}" width="{length:g}" '
+                             f'height="{cell_height:g}" fill="{_hex(style.bg)}"/>')
+            if (not run or run.isspace()) and not style.underline:
+                continue
+            css = f' class="s{style_id}"' if style_id else ''
+            parts.append(f'<text x="{x:g}" y="{top + baseline:g}"{css} textLength="{length:g}" '
+                         f'lengthAdjust="spacingAndGlyphs">{escape(run, quote=False)}</text>')
+        if parts:
+            out.write('\n'.join(parts))
+            out.write('\n')
+    out.write('</svg>\n')
+
+
+def export_html(core, out: TextIO, **options):
+    """
+    Writes the canvas of a core (paper_py or ASC3-SymLangCore) as HTML.
+    Options are passed on to write_html.
+    """
+    write_html(out, core.canvas, core.style_rows, core.palette, **options)
+
+
+def export_svg(core, out: TextIO, **options):
+    """
+    Writes the canvas of a core (paper_py or ASC3-SymLangCore) as SVG.
+    Options are passed on to write_svg.
+    """
+    write_svg(out, core.canvas, core.style_rows, core.palette, **options)
@@ -0,0 +1,627 @@
+# asc3_fonts.py
+#
+# Compiled fonts for the Asc3 cores. A compiled font wraps a font map
+# (character -> list of art rows) together with a precomputed width table,
+# so that text can be measured, wrapped and aligned without rasterizing it.
+# Widths are display widths: art rows are split into canvas cells with the
+# shared width table in asc3_width, so wide characters take two cells.
+#
+# Scaled, mirrored, rotated and bold variants of a compiled font are derived
+# from its glyphs with NumPy and cached on the font (see CompiledFont.variant).
+#
+# Glyph rows are interned in a reference-counted pool shared by every
+# compiled font (see RowPool), so the blank rows, bars and underscores that
+# recur within and across fonts are stored once per process.
+
+import sys
+import weakref
+from array import array
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from asc3_width import WIDE_PAD, WIDTHS, split_cells, strip_pad
+
+ALIGNMENTS = ('left', 'center', 'right')
+
+# Characters that turn into each other when a glyph is mirrored or rotated
+# a quarter turn clockwise
+_MIRROR_H = dict(zip('/\\()<>[]{}', '\\/)(><][}{'))
+_MIRROR_V = dict(zip('/\\^v', '\\/v^'))
+_ROTATE = dict(zip('/\\-|_', '\\/|-|'))
+
+# WIDE_PAD as an object scalar: compared as a plain string, NumPy would
+# strip the trailing NUL and match nothing
+_PAD_CELL = np.empty((), dtype=object)
+_PAD_CELL[()] = WIDE_PAD
+
+
+class TextLine(NamedTuple):
+    """A single laid-out line: its x offset inside the box, text and width."""
+    x: int
+    text: str
+    width: int
+
+
+class TextLayout(NamedTuple):
+    """The result of laying out a string, with its overall size in cells."""
+    lines: Tuple[TextLine, ...]
+    width: int
+    height: int
+
+
+class GlyphCells(NamedTuple):
+    """
+    The drawn (non-space) pixels of every glyph as padded NumPy tables.
+
+    Row g of dy, dx and codes holds the pixels of glyph g, with valid marking
+    the entries that are real pixels. Glyphs are ordered by codepoint so
+    characters can be resolved with a binary search. extent_w and extent_h
+    give the size of the box covering each glyph's pixels.
+    """
+    codepoints: np.ndarray
+    advances: np.ndarray
+    dy: np.ndarray
+    dx: np.ndarray
+    codes: np.ndarray
+    valid: np.ndarray
+    extent_w: np.ndarray
+    extent_h: np.ndarray
+
+
+class VariantKey(NamedTuple):
+    """
+    A derived font variant. Glyphs are mirrored first, then rotated by
+    rotate quarter turns clockwise, then scaled up, then emboldened.
+    """
+    scale: int = 1
+    mirror_h: bool = False
+    mirror_v: bool = False
+    rotate: int = 0
+    bold: bool = False
+
+
+class GlyphPlacement(NamedTuple):
+    """
+    Canvas cells produced by placing a batch of strings with one font.
+
+    Row i of flat and codes holds the cells drawn by placed character i, as
+    flat canvas indices (row * canvas_width + column) and character codes.
+    Padding and cells outside the canvas point at the spare index
+    canvas_width * canvas_height, so rows can be scattered into a plane with
+    one extra slot without compacting them first. char gives the position of
+    each placed character in the batch; label and char_index map each batch
+    character to its string and to its index in that string.
+    """
+    flat: np.ndarray
+    codes: np.ndarray
+    char: np.ndarray
+    label: np.ndarray
+    char_index: np.ndarray
+    end_x: np.ndarray
+    missing: Dict[str, int]
+
+
+class PoolStats(NamedTuple):
+    """
+    The state of a row pool. bytes is the approximate memory of the pooled
+    rows and bytes_saved what separate copies for every reference would add.
+    """
+    rows: int
+    references: int
+    bytes: int
+    bytes_saved: int
+
+
+class RowPool:
+    """
+    A reference-counted pool of distinct glyph rows.
+
+    Every row is kept once, as its text and as a tuple of its canvas cells,
+    under a small integer id. Fonts acquire an id per glyph row and release
+    them when they are garbage collected; a row is dropped once nothing
+    refers to it and its id is reused.
+    """
+
+    def __init__(self):
+        self.texts: List[Optional[str]] = []
+        self.cells: List[Optional[Tuple[str, ...]]] = []
+        self._refs: List[int] = []
+        self._sizes: List[int] = []
+        self._ids: Dict[str, int] = {}
+        self._free: List[int] = []
+        self.references = 0
+        self.bytes = 0
+        self.referenced_bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def acquire(self, text: str) -> int:
+        """Returns the id of a row, adding it to the pool on first use."""
+        row_id = self._ids.get(text)
+        if row_id is None:
+            cells = tuple(split_cells(text))
+            # Single Latin-1 characters are shared by the interpreter anyway
+            size = sys.getsizeof(text) + sys.getsizeof(cells) + sum(
+                sys.getsizeof(cell) for cell in cells if len(cell) > 1 or ord(cell) > 0xFF)
+            if self._free:
+                row_id = self._free.pop()
+                self.texts[row_id], self.cells[row_id] = text, cells
+                self._refs[row_id], self._sizes[row_id] = 0, size
+            else:
+                row_id = len(self.texts)
+                self.texts.append(text)
+                self.cells.append(cells)
+                self._refs.append(0)
+                self._sizes.append(size)
+            self._ids[text] = row_id
+            self.bytes += size
+        self._refs[row_id] += 1
+        self.references += 1
+        self.referenced_bytes += self._sizes[row_id]
+        return row_id
+
+    def release(self, row_ids: Iterable[int]):
+        """Drops one reference to each row, removing rows nothing refers to."""
+        for row_id in row_ids:
+            size = self._sizes[row_id]
+            self._refs[row_id] -= 1
+            self.references -= 1
+            self.referenced_bytes -= size
+            if not self._refs[row_id]:
+                del self._ids[self.texts[row_id]]
+                self.texts[row_id] = self.cells[row_id] = None
+                self.bytes -= size
+                self._free.append(row_id)
+
+    def stats(self) -> PoolStats:
+        """Returns the number of rows and references and the memory saved."""
+        return PoolStats(len(self._ids), self.references, self.bytes, self.referenced_bytes - self.bytes)
+
+
+# The pool shared by every compiled font
+ROW_POOL = RowPool()
+
+
+class CompiledFont(Mapping):
+    """
+    A font map compiled for fast measuring and layout.
+
+    The compiled font behaves like the original font map (it can be indexed
+    by character to get the glyph rows) and additionally keeps a width table,
+    the line height and the letter spacing used between glyphs. glyph_rows
+    holds every glyph row split into canvas cells; has_clusters tells whether
+    any cell holds more than one codepoint (a character with combining marks)
+    and has_wide whether any glyph holds a double-width character.
+
+    Glyph rows are interned in a RowPool; glyph_rows holds the pool's shared
+    cell tuples rather than copies, and the font's references are released
+    when it is garbage collected.
+    """
+
+    # Maximum number of (text, width) layouts kept per font.
+    LAYOUT_CACHE_SIZE = 512
+    # Glyph cells kept across the cached variants of a font; the least
+    # recently used variants are dropped beyond it.
+    VARIANT_CACHE_CELLS = 1 << 20
+
+    def __init__(self, font_map: Dict[str, List[str]], letter_spacing: int = 1,
+                 pool: Optional[RowPool] = None):
+        """
+        Compiles a font map.
+
+        Args:
+            font_map (dict): A dictionary mapping characters to their ASCII art.
+            letter_spacing (int): Blank columns inserted between glyphs.
+            pool (RowPool): The pool glyph rows are interned in; ROW_POOL by default.
+        """
+        self.pool = pool = ROW_POOL if pool is None else pool
+        self.letter_spacing = letter_spacing
+        # The ids of every glyph row, in glyph order, only kept to release
+        # them; glyphs refer to the pooled cell tuples directly
+        glyph_ids = {char: [pool.acquire(line) for line in art] for char, art in font_map.items()}
+        self._row_ids = array('I', [row_id for ids in glyph_ids.values() for row_id in ids])
+        weakref.finalize(self, pool.release, self._row_ids)
+        cells = pool.cells
+        self.glyph_rows = {char: tuple([cells[row_id] for row_id in ids]) for char, ids in glyph_ids.items()}
+        self.has_clusters = any(len(cell) > 1 for rows in self.glyph_rows.values()
+                                for row in rows for cell in row)
+        self.has_wide = any(WIDE_PAD in row for rows in self.glyph_rows.values() for row in rows)
+        self.widths = {char: len(rows[0]) if rows else 0 for char, rows in self.glyph_rows.items()}
+        # Widest row of each glyph, which bounds the cells it can draw
+        self.extents = {char: max(map(len, rows), default=0) for char, rows in self.glyph_rows.items()}
+        self.advances = {char: width + letter_spacing for char, width in self.widths.items()}
+        self.height = max(map(len, self.glyph_rows.values()), default=0)
+        self._layouts: 'OrderedDict[Tuple[str, Optional[int]], Tuple[Tuple[str, int], ...]]' = OrderedDict()
+        self._cells: Optional[GlyphCells] = None
+        self._variants: 'OrderedDict[VariantKey, CompiledFont]' = OrderedDict()
+        self._variant_cells = 0
+
+    def __getitem__(self, char: str) -> List[str]:
+        # Cells only add pads to the text, so the text is their join without them
+        return [strip_pad(''.join(row)) for row in self.glyph_rows[char]]
+
+    def __contains__(self, char) -> bool:
+        # Mapping would build the glyph's text just to test for it
+        return char in self.glyph_rows
+
+    def __iter__(self):
+        return iter(self.glyph_rows)
+
+    def __len__(self) -> int:
+        return len(self.glyph_rows)
+
+    def measure(self, text: str) -> int:
+        """
+        Measures the width of a string in canvas columns.
+
+        Characters missing from the font take no space, matching how
+        write_text skips them.
+        """
+        advances = self.advances
+        span, found = 0, False
+        for char in text:
+            if char in advances:
+                span += advances[char]
+                found = True
+        return span - self.letter_spacing if found else 0
+
+    @property
+    def cells(self) -> GlyphCells:
+        """The glyph cell table, built on first use."""
+        if self._cells is None:
+            self._cells = self._build_cells()
+        return self._cells
+
+    def _build_cells(self) -> GlyphCells:
+        chars = sorted((char for char in self.glyph_rows if len(char) == 1), key=ord)
+        # A cell with combining marks is stored by its base character;
+        # callers check has_clusters before relying on the codes
+        pixels = [
+            [(y_offset, x_offset, ord(pixel[0]))
+             for y_offset, line in enumerate(self.glyph_rows[char])
+             for x_offset, pixel in enumerate(line) if pixel != ' ']
+            for char in chars
+        ]
+        size = max((len(glyph) for glyph in pixels), default=0)
+        table = np.zeros((len(chars), size, 3), dtype=np.int64)
+        valid = np.zeros((len(chars), size), dtype=bool)
+        for index, glyph in enumerate(pixels):
+            if glyph:
+                table[index, :len(glyph)] = glyph
+                valid[index, :len(glyph)] = True
+        return GlyphCells(
+            codepoints=np.array([ord(char) for char in chars], dtype=np.uint32),
+            advances=np.array([self.advances[char] for char in chars], dtype=np.int64),
+            dy=table[:, :, 0],
+            dx=table[:, :, 1],
+            codes=table[:, :, 2],
+            valid=valid,
+            extent_w=np.where(valid, table[:, :, 1] + 1, 0).max(axis=1, initial=0),
+            extent_h=np.where(valid, table[:, :, 0] + 1, 0).max(axis=1, initial=0),
+        )
+
+    def place(self, texts: Sequence[str], xs: Sequence[int], ys: Sequence[int],
+              canvas_width: int, canvas_height: int,
+              clip: Optional[Tuple[int, int, int, int]] = None) -> GlyphPlacement:
+        """
+        Resolves every glyph cell of a batch of strings at once.
+
+        Each string is placed the way write_text places it: glyphs advance by
+        their width plus the letter spacing, missing characters are skipped
+        without advancing and cells outside the canvas or the clip rectangle
+        are dropped. Glyphs entirely outside are rejected before their cells
+        are expanded.
+
+        Args:
+            texts (list): The strings to place.
+            xs (list): The x position of each string.
+            ys (list): The y position of each string.
+            canvas_width (int): The width of the target canvas.
+            canvas_height (int): The height of the target canvas.
+            clip (tuple): (left, top, right, bottom) bounds within the canvas,
+                right and bottom exclusive, or None for the whole canvas.
+
+        Returns:
+            GlyphPlacement: The drawn cells, the cursor x after each string
+            and how often each character missing from the font occurred.
+        """
+        cells = self.cells
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        chars = np.frombuffer(''.join(texts).encode('utf-32-le'), dtype=np.uint32)
+        label = np.repeat(np.arange(len(texts)), lengths)
+        label_start = np.cumsum(lengths) - lengths
+        char_index = np.arange(chars.size) - label_start[label]
+
+        if cells.codepoints.size:
+            glyph = np.minimum(np.searchsorted(cells.codepoints, chars), cells.codepoints.size - 1)
+            found = cells.codepoints[glyph] == chars
+            advance = np.where(found, cells.advances[glyph], 0)
+        else:
+            glyph = np.zeros(chars.size, dtype=np.int64)
+            found = np.zeros(chars.size, dtype=bool)
+            advance = np.zeros(chars.size, dtype=np.int64)
+        missing_codes, missing_counts = np.unique(chars[~found], return_counts=True)
+        missing = dict(zip(map(chr, missing_codes.tolist()), missing_counts.tolist()))
+
+        # The x of each character is the label x plus the advances before it
+        xs = np.asarray(xs, dtype=np.int64)
+        total = np.concatenate(([0], np.cumsum(advance)))
+        char_x = xs[label] + total[:-1] - total[label_start][label]
+        char_y = np.asarray(ys, dtype=np.int64)[label]
+        end_x = xs + total[label_start + lengths] - total[label_start]
+
+        # Drop glyphs that miss the clip entirely, then expand the rest
+        left, top, right, bottom = clip if clip is not None else (0, 0, canvas_width, canvas_height)
+        glyph_w, glyph_h = cells.extent_w[glyph], cells.extent_h[glyph]
+        placed = np.nonzero(found & (char_x + glyph_w > left) & (char_x < right)
+                            & (char_y + glyph_h > top) & (char_y < bottom))[0]
+        g, x, y = glyph[placed], char_x[placed], char_y[placed]
+
+        # Padding offsets point past the canvas, so clamping sends them to
+        # the spare index without touching any real cell of a whole glyph
+        spare = canvas_width * canvas_height
+        offsets = np.where(cells.valid, cells.dy * canvas_width + cells.dx, 2 * spare)
+        flat = (y * canvas_width + x)[:, None] + offsets[g]
+        np.minimum(flat, spare, out=flat)
+
+        # Only glyphs straddling the clip edge need per-cell clipping
+        partial = np.nonzero((x < left) | (y < top) | (x + glyph_w[placed] > right)
+                             | (y + glyph_h[placed] > bottom))[0]
+        if partial.size:
+            cols = x[partial, None] + cells.dx[g[partial]]
+            rows = y[partial, None] + cells.dy[g[partial]]
+            inside = (cells.valid[g[partial]] & (cols >= left) & (cols < right)
+                      & (rows >= top) & (rows < bottom))
+            flat[partial] = np.where(inside, flat[partial], spare)
+
+        return GlyphPlacement(
+            flat=flat,
+            codes=cells.codes[g],
+            char=placed,
+            label=label,
+            char_index=char_index,
+            end_x=end_x,
+            missing=missing,
+        )
+
+    def variant(self, scale: int = 1, mirror_h: bool = False, mirror_v: bool = False,
+                rotate: int = 0, bold: bool = False) -> 'CompiledFont':
+        """
+        Returns a variant of the font derived from its glyphs.
+
+        Variants are computed once and cached on the font under their
+        VariantKey, so asking for the same variant again is a dictionary
+        lookup. The cache holds at most VARIANT_CACHE_CELLS glyph cells and
+        drops the least recently used variants beyond that.
+
+        Args:
+            scale (int): Repeat every cell this many times across and down.
+            mirror_h (bool): Mirror glyphs left to right.
+            mirror_v (bool): Mirror glyphs top to bottom.
+            rotate (int): Rotate glyphs by this many quarter turns clockwise.
+            bold (bool): Thicken glyphs by overstriking them one cell to the
+                right, which makes them one cell wider.
+
+        Returns:
+            CompiledFont: The variant, with letter spacing scaled too.
+
+        Raises:
+            ValueError: If scale is less than 1.
+        """
+        if scale < 1:
+            raise ValueError("The scale of a font variant must be at least 1.")
+        key = VariantKey(int(scale), bool(mirror_h), bool(mirror_v), int(rotate) % 4, bool(bold))
+        if key == VariantKey():
+            return self
+        cached = self._variants.get(key)
+        if cached is not None:
+            self._variants.move_to_end(key)
+            return cached
+
+        font_map = {char: _transform_glyph(rows, key) for char, rows in self.glyph_rows.items()}
+        font = CompiledFont(font_map, self.letter_spacing * key.scale, self.pool)
+        self._variants[key] = font
+        self._variant_cells += font.cell_count
+        while self._variant_cells > self.VARIANT_CACHE_CELLS and len(self._variants) > 1:
+            _, dropped = self._variants.popitem(last=False)
+            self._variant_cells -= dropped.cell_count
+        return font
+
+    @property
+    def cell_count(self) -> int:
+        """The number of cells in all glyphs, a measure of the font's size."""
+        return sum(len(row) for rows in self.glyph_rows.values() for row in rows)
+
+    def layout(self, text: str, box_width: Optional[int] = None, align: str = 'left') -> TextLayout:
+        """
+        Lays out a string, wrapping it to a box width and aligning each line.
+
+        Newlines always start a new line. When a box width is given, lines are
+        wrapped at spaces (runs of whitespace collapse) and words wider than
+        the box are broken between characters.
+
+        Args:
+            text (str): The text to lay out.
+            box_width (int): The width to wrap to, or None to only split on newlines.
+            align (str): One of 'left', 'center' or 'right'.
+
+        Returns:
+            TextLayout: The positioned lines and the overall size.
+        """
+        if align not in ALIGNMENTS:
+            raise ValueError(f"Unsupported alignment '{align}'. Expected one of {ALIGNMENTS}.")
+
+        wrapped = self._wrap(text, box_width)
+        width = max((line_width for _, line_width in wrapped), default=0)
+        box = width if box_width is None else box_width
+        lines = []
+        for line_text, line_width in wrapped:
+            if align == 'center':
+                x = (box - line_width) // 2
+            elif align == 'right':
+                x = box - line_width
+            else:
+                x = 0
+            lines.append(TextLine(x, line_text, line_width))
+        return TextLayout(tuple(lines), width, len(lines) * self.height)
+
+    def _wrap(self, text: str, box_width: Optional[int]) -> Tuple[Tuple[str, int], ...]:
+        """Wraps text into (line, width) pairs, memoized per (text, width)."""
+        key = (text, box_width)
+        cached = self._layouts.get(key)
+        if cached is not None:
+            self._layouts.move_to_end(key)
+            return cached
+
+        if box_width is None:
+            result = tuple((line, self.measure(line)) for line in text.split('\n'))
+        else:
+            result = tuple(self._wrap_to_width(text, box_width))
+
+        self._layouts[key] = result
+        if len(self._layouts) > self.LAYOUT_CACHE_SIZE:
+            self._layouts.popitem(last=False)
+        return result
+
+    def _wrap_to_width(self, text: str, box_width: int) -> List[Tuple[str, int]]:
+        """Greedy word wrap in a single pass over the text."""
+        advances = self.advances
+        spacing = self.letter_spacing
+        space = advances.get(' ', 0)
+        lines = []
+
+        for paragraph in text.split('\n'):
+            # Spans include the trailing letter spacing of the last glyph, so
+            # the visible width of a span is span - spacing.
+            line_words: List[str] = []
+            line_span = 0
+            for word in paragraph.split():
+                word_span = 0
+                for char in word:
+                    word_span += advances.get(char, 0)
+
+                gap = space if line_words else 0
+                if line_span + gap + word_span - spacing <= box_width:
+                    line_words.append(word)
+                    line_span += gap + word_span
+                    continue
+
+                if line_words:
+                    lines.append((' '.join(line_words), max(line_span - spacing, 0)))
+                    line_words, line_span = [], 0
+
+                if word_span - spacing <= box_width:
+                    line_words.append(word)
+                    line_span = word_span
+                    continue
+
+                # The word is wider than the box on its own: break it up
+                piece_start, piece_span = 0, 0
+                for index, char in enumerate(word):
+                    advance = advances.get(char, 0)
+                    if piece_span and piece_span + advance - spacing > box_width:
+                        lines.append((word[piece_start:index], piece_span - spacing))
+                        piece_start, piece_span = index, 0
+                    piece_span += advance
+                line_words.append(word[piece_start:])
+                line_span = piece_span
+
+            lines.append((' '.join(line_words), max(line_span - spacing, 0)))
+        return lines
+
+
+def _transform_glyph(rows: List[List[str]], key: VariantKey) -> List[str]:
+    """
+    Applies a variant to the cells of one glyph and returns its art rows.
+
+    The cells are laid out as a padded NumPy array of strings. Transforms
+    move whole cells, so the pad cells of wide characters end up in the
+    wrong place; they are dropped afterwards and the rows split into cells
+    again, which puts them back after their characters.
+    """
+    width = max(map(len, rows), default=0)
+    if not rows or not width:
+        return [''] * len(rows) * key.scale
+    cells = np.full((len(rows), width), ' ', dtype=object)
+    for y, row in enumerate(rows):
+        cells[y, :len(row)] = row
+
+    if key.mirror_h:
+        cells = _swap(cells[:, ::-1], _MIRROR_H)
+    if key.mirror_v:
+        cells = _swap(cells[::-1], _MIRROR_V)
+    for _ in range(key.rotate):
+        # A pad cell rotated into a column of its own would be meaningless
+        cells = _swap(np.rot90(np.where(cells == _PAD_CELL, ' ', cells), -1), _ROTATE)
+    if key.scale > 1:
+        cells = cells.repeat(key.scale, axis=0).repeat(key.scale, axis=1)
+    if key.bold:
+        # Every single-width ink cell is struck again one cell to its right,
+        # where that cell is blank
+        narrow = np.vectorize(lambda cell: cell != ' ' and cell != WIDE_PAD
+                              and WIDTHS.width(cell[0]) == 1, otypes=[bool])(cells)
+        bold = np.full((cells.shape[0], cells.shape[1] + 1), ' ', dtype=object)
+        bold[:, :-1] = cells
+        smear = narrow & (bold[:, 1:] == ' ')
+        bold[:, 1:][smear] = cells[smear]
+        cells = bold
+    return [strip_pad(''.join(row)) for row in cells.tolist()]
+
+
+def _swap(cells: np.ndarray, pairs: Dict[str, str]) -> np.ndarray:
+    """Replaces characters that change shape under a transform."""
+    swapped = cells.copy()
+    for char, replacement in pairs.items():
+        swapped[cells == char] = replacement
+    return swapped
+
+
+def compile_font(font_map: Dict[str, List[str]], letter_spacing: int = 1) -> CompiledFont:
+    """
+    Compiles a font map, returning compiled fonts unchanged.
+
+    Args:
+        font_map (dict): A font map or an already compiled font.
+        letter_spacing (int): Blank columns inserted between glyphs.
+
+    Returns:
+        CompiledFont: The compiled font.
+    """
+    if isinstance(font_map, CompiledFont):
+        return font_map
+    return CompiledFont(font_map, letter_spacing)
+
+
+def measure_text(font: Dict[str, List[str]], text: str) -> int:
+    """
+    Measures the width of a string in canvas columns.
+
+    Args:
+        font (dict): A compiled font or a plain font map.
+        text (str): The text to measure.
+
+    Returns:
+        int: The width the text occupies when written.
+    """
+    return compile_font(font).measure(text)
+
+
+def layout_text(font: Dict[str, List[str]], text: str, box_width: Optional[int] = None,
+                align: str = 'left') -> TextLayout:
+    """
+    Lays out a string with a font; see CompiledFont.layout.
+
+    Args:
+        font (dict): A compiled font or a plain font map.
+        text (str): The text to lay out.
+        box_width (int): The width to wrap to, or None to only split on newlines.
+        align (str): One of 'left', 'center' or 'right'.
+
+    Returns:
+        TextLayout: The positioned lines and the overall size.
+    """
+    return compile_font(font).layout(text, box_width, align)
@@ -0,0 +1,381 @@
+# asc3_gallery.py
+#
+# The read side of the asc3_designs gallery. Pages are listed newest first
+# with a cursor on createdAt, so a page is one indexed query however large
+# the collection grows, and the art of recently seen designs is kept in an
+# in-process LRU cache whose entries expire after a time to live.
+#
+# Designs store their canvas packed (see asc3_pack) in the canvas field;
+# older designs hold the rendered text in the art field instead. Either way
+# the reader returns text.
+#
+# GalleryReader works with a Firestore client (firebase_admin.firestore
+# .client()) or with LocalStore, an in-memory stand-in with the same query
+# interface for running without Firebase.
+
+import base64
+import bisect
+import json
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from asc3_pack import unpack_text
+
+COLLECTION = 'asc3_designs'
+
+# Fields returned when only metadata is asked for
+METADATA_FIELDS = ['title', 'createdAt', 'keywords']
+# Fields that hold the art
+ART_FIELDS = ['canvas', 'art']
+
+ASCENDING = 'ASCENDING'
+DESCENDING = 'DESCENDING'
+
+
+class GalleryItem(NamedTuple):
+    """A design in a gallery page; art is None for metadata-only pages."""
+    id: str
+    title: Optional[str]
+    created_at: datetime
+    keywords: List[str]
+    art: Optional[str]
+
+
+class GalleryPage(NamedTuple):
+    """A page of designs and the cursor of the next page, or None at the end."""
+    items: List[GalleryItem]
+    next_cursor: Optional[str]
+
+
+def encode_cursor(created_at: datetime, skip: int) -> str:
+    """
+    Encodes a page cursor: the createdAt of the last design on the page and
+    how many designs with that createdAt have been listed so far.
+    """
+    payload = json.dumps({'t': created_at.isoformat(), 'n': skip}).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """
+    Decodes a cursor made by encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(payload['t']), int(payload['n'])
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+class ArtCache:
+    """
+    An LRU cache of design art with a time to live.
+
+    Entries past their time to live count as misses and are dropped when
+    next looked up; the least recently used entry is dropped when full.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl: float = 300.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_size (int): The most designs kept.
+            ttl (float): Seconds an entry stays valid.
+            clock (callable): Returns the current time in seconds.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[str, Tuple[float, str]]' = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, doc_id: str) -> Optional[str]:
+        """Returns the cached art of a design, or None."""
+        entry = self._entries.get(doc_id)
+        if entry is None or entry[0] <= self.clock():
+            if entry is not None:
+                del self._entries[doc_id]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(doc_id)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, doc_id: str, art: str):
+        """Caches the art of a design."""
+        self._entries[doc_id] = (self.clock() + self.ttl, art)
+        self._entries.move_to_end(doc_id)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, doc_id: Optional[str] = None):
+        """Drops one design, or everything if doc_id is None."""
+        if doc_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(doc_id, None)
+
+
+class GalleryReader:
+    """
+    Lists and fetches designs from the asc3_designs collection.
+    """
+
+    # Largest page size accepted
+    MAX_PAGE_SIZE = 100
+
+    def __init__(self, db, collection: str = COLLECTION, cache: Optional[ArtCache] = None,
+                 ansi: bool = False):
+        """
+        Args:
+            db: A Firestore client or a LocalStore.
+            collection (str): The collection of designs.
+            cache (ArtCache): The art cache; a new one by default.
+            ansi (bool): Render packed canvases with ANSI escape sequences.
+        """
+        self.db = db
+        self.collection = collection
+        self.cache = cache if cache is not None else ArtCache()
+        self.ansi = ansi
+
+    def _art(self, data: Dict[str, Any]) -> Optional[str]:
+        """Returns the art of a design as text, unpacking it if needed."""
+        canvas = data.get('canvas')
+        if canvas is not None:
+            return unpack_text(bytes(canvas), self.ansi)
+        return data.get('art')
+
+    def list_page(self, page_size: int = 20, cursor: Optional[str] = None,
+                  metadata_only: bool = False) -> GalleryPage:
+        """
+        Lists one page of designs, newest first, with a single query.
+
+        Args:
+            page_size (int): The number of designs per page.
+            cursor (str): The next_cursor of the previous page, or None for
+                the first page.
+            metadata_only (bool): Leave out the art.
+
+        Returns:
+            GalleryPage: The designs and the cursor of the next page.
+
+        Raises:
+            ValueError: If the page size or the cursor is invalid.
+        """
+        if not 0 < page_size <= self.MAX_PAGE_SIZE:
+            raise ValueError(f"The page size must be between 1 and {self.MAX_PAGE_SIZE}.")
+
+        query = self.db.collection(self.collection).order_by('createdAt', direction=DESCENDING)
+        skip = 0
+        if cursor is not None:
+            # Designs created at the same instant are ordered by id, so the
+            # page restarts at the cursor's instant and skips those listed
+            created_at, skip = decode_cursor(cursor)
+            query = query.start_at({'createdAt': created_at})
+        if metadata_only:
+            query = query.select(METADATA_FIELDS)
+        snapshots = list(query.limit(skip + page_size + 1).stream())[skip:]
+
+        items = []
+        for snapshot in snapshots[:page_size]:
+            data = snapshot.to_dict()
+            art = None if metadata_only else self._art(data)
+            if art is not None:
+                self.cache.put(snapshot.id, art)
+            items.append(GalleryItem(snapshot.id, data.get('title'), data['createdAt'],
+                                     list(data.get('keywords', [])), art))
+
+        next_cursor = None
+        if len(snapshots) > page_size and items:
+            last = items[-1].created_at
+            ties = sum(1 for item in items if item.created_at == last)
+            if cursor is not None and decode_cursor(cursor)[0] == last:
+                ties += skip
+            next_cursor = encode_cursor(last, ties)
+        return GalleryPage(items, next_cursor)
+
+    def get_art(self, doc_ids: Iterable[str]) -> Dict[str, Optional[str]]:
+        """
+        Returns the art of designs, from the cache where possible. Misses
+        are fetched together in one batch read.
+
+        Args:
+            doc_ids (iterable): The ids of the designs.
+
+        Returns:
+            dict: The art of each design, or None if it does not exist.
+        """
+        art: Dict[str, Optional[str]] = {}
+        missing = []
+        for doc_id in doc_ids:
+            cached = self.cache.get(doc_id)
+            if cached is None:
+                missing.append(doc_id)
+            art[doc_id] = cached
+        if missing:
+            collection = self.db.collection(self.collection)
+            refs = [collection.document(doc_id) for doc_id in missing]
+            for snapshot in self.db.get_all(refs, field_paths=ART_FIELDS):
+                if snapshot.exists:
+                    value = self._art(snapshot.to_dict())
+                    if value is not None:
+                        self.cache.put(snapshot.id, value)
+                    art[snapshot.id] = value
+        return art
+
+    def gallery_page(self, page_size: int = 20, cursor: Optional[str] = None) -> GalleryPage:
+        """
+        Lists a page of designs with their art: one metadata query, then the
+        art from the cache, with any misses fetched in one batch.
+        """
+        page = self.list_page(page_size, cursor, metadata_only=True)
+        art = self.get_art(item.id for item in page.items)
+        return page._replace(items=[item._replace(art=art.get(item.id)) for item in page.items])
+
+
+class _LocalSnapshot:
+    """A document snapshot of LocalStore."""
+
+    def __init__(self, doc_id: str, data: Optional[Dict[str, Any]]):
+        self.id = doc_id
+        self.exists = data is not None
+        self._data = data
+
+    def to_dict(self) -> Optional[Dict[str, Any]]:
+        return dict(self._data) if self._data is not None else None
+
+
+class _LocalDocument:
+    """A document reference of LocalStore."""
+
+    def __init__(self, collection: '_LocalCollection', doc_id: str):
+        self._collection = collection
+        self.id = doc_id
+
+    def set(self, data: Dict[str, Any]):
+        self._collection._write(self.id, dict(data))
+
+    def get(self, field_paths: Optional[List[str]] = None) -> _LocalSnapshot:
+        self._collection.store.reads += 1
+        return _LocalSnapshot(self.id, self._collection._read(self.id, field_paths))
+
+
+class _LocalQuery:
+    """An ordered query of LocalStore, run against its sorted index."""
+
+    def __init__(self, collection: '_LocalCollection', field: str, direction: str,
+                 start: Any = None, count: Optional[int] = None, fields: Optional[List[str]] = None):
+        self._collection = collection
+        self._field = field
+        self._direction = direction
+        self._start = start
+        self._count = count
+        self._fields = fields
+
+    def _with(self, **changes) -> '_LocalQuery':
+        options = dict(start=self._start, count=self._count, fields=self._fields)
+        options.update(changes)
+        return _LocalQuery(self._collection, self._field, self._direction, **options)
+
+    def start_at(self, values: Dict[str, Any]) -> '_LocalQuery':
+        return self._with(start=values[self._field])
+
+    def limit(self, count: int) -> '_LocalQuery':
+        return self._with(count=count)
+
+    def select(self, fields: List[str]) -> '_LocalQuery':
+        return self._with(fields=list(fields))
+
+    def stream(self):
+        store = self._collection.store
+        store.queries += 1
+        index = self._collection._index(self._field)
+        descending = self._direction == DESCENDING
+        if descending:
+            # Walk the ascending index backwards, ties by descending id
+            stop = len(index) if self._start is None else bisect.bisect_right(index, (self._start, '￿'))
+            positions = range(stop - 1, -1, -1)
+        else:
+            first = 0 if self._start is None else bisect.bisect_left(index, (self._start, ''))
+            positions = range(first, len(index))
+        for count, position in enumerate(positions):
+            if self._count is not None and count >= self._count:
+                break
+            doc_id = index[position][1]
+            store.reads += 1
+            yield _LocalSnapshot(doc_id, self._collection._read(doc_id, self._fields))
+
+
+class _LocalCollection:
+    """A collection of LocalStore."""
+
+    def __init__(self, store: 'LocalStore', name: str):
+        self.store = store
+        self.name = name
+        self._documents: Dict[str, Dict[str, Any]] = {}
+        self._indexes: Dict[str, List[Tuple[Any, str]]] = {}
+
+    def document(self, doc_id: Optional[str] = None) -> _LocalDocument:
+        return _LocalDocument(self, doc_id or uuid.uuid4().hex[:20])
+
+    def order_by(self, field: str, direction: str = ASCENDING) -> _LocalQuery:
+        return _LocalQuery(self, field, direction)
+
+    def _index(self, field: str) -> List[Tuple[Any, str]]:
+        """Returns the sorted (value, id) index of a field, building it once."""
+        index = self._indexes.get(field)
+        if index is None:
+            index = self._indexes[field] = sorted((data[field], doc_id)
+                                                  for doc_id, data in self._documents.items()
+                                                  if field in data)
+        return index
+
+    def _write(self, doc_id: str, data: Dict[str, Any]):
+        old = self._documents.get(doc_id)
+        for field, index in self._indexes.items():
+            if old is not None and field in old:
+                index.pop(bisect.bisect_left(index, (old[field], doc_id)))
+            if field in data:
+                bisect.insort(index, (data[field], doc_id))
+        self._documents[doc_id] = data
+
+    def _read(self, doc_id: str, fields: Optional[List[str]]) -> Optional[Dict[str, Any]]:
+        data = self._documents.get(doc_id)
+        if data is None or fields is None:
+            return data
+        return {field: data[field] for field in fields if field in data}
+
+
+class LocalStore:
+    """
+    An in-memory stand-in for the Firestore client, covering what the
+    gallery uses: documents, ordered queries with start_at, limit and
+    select, and batch reads. Ordered fields are kept in sorted indexes, and
+    queries and document reads are counted.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.reads = 0
+        self._collections: Dict[str, _LocalCollection] = {}
+
+    def collection(self, name: str) -> _LocalCollection:
+        if name not in self._collections:
+            self._collections[name] = _LocalCollection(self, name)
+        return self._collections[name]
+
+    def get_all(self, refs: Iterable[_LocalDocument], field_paths: Optional[List[str]] = None):
+        self.queries += 1
+        for ref in refs:
+            self.reads += 1
+            yield _LocalSnapshot(ref.id, ref._collection._read(ref.id, field_paths))
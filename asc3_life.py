@@ -0,0 +1,261 @@
+# asc3_life.py
+#
+# Life-like cellular automata on a region of an Asc3Core canvas, the engine
+# behind the alive/dead cells of the Cyberweave pane grid. The board is a
+# uint8 NumPy grid kept inside a one-cell border, so the border can hold
+# either the opposite edge (wrapping) or dead cells. Neighbors are counted
+# with a separable 3x3 box sum and the rule is a lookup table indexed by
+# neighbor count and state, so a generation is a handful of whole-array
+# operations. In sparse mode the board is split into tiles and only tiles
+# near the last changes are stepped. Only cells whose state differs from
+# what the canvas shows are written back.
+
+import re
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from asc3_width import WIDE_PAD, WIDTHS
+
+
+class Rule(NamedTuple):
+    """The neighbor counts that give birth to dead cells and keep live cells."""
+    birth: frozenset
+    survive: frozenset
+
+    @classmethod
+    def parse(cls, rule: str) -> 'Rule':
+        """
+        Parses a rule in B/S notation, such as 'B3/S23' (Conway's Life) or
+        'B36/S23' (HighLife). The survival/birth form '23/3' is accepted too.
+
+        Raises:
+            ValueError: If the rule is not understood.
+        """
+        text = rule.strip().upper()
+        match = re.fullmatch(r'B([0-8]*)/S([0-8]*)', text) or re.fullmatch(r'S([0-8]*)/B([0-8]*)', text)
+        if match:
+            birth, survive = match.groups() if text.startswith('B') else match.groups()[::-1]
+        else:
+            match = re.fullmatch(r'([0-8]*)/([0-8]*)', text)
+            if not match:
+                raise ValueError(f"Unsupported rule {rule!r}. Expected B/S notation such as 'B3/S23'.")
+            survive, birth = match.groups()
+        return cls(frozenset(map(int, birth)), frozenset(map(int, survive)))
+
+    def table(self) -> np.ndarray:
+        """
+        Returns the next state indexed by neighbors + 10 * state, as a
+        uint8 array of 20 entries.
+        """
+        table = np.zeros(20, dtype=np.uint8)
+        table[list(self.birth)] = 1
+        table[[10 + count for count in self.survive]] = 1
+        return table
+
+
+CONWAY = Rule.parse('B3/S23')
+
+
+class Automaton:
+    """
+    A cellular automaton running on a rectangle of a paper_py Asc3Core
+    canvas. The starting board is read from the canvas: every cell that is
+    not dead_char is alive.
+    """
+
+    # Side of the square tiles sparse mode steps independently
+    TILE = 64
+
+    def __init__(self, core, x: int = 0, y: int = 0, width: Optional[int] = None,
+                 height: Optional[int] = None, rule='B3/S23', wrap: bool = True,
+                 alive_char: str = '#', dead_char: Optional[str] = None,
+                 style: str = 'default', sparse: bool = False):
+        """
+        Args:
+            core (Asc3Core): The core whose canvas holds the board.
+            x (int): The left column of the board.
+            y (int): The top row of the board.
+            width (int): The width of the board; to the canvas edge by default.
+            height (int): The height of the board; to the canvas edge by default.
+            rule: A Rule or a rule string such as 'B3/S23'.
+            wrap (bool): Join opposite edges; otherwise cells beyond the
+                edges are dead.
+            alive_char (str): The character of live cells.
+            dead_char (str): The character of dead cells; the canvas fill
+                character by default.
+            style (str): The name of the core style live cells are drawn in.
+            sparse (bool): Step only the tiles near the last changes, which
+                is much faster on mostly empty or settled boards.
+
+        Raises:
+            ValueError: If the board does not fit on the canvas, or the rule
+                or style is unknown.
+        """
+        width = core.canvas_width - x if width is None else width
+        height = core.canvas_height - y if height is None else height
+        if x < 0 or y < 0 or width <= 0 or height <= 0 or x + width > core.canvas_width \
+                or y + height > core.canvas_height:
+            raise ValueError("The board must be a non-empty rectangle inside the canvas.")
+        if style not in core.styles:
+            raise ValueError(f"Style '{style}' not defined.")
+        self.core = core
+        self.x, self.y = x, y
+        self.width, self.height = width, height
+        self.rule = Rule.parse(rule) if isinstance(rule, str) else rule
+        self.wrap = wrap
+        self.sparse = sparse
+        self.generation = 0
+        dead_char = core.fill_char if dead_char is None else dead_char
+        self._table = self.rule.table()
+        # The character and style id of dead and of live cells
+        self._chars = (dead_char, alive_char)
+        self._ids = (0, core.styles[style]['id'])
+
+        # The board lives inside a one-cell border; two boards are swapped
+        # between generations
+        self._board = np.zeros((height + 2, width + 2), dtype=np.uint8)
+        self._next = np.zeros_like(self._board)
+        self._rows = np.empty((height, width + 2), dtype=np.uint8)
+        self._counts = np.empty((height, width), dtype=np.uint8)
+        rows = [''.join(core.canvas[y + row][x:x + width]) for row in range(height)]
+        # Writes can cut double-width characters in or next to the board in
+        # half, which must then be blanked
+        self._wide = any(WIDE_PAD in core.canvas[y + row][x:x + width + 1] for row in range(height)) \
+            or WIDTHS.width(alive_char) == 2 or WIDTHS.width(dead_char) == 2
+        self.state[:] = np.array([[char != dead_char for char in row] for row in rows], dtype=np.uint8)
+        # What the canvas currently shows
+        self._shown = self.state.copy()
+        # Tiles that may change next generation
+        self._active = np.ones((-(-height // self.TILE), -(-width // self.TILE)), dtype=bool)
+
+    @property
+    def state(self) -> np.ndarray:
+        """The board as a height x width uint8 array of 0 (dead) and 1 (alive)."""
+        return self._board[1:-1, 1:-1]
+
+    @property
+    def population(self) -> int:
+        """The number of live cells."""
+        return int(np.count_nonzero(self.state))
+
+    def set_cells(self, cells: Iterable[Tuple[int, int]], alive: bool = True):
+        """
+        Sets cells, given as (x, y) board coordinates, alive or dead. The
+        canvas is updated on the next step() or sync().
+        """
+        points = np.array(list(cells), dtype=np.int64).reshape(-1, 2)
+        self.state[points[:, 1], points[:, 0]] = alive
+        self._active[:] = True
+
+    def randomize(self, density: float = 0.5, seed: Optional[int] = None):
+        """Fills the board at random with the given share of live cells."""
+        rng = np.random.default_rng(seed)
+        self.state[:] = rng.random((self.height, self.width)) < density
+        self._active[:] = True
+
+    def _fill_border(self, board: np.ndarray):
+        """Copies the opposite edges into the border when wrapping."""
+        if self.wrap:
+            board[0, 1:-1] = board[-2, 1:-1]
+            board[-1, 1:-1] = board[1, 1:-1]
+            board[:, 0] = board[:, -2]
+            board[:, -1] = board[:, 1]
+
+    def _step_dense(self):
+        board, rows, counts = self._board, self._rows, self._counts
+        # Box sums of three rows, then of three columns: the 3x3 total
+        np.add(board[:-2], board[1:-1], out=rows)
+        rows += board[2:]
+        np.add(rows[:, :-2], rows[:, 1:-1], out=counts)
+        counts += rows[:, 2:]
+        # The total includes the cell itself: neighbors + 10 * state
+        counts += self.state * np.uint8(9)
+        np.take(self._table, counts, out=self._next[1:-1, 1:-1])
+        self._board, self._next = self._next, self._board
+
+    def _step_sparse(self):
+        board, tile = self._board, self.TILE
+        updates = []
+        changed = np.zeros_like(self._active)
+        for ty, tx in zip(*np.nonzero(self._active)):
+            y0, x0 = ty * tile, tx * tile
+            y1, x1 = min(y0 + tile, self.height), min(x0 + tile, self.width)
+            block = board[y0:y1 + 2, x0:x1 + 2]
+            rows = block[:-2] + block[1:-1] + block[2:]
+            counts = rows[:, :-2] + rows[:, 1:-1] + rows[:, 2:]
+            old = block[1:-1, 1:-1]
+            counts += old * np.uint8(9)
+            new = self._table[counts]
+            if not np.array_equal(new, old):
+                changed[ty, tx] = True
+                updates.append((y0, y1, x0, x1, new))
+        for y0, y1, x0, x1, new in updates:
+            board[y0 + 1:y1 + 1, x0 + 1:x1 + 1] = new
+
+        # A tile can only change next if it or a neighbor changed now
+        active = changed.copy()
+        for dy in (-1, 0, 1):
+            for dx in (-1, 0, 1):
+                if dy or dx:
+                    shifted = np.roll(changed, (dy, dx), axis=(0, 1))
+                    if not self.wrap:
+                        if dy:
+                            shifted[0 if dy > 0 else -1] = False
+                        if dx:
+                            shifted[:, 0 if dx > 0 else -1] = False
+                    active |= shifted
+        self._active = active
+
+    def step(self, generations: int = 1) -> int:
+        """
+        Advances the board and writes the cells that changed to the canvas.
+
+        Args:
+            generations (int): Generations to run before writing back; the
+                canvas shows only the last of them.
+
+        Returns:
+            int: The number of canvas cells written.
+        """
+        for _ in range(generations):
+            self._fill_border(self._board)
+            if self.sparse:
+                self._step_sparse()
+            else:
+                self._step_dense()
+        self.generation += generations
+        return self.sync()
+
+    def sync(self) -> int:
+        """
+        Writes the cells whose state differs from the canvas to the canvas.
+
+        Returns:
+            int: The number of cells written.
+        """
+        state, shown = self.state, self._shown
+        changed = np.flatnonzero(state != shown)
+        if not changed.size:
+            return 0
+        # A changed cell flipped, so flipping it in the shown board brings
+        # that up to date. Cells are written row by row.
+        flat = shown.ravel()
+        flat[changed] ^= 1
+        alive = flat[changed].tolist()
+        rows, cols = np.divmod(changed, self.width)
+        bounds = np.flatnonzero(np.diff(rows)) + 1
+        starts = [0] + bounds.tolist()
+        ends = bounds.tolist() + [changed.size]
+        xs = (cols + self.x).tolist()
+        chars, ids = self._chars, self._ids
+        core = self.core
+        for y, start, end in zip((rows[starts] + self.y).tolist(), starts, ends):
+            row = core._writable_row(y)
+            style_row = core.style_rows[y]
+            for x, live in zip(xs[start:end], alive[start:end]):
+                row[x] = chars[live]
+                style_row[x] = ids[live]
+            if self._wide:
+                core._mend_wide(y, xs[start:end])
+        return changed.size
@@ -0,0 +1,237 @@
+# asc3_pack.py
+#
+# A compact binary form of Asc3 canvases for storage. The canvas is read as
+# two planes in row-major order, the codepoint of every cell and the style
+# of every cell, and each plane is run-length encoded: art is mostly long
+# runs of the fill character and of a few styles. Styles are stored once in
+# a table of normalized styles, runs are stored with the narrowest integer
+# type that holds them, and the whole body is compressed with zlib.
+#
+# Decoding rebuilds the planes with np.repeat, so it costs one pass over the
+# cells, not a re-run of the program that drew them.
+
+import json
+import struct
+import zlib
+from array import array
+from typing import Iterator, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from asc3_styles import DEFAULT_PALETTE, Style, StylePalette, style_from_json, style_to_json
+from asc3_width import strip_pad
+
+# Header: magic, version, width, height, fill character
+_MAGIC = b'A3C'
+_VERSION = 1
+_HEADER = struct.Struct('<3sBIII')
+# Per plane: number of runs, value type, length type
+_PLANE = struct.Struct('<IBB')
+_COUNT = struct.Struct('<I')
+
+_DTYPES = [np.dtype('<u1'), np.dtype('<u2'), np.dtype('<u4')]
+
+# Cells holding more than one codepoint (a character with combining marks)
+# are stored as codes past the last codepoint, indexing a cluster table
+_CLUSTER_BASE = 0x110000
+
+
+class PackedCanvas(NamedTuple):
+    """A decoded canvas: its rows of cells and style ids into styles."""
+    width: int
+    height: int
+    fill_char: str
+    rows: List[List[str]]
+    style_rows: List[array]
+    styles: List[Style]
+
+
+def _narrowest(values: np.ndarray) -> int:
+    """Returns the index in _DTYPES of the narrowest type that holds values."""
+    top = int(values.max()) if len(values) else 0
+    return 0 if top < 1 << 8 else 1 if top < 1 << 16 else 2
+
+
+def _encode_plane(plane: np.ndarray) -> List[bytes]:
+    """Run-length encodes a flat plane."""
+    if len(plane):
+        starts = np.concatenate(([0], np.flatnonzero(plane[1:] != plane[:-1]) + 1))
+        values = plane[starts]
+        lengths = np.diff(np.append(starts, len(plane)))
+    else:
+        values = lengths = np.zeros(0, dtype=np.uint32)
+    value_type, length_type = _narrowest(values), _narrowest(lengths)
+    return [_PLANE.pack(len(values), value_type, length_type),
+            values.astype(_DTYPES[value_type]).tobytes(),
+            lengths.astype(_DTYPES[length_type]).tobytes()]
+
+
+def _decode_plane(body: memoryview, offset: int, size: int) -> Tuple[np.ndarray, int]:
+    """Decodes a plane written by _encode_plane into size cells."""
+    count, value_type, length_type = _PLANE.unpack_from(body, offset)
+    offset += _PLANE.size
+    values = np.frombuffer(body, dtype=_DTYPES[value_type], count=count, offset=offset)
+    offset += count * _DTYPES[value_type].itemsize
+    lengths = np.frombuffer(body, dtype=_DTYPES[length_type], count=count, offset=offset)
+    offset += count * _DTYPES[length_type].itemsize
+    plane = np.repeat(values.astype(np.uint32), lengths)
+    if len(plane) != size:
+        raise ValueError("Corrupt Asc3 canvas: a plane does not cover the canvas.")
+    return plane, offset
+
+
+def pack_canvas(rows: Sequence[Sequence[str]], style_rows: Sequence[array],
+                palette: StylePalette = DEFAULT_PALETTE, fill_char: str = ' ', level: int = 6) -> bytes:
+    """
+    Packs a canvas into the compact format.
+
+    Args:
+        rows (sequence): The rows of cells.
+        style_rows (sequence): The style id rows.
+        palette (StylePalette): The palette the style ids belong to.
+        fill_char (str): The fill character of the canvas.
+        level (int): The zlib compression level.
+
+    Returns:
+        bytes: The packed canvas.
+    """
+    height = len(rows)
+    width = len(rows[0]) if height else 0
+    text = ''.join(''.join(row) for row in rows)
+    clusters: List[str] = []
+    if len(text) == width * height:
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    else:
+        # Some cells hold more than one codepoint
+        index = {}
+        codes = np.array([ord(cell) if len(cell) == 1 else
+                          _CLUSTER_BASE + index.setdefault(cell, len(index))
+                          for row in rows for cell in row], dtype=np.uint32)
+        clusters = list(index)
+
+    # Style ids are renumbered densely in order of first use, so the table
+    # only holds the styles the canvas uses
+    ids = np.frombuffer(b''.join(row.tobytes() for row in style_rows), dtype=np.uint16)
+    used, first, local = np.unique(ids, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind='stable')
+    renumber = np.empty(len(used), dtype=np.uint32)
+    renumber[order] = np.arange(len(used), dtype=np.uint32)
+    styles = [style_to_json(palette.styles[style_id]) for style_id in used[order].tolist()]
+
+    tables = json.dumps([styles, clusters], separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+    body = [_COUNT.pack(len(tables)), tables]
+    body += _encode_plane(codes)
+    body += _encode_plane(renumber[local.reshape(-1)])
+    header = _HEADER.pack(_MAGIC, _VERSION, width, height, ord(fill_char))
+    return header + zlib.compress(b''.join(body), level)
+
+
+def unpack_canvas(data: bytes) -> PackedCanvas:
+    """
+    Unpacks a canvas packed with pack_canvas. Style ids index the returned
+    styles, not any palette.
+
+    Raises:
+        ValueError: If the data is not a packed canvas.
+    """
+    if len(data) < _HEADER.size:
+        raise ValueError("Not an Asc3 canvas.")
+    magic, version, width, height, fill_code = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC or version != _VERSION:
+        raise ValueError("Not an Asc3 canvas, or an unsupported version.")
+    try:
+        body = memoryview(zlib.decompress(memoryview(data)[_HEADER.size:]))
+    except zlib.error as e:
+        raise ValueError(f"Corrupt Asc3 canvas: {e}") from e
+
+    (length,) = _COUNT.unpack_from(body, 0)
+    offset = _COUNT.size + length
+    styles, clusters = json.loads(bytes(body[_COUNT.size:offset]).decode('utf-8'))
+    codes, offset = _decode_plane(body, offset, width * height)
+    ids, offset = _decode_plane(body, offset, width * height)
+
+    if clusters:
+        cells = [chr(code) if code < _CLUSTER_BASE else clusters[code - _CLUSTER_BASE]
+                 for code in codes.tolist()]
+        rows = [cells[y * width:(y + 1) * width] for y in range(height)]
+    else:
+        text = codes.tobytes().decode('utf-32-le')
+        rows = [list(text[y * width:(y + 1) * width]) for y in range(height)]
+    plane = ids.astype(np.uint16).tobytes()
+    style_rows = [array('H', plane[2 * y * width:2 * (y + 1) * width]) for y in range(height)]
+    return PackedCanvas(width, height, chr(fill_code), rows, style_rows,
+                        [style_from_json(item) for item in styles])
+
+
+def pack(core, level: int = 6) -> bytes:
+    """
+    Packs the canvas of a paper_py Asc3Core.
+
+    Args:
+        core (Asc3Core): The core whose canvas is packed.
+        level (int): The zlib compression level.
+
+    Returns:
+        bytes: The packed canvas.
+    """
+    return pack_canvas(core.canvas, core.style_rows, core.palette, core.fill_char, level)
+
+
+def unpack_into(data: bytes, core=None):
+    """
+    Replaces the canvas of a paper_py Asc3Core with a packed canvas, resizing
+    it if needed. The styles are interned into the core's palette.
+
+    Args:
+        data (bytes): A packed canvas.
+        core (Asc3Core): The core to load into; a new one by default.
+
+    Returns:
+        Asc3Core: The core.
+    """
+    canvas = unpack_canvas(data)
+    if core is None:
+        from paper_py import Asc3Core
+        core = Asc3Core(canvas.width, canvas.height, canvas.fill_char)
+    ids = np.array([core.palette.intern_style(style) for style in canvas.styles], dtype=np.uint16)
+    if len(ids) and ids.any():
+        style_rows = [array('H', ids[np.frombuffer(row, dtype=np.uint16)].tobytes())
+                      for row in canvas.style_rows]
+    else:
+        style_rows = canvas.style_rows
+    core.canvas_width, core.canvas_height = canvas.width, canvas.height
+    core.fill_char = canvas.fill_char
+    core.canvas = canvas.rows
+    core.style_rows = style_rows
+    core._drop_history()
+    return core
+
+
+def iter_text(data: bytes, ansi: bool = False) -> Iterator[str]:
+    """
+    Streams the rows of a packed canvas as text, without a core.
+
+    Args:
+        data (bytes): A packed canvas.
+        ansi (bool): Add ANSI escape sequences for the styles.
+
+    Yields:
+        str: Each row, without a line break.
+    """
+    canvas = unpack_canvas(data)
+    palette = None
+    if ansi:
+        palette = StylePalette()
+        ids = array('H', [palette.intern_style(style) for style in canvas.styles])
+        if ids.tolist() != list(range(len(ids))):
+            # The plain style is always id 0 in a new palette; remap around it
+            lookup = np.frombuffer(ids, dtype=np.uint16)
+            canvas = canvas._replace(style_rows=[array('H', lookup[np.frombuffer(row, dtype=np.uint16)].tobytes())
+                                                 for row in canvas.style_rows])
+    for row, style_row in zip(canvas.rows, canvas.style_rows):
+        yield strip_pad(palette.render_row(row, style_row) if palette else ''.join(row))
+
+
+def unpack_text(data: bytes, ansi: bool = False) -> str:
+    """Renders a packed canvas as one string, as Asc3Core.render() would."""
+    return "\n".join(iter_text(data, ansi))
@@ -0,0 +1,203 @@
+# asc3_scroll.py
+#
+# A scrolling Asc3 canvas for tickers and marquees. The canvas is a ring
+# buffer: content cell (X, Y) always lives in canvas cell (X % width,
+# Y % height), so scrolling only changes an offset and never moves rows or
+# cells. The rows and columns a scroll exposes are drawn on demand from a
+# text source with write_text, clipped to exactly the exposed cells, and
+# render() reads the canvas starting at the offset.
+
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict
+from typing import Callable, List, Optional, Sequence, Tuple, Union
+
+from paper_py import Asc3Core
+from asc3_viewport import ClipRect
+from asc3_width import strip_pad
+
+
+class ScrollingCore(Asc3Core):
+    """
+    An Asc3Core that shows a window onto text drawn with one font.
+
+    The content is the source's lines of text written one below the other,
+    line i starting at content row i * line_height. scroll_to and scroll_by
+    move the window over the content in O(1) plus the cost of drawing the
+    newly exposed cells.
+
+    The canvas holds the ring buffer, so its rows are not in display order;
+    use render() or render_ansi() to read it. Drawing directly on the canvas
+    uses ring buffer coordinates.
+    """
+
+    # Number of lines whose glyph positions are kept
+    LINE_CACHE_SIZE = 256
+
+    def __init__(self, font_name: str, font_map, source: Union[Sequence[str], Callable[[int], Optional[str]]],
+                 canvas_width: int = 80, canvas_height: int = 24, fill_char: str = ' ',
+                 letter_spacing: int = 1, line_spacing: int = 0, **options):
+        """
+        Args:
+            font_name (str): The name to define the font under.
+            font_map (dict): A dictionary mapping characters to their ASCII art.
+            source: The lines of text, as a sequence or as a callable that
+                returns line i, or None where there is no line.
+            canvas_width (int): The width of the window.
+            canvas_height (int): The height of the window.
+            fill_char (str): The character of empty cells.
+            letter_spacing (int): Blank columns inserted between characters.
+            line_spacing (int): Blank rows inserted between lines.
+            options: Passed on to Asc3Core.
+        """
+        super().__init__(canvas_width, canvas_height, fill_char, **options)
+        self.define_font(font_name, font_map, letter_spacing)
+        self.font_name = font_name
+        self.source = source
+        self.line_height = self.fonts[font_name].height + line_spacing
+        self.scroll_x = 0
+        self.scroll_y = 0
+        self._positions: 'OrderedDict[int, Tuple[str, List[int]]]' = OrderedDict()
+        self._draw_content(0, canvas_width, 0, canvas_height)
+
+    def _line(self, index: int) -> Optional[str]:
+        """Returns line index of the source, or None."""
+        if callable(self.source):
+            return self.source(index)
+        return self.source[index] if 0 <= index < len(self.source) else None
+
+    def _line_positions(self, index: int) -> Tuple[Optional[str], List[int]]:
+        """
+        Returns line index and the content x of each of its characters,
+        cached per line.
+        """
+        cached = self._positions.get(index)
+        if cached is not None:
+            self._positions.move_to_end(index)
+            return cached
+        text = self._line(index)
+        positions = []
+        if text:
+            advances = self.fonts[self.font_name].advances
+            x = 0
+            for char in text:
+                positions.append(x)
+                x += advances.get(char, 0)
+        self._positions[index] = (text, positions)
+        if len(self._positions) > self.LINE_CACHE_SIZE:
+            self._positions.popitem(last=False)
+        return text, positions
+
+    def invalidate(self):
+        """
+        Forgets the cached lines and redraws the window, for when the source
+        has changed.
+        """
+        self._positions.clear()
+        self._draw_content(self.scroll_x, self.scroll_x + self.canvas_width,
+                           self.scroll_y, self.scroll_y + self.canvas_height)
+
+    def _draw_content(self, x0: int, x1: int, y0: int, y1: int):
+        """
+        Draws the content rectangle [x0, x1) x [y0, y1), at most one canvas
+        in size, into its ring buffer cells. The rectangle is split where it
+        wraps around the canvas, and every piece is cleared and drawn under a
+        clip.
+        """
+        width, height = self.canvas_width, self.canvas_height
+        font = self.fonts[self.font_name]
+        reach = max(font.extents.values(), default=0)
+        saved = (self.cursor_x, self.cursor_y, self.clip)
+        for py0, py1 in _split(y0, y1, height):
+            for px0, px1 in _split(x0, x1, width):
+                # Content (X, Y) is drawn at canvas (X - shift_x, Y - shift_y)
+                shift_x, shift_y = px0 // width * width, py0 // height * height
+                left, top = px0 - shift_x, py0 - shift_y
+                blank = array('H', bytes(2 * (px1 - px0)))
+                for y in range(top, top + py1 - py0):
+                    self._writable_row(y)[left:left + px1 - px0] = [self.fill_char] * (px1 - px0)
+                    self.style_rows[y][left:left + px1 - px0] = blank
+                    self._mend_wide(y, (left, left + px1 - px0 - 1))
+
+                self.clip = ClipRect(left, top, left + px1 - px0, top + py1 - py0)
+                for index in range(py0 // self.line_height, (py1 - 1) // self.line_height + 1):
+                    text, positions = self._line_positions(index)
+                    if not text:
+                        continue
+                    # Only the characters that can reach the piece are written
+                    first = max(bisect_left(positions, px0 - reach + 1) - 1, 0)
+                    last = bisect_left(positions, px1)
+                    if first >= last:
+                        continue
+                    self.cursor_x = positions[first] - shift_x
+                    self.cursor_y = index * self.line_height - shift_y
+                    self.write_text(self.font_name, text[first:last])
+        self.cursor_x, self.cursor_y, self.clip = saved
+
+    def scroll_to(self, x: int, y: int):
+        """
+        Moves the window so its top-left corner shows content (x, y).
+
+        Only the rows and columns that come into view are drawn; if the
+        window moves by a whole canvas or more, it is drawn afresh.
+        """
+        width, height = self.canvas_width, self.canvas_height
+        dx, dy = x - self.scroll_x, y - self.scroll_y
+        if abs(dx) >= width or abs(dy) >= height:
+            self.scroll_x, self.scroll_y = x, y
+            self._draw_content(x, x + width, y, y + height)
+            return
+
+        # Rows first, across the old columns, then columns across the new rows
+        if dy > 0:
+            self._draw_content(self.scroll_x, self.scroll_x + width, self.scroll_y + height, y + height)
+        elif dy < 0:
+            self._draw_content(self.scroll_x, self.scroll_x + width, y, self.scroll_y)
+        self.scroll_y = y
+        if dx > 0:
+            self._draw_content(self.scroll_x + width, x + width, y, y + height)
+        elif dx < 0:
+            self._draw_content(x, self.scroll_x, y, y + height)
+        self.scroll_x = x
+
+    def scroll_by(self, dx: int = 0, dy: int = 0):
+        """Moves the window by (dx, dy) content cells."""
+        self.scroll_to(self.scroll_x + dx, self.scroll_y + dy)
+
+    def visible_rows(self) -> List[str]:
+        """Returns the text of every row of the window, top to bottom."""
+        x, y = self.scroll_x % self.canvas_width, self.scroll_y % self.canvas_height
+        rows = self.canvas[y:] + self.canvas[:y]
+        return [''.join(row[x:]) + ''.join(row[:x]) for row in rows]
+
+    def render(self):
+        """
+        Renders the window into a single string.
+
+        Returns:
+            str: The visible content.
+        """
+        self.diagnostics.report()
+        return strip_pad("\n".join(self.visible_rows()))
+
+    def render_ansi(self):
+        """
+        Renders the window with ANSI escape sequences for its styles.
+
+        Returns:
+            str: The visible content with colors.
+        """
+        self.diagnostics.report()
+        x, y = self.scroll_x % self.canvas_width, self.scroll_y % self.canvas_height
+        rows = self.canvas[y:] + self.canvas[:y]
+        style_rows = self.style_rows[y:] + self.style_rows[:y]
+        return strip_pad("\n".join(self.palette.render_row(row[x:] + row[:x], ids[x:] + ids[:x])
+                                   for row, ids in zip(rows, style_rows)))
+
+
+def _split(start: int, stop: int, size: int) -> List[Tuple[int, int]]:
+    """Splits [start, stop) where it crosses a multiple of size."""
+    if start >= stop:
+        return []
+    cut = (start // size + 1) * size
+    return [(start, stop)] if stop <= cut else [(start, cut), (cut, stop)]
@@ -0,0 +1,345 @@
+# asc3_server.py
+#
+# Local frame-streaming server for Asc3 programs. The programs that the
+# Cyberweave pages used to run in the browser every second run here instead,
+# at a fixed tick rate. Every tick is rendered and delta-encoded once, and the
+# same bytes are pushed to every subscriber over Server-Sent Events, so the
+# work per tick does not depend on how many clients are watching. Run it with
+#
+#     python asc3_server.py
+#
+# and open http://127.0.0.1:8765/ to watch the frames.
+
+import asyncio
+import json
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple, Union
+
+from asc3_delta import Delta, DeltaEncoder, run_styles, to_dict
+from asc3_export import style_css
+from asc3_variants import IntRange, VariantGenerator
+from paper_py import Asc3Core
+
+ASC3_FONT = {
+    'A': ["  _  ", " / \\ ", "/___\\", "\\   /", " \\ / "],
+    'S': [" ____ ", "/ __ \\", "\\___ \\", " ____/", "/____/"],
+    'C': ["  ___ ", " / __|", "| (__ ", " \\___|", "     "],
+    '3': [" ____ ", "|___ \\", "  _  |", " ___/ ", "|____/"],
+    'P': [" ____  ", "|  _ \\ ", "| |_) |", "|  __/ ", "|_|    "],
+    'Y': ["__   __", "\\ \\ / /", " \\ V / ", "  | |  ", "  |_|  "],
+    'B': [" ____  ", "| __ ) ", "|  _ \\ ", "| |_) |", "|____/ "],
+    'E': [" _____ ", "| ____|", "|  _|  ", "| |___ ", "|_____|"],
+    'R': [" ____  ", "|  _ \\ ", "| |_) |", "|  _ < ", "|_| \\_\\"],
+    ' ': ["      ", "      ", "      ", "      ", "      "],
+}
+
+VIEWER_PAGE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>Asc3 Frames</title>
+    <style>
+        body { background-color: #000; color: #00ff41; font-family: monospace; }
+        h2 { color: #ff00ff; font-size: 14px; margin-bottom: 4px; }
+        pre { margin-top: 0; }
+    </style>
+</head>
+<body>
+    <div id="cores"></div>
+    <script>
+        // The page only displays frames: every message carries one delta per core.
+        const cores = {};
+
+        function createCore(name) {
+            const title = document.createElement('h2');
+            title.textContent = name;
+            const element = document.createElement('pre');
+            document.getElementById('cores').append(title, element);
+            return { element: element, cells: [], css: [], seq: -1 };
+        }
+
+        // A cell: a character with its combining marks
+        const CELL = /\\P{M}\\p{M}*|\\p{M}+/gu;
+
+        // Shows the cells as text, with one span per run of a style
+        function render(core) {
+            const nodes = [];
+            core.cells.forEach((cells, y) => {
+                if (y) nodes.push('\\n');
+                const css = core.css[y];
+                let start = 0;
+                for (let x = 1; x <= cells.length; x++) {
+                    if (x < cells.length && css[x] === css[start]) continue;
+                    // Drop the pad cells that follow double-width characters
+                    const text = cells.slice(start, x).join('').replaceAll('\\0', '');
+                    if (css[start]) {
+                        const span = document.createElement('span');
+                        span.style.cssText = css[start];
+                        span.textContent = text;
+                        nodes.push(span);
+                    } else {
+                        nodes.push(text);
+                    }
+                    start = x;
+                }
+            });
+            core.element.replaceChildren(...nodes);
+        }
+
+        const source = new EventSource('/frames');
+        source.onmessage = (event) => {
+            const frame = JSON.parse(event.data);
+            for (const [name, delta] of Object.entries(frame.cores)) {
+                const core = cores[name] || (cores[name] = createCore(name));
+                if (delta.key) {
+                    core.cells = Array.from({ length: delta.h }, () => Array(delta.w).fill(delta.fill));
+                    core.css = Array.from({ length: delta.h }, () => Array(delta.w).fill(''));
+                } else if (core.seq !== delta.base) {
+                    continue; // Wait for the next keyframe
+                }
+                for (const [row, col, text, style] of delta.runs) {
+                    const css = style === undefined ? '' : delta.css[style];
+                    (text.match(CELL) || []).forEach((cell, offset) => {
+                        core.cells[row][col + offset] = cell;
+                        core.css[row][col + offset] = css;
+                    });
+                }
+                core.seq = delta.seq;
+                render(core);
+            }
+        };
+    </script>
+</body>
+</html>
+"""
+
+
+class Asc3Program(NamedTuple):
+    """
+    A program run on its own core every tick.
+
+    The commands are either a fixed Asc3 program or a callable that takes the
+    tick number and returns the program for that tick.
+    """
+    width: int
+    height: int
+    commands: Union[List[dict], Callable[[int], List[dict]]]
+    fill_char: str = ' '
+
+
+class _Subscriber:
+    """A connected client with its own bounded queue of pending frames."""
+
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.resync = True
+
+
+class FrameServer:
+    """
+    Runs Asc3 programs at a fixed tick rate and streams their frames.
+
+    Each subscriber has a bounded queue. A client that cannot keep up has its
+    backlog replaced by a keyframe of the current frame once its queue is
+    full, and a client that joins starts from one. That keyframe is encoded
+    at most once per tick and only when someone needs it, so a slow client
+    never holds frames back for the others, makes the server buffer without
+    bound or costs the other clients a keyframe.
+    """
+
+    def __init__(self, programs: Dict[str, Asc3Program], fonts: Optional[Dict[str, dict]] = None,
+                 tick_rate: float = 1.0, host: str = '127.0.0.1', port: int = 8765,
+                 queue_size: int = 8, keyframe_interval: int = 30):
+        """
+        Args:
+            programs (dict): The programs to run, by name.
+            fonts (dict): Fonts defined on every core, by font name.
+            tick_rate (float): Ticks per second.
+            host (str): The address to listen on.
+            port (int): The port to listen on.
+            queue_size (int): The most frames queued for one client.
+            keyframe_interval (int): Ticks between two keyframes.
+        """
+        self.programs = programs
+        self.tick_rate = tick_rate
+        self.host = host
+        self.port = port
+        self.queue_size = queue_size
+        self.tick_count = 0
+        self._cores: Dict[str, Asc3Core] = {}
+        self._encoders: Dict[str, DeltaEncoder] = {}
+        self._subscribers: List[_Subscriber] = []
+        # The keyframe of the current tick, once encoded
+        self._keyframe: Optional[bytes] = None
+
+        for name, program in programs.items():
+            core = Asc3Core(canvas_width=program.width, canvas_height=program.height,
+                            fill_char=program.fill_char)
+            for font_name, font_map in (fonts or {}).items():
+                core.define_font(font_name, font_map)
+            self._cores[name] = core
+            self._encoders[name] = DeltaEncoder(keyframe_interval=keyframe_interval)
+
+    def request_keyframe(self):
+        """Makes the next tick a keyframe for every core."""
+        for encoder in self._encoders.values():
+            encoder.request_keyframe()
+
+    def tick(self) -> Tuple[bytes, bool]:
+        """
+        Runs every program once and encodes the frame.
+
+        Returns:
+            Tuple of the Server-Sent Events message for this tick and whether
+            it is a keyframe.
+        """
+        deltas = {}
+        for name, program in self.programs.items():
+            core = self._cores[name]
+            commands = program.commands
+            core.clear()
+            core.run_program(commands(self.tick_count) if callable(commands) else commands)
+            deltas[name] = self._encoders[name].encode(core)
+        self.tick_count += 1
+
+        message = self._message(deltas)
+        keyframe = all(delta.keyframe for delta in deltas.values())
+        self._keyframe = message if keyframe else None
+        return message, keyframe
+
+    def current_keyframe(self) -> bytes:
+        """
+        Returns the current tick as a keyframe message. It is encoded on the
+        first call of a tick and shared by every later caller.
+        """
+        if self._keyframe is None:
+            self._keyframe = self._message({name: encoder.keyframe() for name, encoder in self._encoders.items()})
+        return self._keyframe
+
+    def _message(self, deltas: Dict[str, Delta]) -> bytes:
+        """Encodes one delta per core as a Server-Sent Events message."""
+        cores = {}
+        for name, delta in deltas.items():
+            core = self._cores[name]
+            cores[name] = dict(to_dict(delta, core.palette), fill=core.fill_char,
+                               css=[style_css(core.palette, style_id) for style_id in run_styles(delta)])
+        data = json.dumps({'tick': self.tick_count, 'cores': cores},
+                          separators=(',', ':'), ensure_ascii=False)
+        return f"data: {data}\n\n".encode('utf-8')
+
+    def publish(self, message: bytes, keyframe: bool):
+        """
+        Queues one encoded frame for every subscriber.
+
+        Subscribers that just joined get the frame as a keyframe instead, and
+        so do subscribers whose queue is full, after their backlog is
+        dropped. Only they receive it; the others keep receiving deltas.
+
+        Args:
+            message (bytes): The encoded frame, shared by all subscribers.
+            keyframe (bool): Whether the frame is a keyframe.
+        """
+        for subscriber in self._subscribers:
+            if subscriber.queue.full():
+                # Drop the backlog; the client catches up from a keyframe
+                while not subscriber.queue.empty():
+                    subscriber.queue.get_nowait()
+                subscriber.resync = True
+            if subscriber.resync:
+                subscriber.resync = False
+                subscriber.queue.put_nowait(message if keyframe else self.current_keyframe())
+            else:
+                subscriber.queue.put_nowait(message)
+
+    async def run_ticks(self):
+        """Runs the tick loop on a fixed schedule while anyone is subscribed."""
+        loop = asyncio.get_running_loop()
+        next_tick = loop.time()
+        while True:
+            if self._subscribers:
+                self.publish(*self.tick())
+            next_tick += 1 / self.tick_rate
+            await asyncio.sleep(max(0.0, next_tick - loop.time()))
+
+    async def serve(self):
+        """Starts the server and runs it until cancelled."""
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        print(f"Streaming Asc3 frames on http://{self.host}:{self.port}/")
+        async with server:
+            await asyncio.gather(server.serve_forever(), self.run_ticks())
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """Serves one HTTP request: the viewer page or the frame stream."""
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin-1').split()
+            path = parts[1] if len(parts) > 1 else ''
+
+            if path == '/frames':
+                await self._stream(writer)
+            elif path == '/':
+                body = VIEWER_PAGE.encode('utf-8')
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/html; charset=utf-8\r\n"
+                             b"Content-Length: %d\r\nConnection: close\r\n\r\n" % len(body) + body)
+                await writer.drain()
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer: asyncio.StreamWriter):
+        """Streams frames to one subscriber until it disconnects."""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                     b"Cache-Control: no-cache\r\nConnection: keep-alive\r\n\r\n")
+        subscriber = _Subscriber(self.queue_size)
+        self._subscribers.append(subscriber)
+        try:
+            while True:
+                writer.write(await subscriber.queue.get())
+                await writer.drain()
+        finally:
+            self._subscribers.remove(subscriber)
+
+
+def cyberweave_programs(seed: int = 0) -> Dict[str, Asc3Program]:
+    """
+    The programs behind the Cyberweave cube faces and pane.
+
+    The faces place their text at a new position every tick. Positions come
+    from seeded variants, so a given seed always replays the same frames.
+
+    Args:
+        seed (int): The seed of the text positions.
+
+    Returns:
+        dict: The programs, by core name.
+    """
+    def face(*texts):
+        variants = VariantGenerator(
+            [{'command': 'set_style', 'x': IntRange(0, 5), 'y': IntRange(0, 2)}] +
+            [{'command': 'write_text', 'font': 'basic', 'text': text} for text in texts])
+        return lambda tick: variants.program(seed, tick)
+
+    return {
+        'coreA': Asc3Program(15, 5, face("ASC", "3"), '.'),
+        'coreB': Asc3Program(15, 5, face("PY"), '.'),
+        'coreC': Asc3Program(15, 5, face("C Y B E R"), '.'),
+        'pane': Asc3Program(20, 20, [
+            {'command': 'set_style', 'x': 0, 'y': 0},
+            {'command': 'write_text', 'font': 'basic', 'text': "ASC3"},
+            {'command': 'write_text', 'font': 'basic', 'text': "PY"},
+        ], '.'),
+    }
+
+
+if __name__ == '__main__':
+    frame_server = FrameServer(cyberweave_programs(seed=int(time.time())), fonts={'basic': ASC3_FONT}, tick_rate=1.0)
+    try:
+        asyncio.run(frame_server.serve())
+    except KeyboardInterrupt:
+        pass
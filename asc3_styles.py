@@ -0,0 +1,273 @@
+# asc3_styles.py
+#
+# Interned text styles. A style is a foreground and background color (named,
+# 256-color or 24-bit RGB) plus bold and underline. Every distinct style is
+# interned once into a small integer id with its ANSI escape sequence built
+# up front, so canvases only store ids and emitting output is a lookup.
+#
+# A palette never forgets a style and holds at most MAX_STYLES of them, after
+# which interning a new style raises ValueError. Every core has a palette of
+# its own unless it is given one, so a palette only fills up with the styles
+# of the cores that share it. DEFAULT_PALETTE is the palette shared by
+# canvases built outside a core, such as Paper3d's.
+
+from array import array
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from asc3_width import cell_offsets
+
+RESET = '\033[0m'
+
+# Named colors and their foreground SGR codes; backgrounds add 10
+NAMED_COLORS = {
+    'black': 30,
+    'gray': 90,
+    'grey': 90,
+    'red': 91,
+    'green': 92,
+    'yellow': 93,
+    'blue': 94,
+    'magenta': 95,
+    'cyan': 96,
+    'white': 97,
+}
+
+# RGB values of the named colors, the 16 basic 256-color entries and the
+# levels of the 6x6x6 color cube, as xterm shows them
+_NAMED_RGB = {
+    30: (0, 0, 0),
+    90: (128, 128, 128),
+    91: (255, 85, 85),
+    92: (85, 255, 85),
+    93: (255, 255, 85),
+    94: (85, 85, 255),
+    95: (255, 85, 255),
+    96: (85, 255, 255),
+    97: (255, 255, 255),
+}
+_ANSI_RGB = [
+    (0, 0, 0), (205, 0, 0), (0, 205, 0), (205, 205, 0),
+    (0, 0, 238), (205, 0, 205), (0, 205, 205), (229, 229, 229),
+    (127, 127, 127), (255, 0, 0), (0, 255, 0), (255, 255, 0),
+    (92, 92, 255), (255, 0, 255), (0, 255, 255), (255, 255, 255),
+]
+_CUBE_LEVELS = (0, 95, 135, 175, 215, 255)
+
+# Style ids are stored as unsigned 16-bit integers
+MAX_STYLES = 1 << 16
+
+
+class Style(NamedTuple):
+    """
+    A normalized text style.
+
+    Colors are None (the terminal default), ('named', code), ('256', index)
+    or ('rgb', r, g, b).
+    """
+    fg: Optional[Tuple[Any, ...]] = None
+    bg: Optional[Tuple[Any, ...]] = None
+    bold: bool = False
+    underline: bool = False
+
+
+PLAIN = Style()
+
+
+def parse_color(value) -> Optional[Tuple[Any, ...]]:
+    """
+    Normalizes a color given as a name, a 256-color index, '#rrggbb' or an
+    (r, g, b) tuple.
+
+    Raises:
+        ValueError: If the color is not understood.
+    """
+    if value is None:
+        return None
+    if isinstance(value, str):
+        name = value.lower()
+        if name in NAMED_COLORS:
+            return ('named', NAMED_COLORS[name])
+        if len(name) == 7 and name.startswith('#'):
+            try:
+                return ('rgb', int(name[1:3], 16), int(name[3:5], 16), int(name[5:7], 16))
+            except ValueError:
+                pass
+    elif isinstance(value, (int, np.integer)) and not isinstance(value, bool):
+        if 0 <= value < 256:
+            return ('256', int(value))
+    elif isinstance(value, (tuple, list)) and len(value) == 3:
+        if all(isinstance(c, (int, np.integer)) and 0 <= c < 256 for c in value):
+            return ('rgb',) + tuple(int(c) for c in value)
+    raise ValueError(f"Unsupported color: {value!r}")
+
+
+def _color_params(color: Tuple[Any, ...], background: bool) -> str:
+    """Returns the SGR parameters that select a normalized color."""
+    kind = color[0]
+    if kind == 'named':
+        return str(color[1] + (10 if background else 0))
+    prefix = '48' if background else '38'
+    if kind == '256':
+        return f"{prefix};5;{color[1]}"
+    return f"{prefix};2;{color[1]};{color[2]};{color[3]}"
+
+
+def escape_sequence(style: Style) -> str:
+    """
+    Builds the ANSI escape sequence that switches to a style. It starts with
+    a reset, so switching never inherits attributes from the previous style.
+    """
+    if style == PLAIN:
+        return ''
+    params = ['0']
+    if style.bold:
+        params.append('1')
+    if style.underline:
+        params.append('4')
+    if style.fg is not None:
+        params.append(_color_params(style.fg, False))
+    if style.bg is not None:
+        params.append(_color_params(style.bg, True))
+    return f"\033[{';'.join(params)}m"
+
+
+class StylePalette:
+    """
+    Interns styles into small integer ids.
+
+    Id 0 is always the plain style, which needs no escape sequence. The
+    escape sequence of every other style is built once when it is interned.
+    """
+
+    def __init__(self):
+        self.styles: List[Style] = [PLAIN]
+        self.escapes: List[str] = ['']
+        self._ids: Dict[Style, int] = {PLAIN: 0}
+
+    def __len__(self) -> int:
+        return len(self.styles)
+
+    def intern(self, fg=None, bg=None, bold=False, underline=False) -> int:
+        """
+        Returns the id of a style, interning it on first use.
+
+        Args:
+            fg: The foreground color, in any form parse_color accepts.
+            bg: The background color, in any form parse_color accepts.
+            bold (bool): Whether the text is bold.
+            underline (bool): Whether the text is underlined.
+
+        Returns:
+            int: The style id.
+
+        Raises:
+            ValueError: If a color is not understood or the palette is full.
+        """
+        return self.intern_style(Style(parse_color(fg), parse_color(bg), bool(bold), bool(underline)))
+
+    def intern_style(self, style: Style) -> int:
+        """
+        Returns the id of an already normalized style, interning it on first
+        use.
+
+        Raises:
+            ValueError: If the palette is full.
+        """
+        style_id = self._ids.get(style)
+        if style_id is None:
+            if len(self.styles) >= MAX_STYLES:
+                raise ValueError(f"A palette holds at most {MAX_STYLES} styles.")
+            style_id = len(self.styles)
+            self.styles.append(style)
+            self.escapes.append(escape_sequence(style))
+            self._ids[style] = style_id
+        return style_id
+
+    def render_row(self, row: Union[str, Sequence[str]], ids: array) -> str:
+        """
+        Renders one row of cells with their style ids as ANSI text.
+
+        An escape sequence is only emitted where the style changes, and the
+        row always ends in the plain style.
+
+        Args:
+            row: The cells of the row, or a string with one character per
+                cell.
+            ids (array): One style id per cell.
+
+        Returns:
+            str: The row with escape sequences.
+        """
+        text, offsets = cell_offsets(row)
+        plane = np.frombuffer(ids, dtype=np.uint16)
+        if not plane.any():
+            return text
+        escapes = self.escapes
+        parts = []
+        for start, end, style_id in style_runs(ids):
+            if offsets is not None:
+                start, end = offsets[start], offsets[end]
+            parts.append(escapes[style_id] if style_id else RESET if start else '')
+            parts.append(text[start:end])
+        if plane[-1]:
+            parts.append(RESET)
+        return ''.join(parts)
+
+
+def style_runs(ids) -> List[Tuple[int, int, int]]:
+    """
+    Splits a row of style ids into runs of the same style.
+
+    Args:
+        ids: A row of style ids (an array('H') or a uint16 array).
+
+    Returns:
+        list: (start, end, style id) for every run, left to right.
+    """
+    plane = np.frombuffer(ids, dtype=np.uint16) if isinstance(ids, array) else np.asarray(ids)
+    if not len(plane):
+        return []
+    bounds = np.flatnonzero(plane[1:] != plane[:-1]) + 1
+    starts = [0] + bounds.tolist()
+    ends = bounds.tolist() + [len(plane)]
+    return list(zip(starts, ends, plane[starts].tolist()))
+
+
+def style_to_json(style: Style) -> List[Any]:
+    """Converts a style to JSON-compatible data: [fg, bg, bold, underline]."""
+    return [list(style.fg) if style.fg else None, list(style.bg) if style.bg else None,
+            style.bold, style.underline]
+
+
+def style_from_json(item: List[Any]) -> Style:
+    """Builds a style from data produced by style_to_json."""
+    fg, bg, bold, underline = item
+    return Style(tuple(fg) if fg else None, tuple(bg) if bg else None, bool(bold), bool(underline))
+
+
+def color_rgb(color) -> Tuple[int, int, int]:
+    """Returns the (r, g, b) value of a normalized color."""
+    kind = color[0]
+    if kind == 'rgb':
+        return color[1:]
+    if kind == 'named':
+        return _NAMED_RGB[color[1]]
+    index = color[1]
+    if index < 16:
+        return _ANSI_RGB[index]
+    if index < 232:
+        index -= 16
+        return tuple(_CUBE_LEVELS[c] for c in (index // 36, index // 6 % 6, index % 6))
+    level = 8 + 10 * (index - 232)
+    return (level, level, level)
+
+
+def blank_style_row(width: int) -> array:
+    """Returns a row of plain style ids."""
+    return array('H', bytes(2 * width))
+
+
+# The palette of canvases built outside a core, and of cores given it
+DEFAULT_PALETTE = StylePalette()
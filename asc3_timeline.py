@@ -0,0 +1,377 @@
+# asc3_timeline.py
+#
+# Keyframe animation for Asc3 canvases, the Python counterpart of the
+# TWEEN.js animations in Cyberweave. A timeline holds tracks, each a line of
+# text in one font whose position, style and visibility are set at
+# keyframes. Positions are tweened between keyframes with an easing
+# function; style and visibility switch at their keyframes.
+#
+# The state of every track is interpolated for all frames at once with
+# NumPy. While rendering, only tracks whose state changed are redrawn: their
+# old and new boxes are cleared and every track that overlaps them is drawn
+# again under a clip, so a frame costs the size of what moved rather than
+# the size of the canvas. Deltas are built from the same boxes, without
+# comparing whole frames.
+
+from array import array
+from typing import Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from asc3_delta import Delta, Run, blank_frame, diff_rows, frame_rows
+from asc3_styles import blank_style_row, style_runs
+from asc3_viewport import ClipRect
+from paper_py import Asc3Core
+
+
+def _ease_in_out(ease_in: Callable[[np.ndarray], np.ndarray]) -> Callable[[np.ndarray], np.ndarray]:
+    """Builds the in-out form of an easing from its in form."""
+    return lambda u: np.where(u < 0.5, ease_in(2 * u) / 2, 1 - ease_in(2 - 2 * u) / 2)
+
+
+def _ease_out(ease_in: Callable[[np.ndarray], np.ndarray]) -> Callable[[np.ndarray], np.ndarray]:
+    """Builds the out form of an easing from its in form."""
+    return lambda u: 1 - ease_in(1 - u)
+
+
+def _ease_in_back(u: np.ndarray) -> np.ndarray:
+    return u * u * (2.70158 * u - 1.70158)
+
+
+def _ease_out_bounce(u: np.ndarray) -> np.ndarray:
+    return np.select([u < 1 / 2.75, u < 2 / 2.75, u < 2.5 / 2.75],
+                     [7.5625 * u * u,
+                      7.5625 * (u - 1.5 / 2.75) ** 2 + 0.75,
+                      7.5625 * (u - 2.25 / 2.75) ** 2 + 0.9375],
+                     7.5625 * (u - 2.625 / 2.75) ** 2 + 0.984375)
+
+
+_EASE_IN = {
+    'quad': lambda u: u ** 2,
+    'cubic': lambda u: u ** 3,
+    'quart': lambda u: u ** 4,
+    'sine': lambda u: 1 - np.cos(u * np.pi / 2),
+    'expo': lambda u: np.where(u > 0, 2.0 ** (10 * u - 10), 0.0),
+    'back': _ease_in_back,
+}
+
+# Easing functions by name, as in TWEEN.Easing: each maps the progress
+# through a segment (a float array in [0, 1]) to the eased progress
+EASINGS: Dict[str, Callable[[np.ndarray], np.ndarray]] = {
+    'linear': lambda u: u,
+    'step': lambda u: np.where(u >= 1, 1.0, 0.0),
+    'bounce_out': _ease_out_bounce,
+    'bounce_in': _ease_out(_ease_out_bounce),
+    'bounce_in_out': _ease_in_out(_ease_out(_ease_out_bounce)),
+}
+for _name, _ease in _EASE_IN.items():
+    EASINGS[f'{_name}_in'] = _ease
+    EASINGS[f'{_name}_out'] = _ease_out(_ease)
+    EASINGS[f'{_name}_in_out'] = _ease_in_out(_ease)
+
+
+class Keyframe(NamedTuple):
+    """
+    The state of a track at a time in seconds. Position is tweened from
+    here to the next keyframe with the easing; style and visibility hold
+    until the next keyframe.
+    """
+    time: float
+    x: int
+    y: int
+    style: str
+    visible: bool
+    easing: str
+
+
+class TrackStates(NamedTuple):
+    """The interpolated state of a track at every frame."""
+    x: np.ndarray
+    y: np.ndarray
+    style: np.ndarray
+    visible: np.ndarray
+
+
+class Track:
+    """A line of text animated by keyframes."""
+
+    def __init__(self, name: str, font: str, text: str, width: int, height: int):
+        self.name = name
+        self.font = font
+        self.text = text
+        self.width = width
+        self.height = height
+        self.keyframes: List[Keyframe] = []
+
+    def keyframe(self, time: float, x: Optional[int] = None, y: Optional[int] = None,
+                 style: Optional[str] = None, visible: Optional[bool] = None,
+                 easing: str = 'linear') -> 'Track':
+        """
+        Adds a keyframe. Values left out carry over from the keyframe before
+        it (or default to (0, 0), the default style and visible).
+
+        Args:
+            time (float): The time of the keyframe in seconds.
+            x (int): The x position of the text.
+            y (int): The y position of the text.
+            style (str): The name of the style to draw with.
+            visible (bool): Whether the text is drawn.
+            easing (str): The easing of the tween to the next keyframe; one
+                of EASINGS.
+
+        Returns:
+            Track: The track, so keyframes can be chained.
+
+        Raises:
+            ValueError: If the easing is unknown.
+        """
+        if easing not in EASINGS:
+            raise ValueError(f"Unsupported easing '{easing}'. Expected one of {sorted(EASINGS)}.")
+        earlier = [key for key in self.keyframes if key.time <= time]
+        previous = earlier[-1] if earlier else Keyframe(time, 0, 0, 'default', True, easing)
+        key = Keyframe(float(time),
+                       previous.x if x is None else int(x),
+                       previous.y if y is None else int(y),
+                       previous.style if style is None else style,
+                       previous.visible if visible is None else bool(visible),
+                       easing)
+        self.keyframes = [k for k in self.keyframes if k.time != key.time] + [key]
+        self.keyframes.sort(key=lambda k: k.time)
+        return self
+
+    def states(self, times: np.ndarray, styles: Dict[str, int]) -> TrackStates:
+        """
+        Interpolates the track at an array of times.
+
+        Args:
+            times (np.ndarray): Times in seconds.
+            styles (dict): The index of every style name.
+
+        Returns:
+            TrackStates: The state at every time.
+        """
+        if not self.keyframes:
+            zeros = np.zeros(len(times), dtype=np.int64)
+            return TrackStates(zeros, zeros, zeros, np.zeros(len(times), dtype=bool))
+        key_times = np.array([key.time for key in self.keyframes])
+        xs = np.array([key.x for key in self.keyframes], dtype=np.float64)
+        ys = np.array([key.y for key in self.keyframes], dtype=np.float64)
+
+        # The keyframe each time falls after, and the progress to the next
+        index = np.clip(np.searchsorted(key_times, times, side='right') - 1, 0, len(key_times) - 1)
+        following = np.minimum(index + 1, len(key_times) - 1)
+        span = key_times[following] - key_times[index]
+        progress = np.clip((times - key_times[index]) / np.where(span > 0, span, 1.0), 0.0, 1.0)
+        progress[span <= 0] = 0.0
+
+        eased = progress.copy()
+        easings = np.array([key.easing for key in self.keyframes])[index]
+        for name in np.unique(easings).tolist():
+            mask = easings == name
+            eased[mask] = EASINGS[name](progress[mask])
+
+        x = np.rint(xs[index] + (xs[following] - xs[index]) * eased).astype(np.int64)
+        y = np.rint(ys[index] + (ys[following] - ys[index]) * eased).astype(np.int64)
+        style = np.array([styles.get(key.style, 0) for key in self.keyframes], dtype=np.int64)[index]
+        visible = np.array([key.visible for key in self.keyframes], dtype=bool)[index]
+        return TrackStates(x, y, style, visible)
+
+
+class Timeline:
+    """
+    Animates tracks of text on an Asc3Core canvas.
+
+    Tracks are drawn in the order they were added, later ones on top.
+    """
+
+    def __init__(self, width: int = 80, height: int = 24, fps: int = 60, fill_char: str = ' '):
+        """
+        Args:
+            width (int): The width of the canvas.
+            height (int): The height of the canvas.
+            fps (int): Frames per second.
+            fill_char (str): The character of empty cells.
+        """
+        self.core = Asc3Core(width, height, fill_char)
+        self.fps = fps
+        self.tracks: List[Track] = []
+        self._style_names = ['default']
+
+    def define_font(self, font_name: str, font_map, letter_spacing: int = 1):
+        """Defines a font for tracks to use; see Asc3Core.define_font."""
+        self.core.define_font(font_name, font_map, letter_spacing)
+
+    def define_style(self, style_name: str, **style):
+        """
+        Defines a style for keyframes to use. The arguments are those of
+        Asc3Core.set_style apart from the position.
+        """
+        current = self.core.current_style_name
+        self.core.set_style(style_name, **style)
+        self.core.set_style(current)
+        if style_name not in self._style_names:
+            self._style_names.append(style_name)
+
+    def add_track(self, name: str, font: str, text: str) -> Track:
+        """
+        Adds a track showing text in a defined font.
+
+        Raises:
+            ValueError: If the font is not defined.
+        """
+        if font not in self.core.fonts:
+            raise ValueError(f"Font '{font}' not defined.")
+        compiled = self.core.fonts[font]
+        track = Track(name, font, text, compiled.measure(text), compiled.height)
+        self.tracks.append(track)
+        return track
+
+    @property
+    def duration(self) -> float:
+        """The time of the last keyframe, in seconds."""
+        return max((key.time for track in self.tracks for key in track.keyframes), default=0.0)
+
+    def frame_count(self, duration: Optional[float] = None) -> int:
+        """The number of frames in duration seconds, the last one included."""
+        duration = self.duration if duration is None else duration
+        return int(round(duration * self.fps)) + 1
+
+    def _states(self, frames: int) -> List[TrackStates]:
+        styles = {name: index for index, name in enumerate(self._style_names)}
+        times = np.arange(frames) / self.fps
+        return [track.states(times, styles) for track in self.tracks]
+
+    def _boxes(self, states: List[TrackStates], frame: int) -> List[Optional[ClipRect]]:
+        """The box each track covers at a frame, or None if it is hidden."""
+        boxes = []
+        for track, state in zip(self.tracks, states):
+            if state.visible[frame] and track.width > 0:
+                x, y = int(state.x[frame]), int(state.y[frame])
+                boxes.append(ClipRect.of(x, y, track.width, track.height))
+            else:
+                boxes.append(None)
+        return boxes
+
+    def _redraw(self, rects: List[ClipRect], boxes: List[Optional[ClipRect]], states: List[TrackStates],
+                frame: int):
+        """Clears rectangles and draws every track that overlaps them, clipped."""
+        core = self.core
+        canvas = ClipRect(0, 0, core.canvas_width, core.canvas_height)
+        for rect in rects:
+            rect = rect.intersect(canvas)
+            if not rect.width or not rect.height:
+                continue
+            blank = blank_style_row(rect.width)
+            for y in range(rect.top, rect.bottom):
+                core._writable_row(y)[rect.left:rect.right] = [core.fill_char] * rect.width
+                core.style_rows[y][rect.left:rect.right] = blank
+                core._mend_wide(y, (rect.left, rect.right - 1))
+            core.clip = rect
+            for track, box, state in zip(self.tracks, boxes, states):
+                if box is not None and box.intersect(rect).width and box.intersect(rect).height:
+                    core.set_style(self._style_names[state.style[frame]], x=box.left, y=box.top)
+                    core.write_text(track.font, track.text)
+        core.clip = None
+
+    def frames(self, duration: Optional[float] = None) -> Iterator[List[ClipRect]]:
+        """
+        Plays the timeline on self.core, one frame per step.
+
+        Args:
+            duration (float): Seconds to play; up to the last keyframe by
+                default.
+
+        Yields:
+            list: After each frame is drawn, the rectangles that changed
+            (the whole canvas for the first frame).
+        """
+        count = self.frame_count(duration)
+        states = self._states(count)
+        core = self.core
+        core.clear()
+        previous = self._boxes(states, 0)
+        whole = [ClipRect(0, 0, core.canvas_width, core.canvas_height)]
+        self._redraw(whole, previous, states, 0)
+        yield whole
+
+        keys = np.stack([np.stack([s.x, s.y, s.style, s.visible]) for s in states]) if states else None
+        for frame in range(1, count):
+            boxes = self._boxes(states, frame)
+            changed = np.flatnonzero((keys[:, :, frame] != keys[:, :, frame - 1]).any(axis=1)).tolist() \
+                if keys is not None else []
+            rects = []
+            for index in changed:
+                rects += [box for box in (previous[index], boxes[index]) if box is not None]
+            if rects:
+                self._redraw(rects, boxes, states, frame)
+            previous = boxes
+            yield rects
+
+    def render_frames(self, duration: Optional[float] = None, ansi: bool = False) -> Iterator[str]:
+        """
+        Renders the timeline frame by frame.
+
+        Yields:
+            str: Every frame, as core.render() or core.render_ansi() gives it.
+        """
+        for _ in self.frames(duration):
+            yield self.core.render_ansi() if ansi else self.core.render()
+
+    def deltas(self, duration: Optional[float] = None, keyframe_interval: int = 60) -> Iterator[Delta]:
+        """
+        Encodes the timeline as a stream of deltas (see asc3_delta), built
+        from the rectangles each frame redraws.
+
+        Args:
+            duration (float): Seconds to play; up to the last keyframe by
+                default.
+            keyframe_interval (int): Frames between two keyframes.
+
+        Yields:
+            Delta: One delta per frame, starting with a keyframe.
+        """
+        core = self.core
+        width, height = core.canvas_width, core.canvas_height
+        for seq, rects in enumerate(self.frames(duration)):
+            if seq % keyframe_interval == 0:
+                yield Delta(seq, seq, True, width, height,
+                            diff_rows(blank_frame(width, height, core.fill_char),
+                                      frame_rows(core.canvas, core.style_rows), 0))
+                continue
+            yield Delta(seq, seq - 1, False, width, height, _rect_runs(core.canvas, core.style_rows, rects))
+
+
+def _rect_runs(canvas: List[List[str]], style_rows: List[array], rects: List[ClipRect]) -> List[Run]:
+    """
+    Returns the canvas cells under rectangles as runs, merged per row and
+    split where the style changes.
+    """
+    height = len(canvas)
+    width = len(canvas[0]) if height else 0
+    spans: Dict[int, List[Tuple[int, int]]] = {}
+    for rect in rects:
+        left, right = max(rect.left, 0), min(rect.right, width)
+        if left >= right:
+            continue
+        for y in range(max(rect.top, 0), min(rect.bottom, height)):
+            spans.setdefault(y, []).append((left, right))
+
+    runs = []
+    for y in sorted(spans):
+        start, end = None, None
+        for left, right in sorted(spans[y]):
+            if end is not None and left <= end:
+                end = max(end, right)
+                continue
+            if end is not None:
+                runs += _styled_runs(canvas, style_rows, y, start, end)
+            start, end = left, right
+        runs += _styled_runs(canvas, style_rows, y, start, end)
+    return runs
+
+
+def _styled_runs(canvas: List[List[str]], style_rows: List[array], y: int, start: int, end: int) -> List[Run]:
+    """Returns cells start to end of row y as one run per style."""
+    row = canvas[y]
+    return [Run(y, start + run_start, ''.join(row[start + run_start:start + run_end]), style_id)
+            for run_start, run_end, style_id in style_runs(style_rows[y][start:end])]
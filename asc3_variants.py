@@ -0,0 +1,202 @@
+# asc3_variants.py
+#
+# Deterministic layout variants of Asc3 programs. A program template marks
+# some command arguments as variable (an integer range or a choice between
+# options); variant i of seed s fixes every one of them. Parameters are drawn
+# in vectorized batches from a counter-based hash of (seed, index, parameter),
+# so any variant can be produced on its own, in any order, and always comes
+# out the same. Drawn parameters and rendered frames are memoized.
+
+from collections import OrderedDict
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from paper_py import Asc3Core
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_MIX_1 = np.uint64(0xBF58476D1CE4E5B9)
+_MIX_2 = np.uint64(0x94D049BB133111EB)
+
+
+class IntRange(NamedTuple):
+    """An integer argument drawn from low (inclusive) to high (exclusive)."""
+    low: int
+    high: int
+
+
+class Choice(NamedTuple):
+    """An argument drawn from a list of options, such as texts or colors."""
+    options: Sequence[Any]
+
+
+def _mix(x: np.ndarray) -> np.ndarray:
+    """The splitmix64 finalizer, applied element-wise to a uint64 array."""
+    x = x ^ (x >> np.uint64(30))
+    x = x * _MIX_1
+    x = x ^ (x >> np.uint64(27))
+    x = x * _MIX_2
+    return x ^ (x >> np.uint64(31))
+
+
+def draw_uniform(seed: int, indices: np.ndarray, stream: int) -> np.ndarray:
+    """
+    Draws one float in [0, 1) per index, reproducibly.
+
+    The value depends only on (seed, index, stream), never on which other
+    indices are drawn in the same batch.
+
+    Args:
+        seed (int): The variant seed.
+        indices (np.ndarray): The variant indices.
+        stream (int): Which parameter the values are for.
+
+    Returns:
+        np.ndarray: One float64 per index.
+    """
+    with np.errstate(over='ignore'):
+        key = _mix(np.uint64(seed & 0xFFFFFFFFFFFFFFFF) * _GOLDEN + np.uint64(stream))
+        bits = _mix(indices.astype(np.uint64) * _GOLDEN + key)
+    return (bits >> np.uint64(11)).astype(np.float64) * (1.0 / (1 << 53))
+
+
+class VariantGenerator:
+    """
+    Produces numbered layout variants of one Asc3 program template.
+
+    Parameters are generated in blocks of BLOCK_SIZE variants and kept as one
+    int64 row per variant, so millions of variants stay compact and looking
+    one up is a dict access and an array index. Rendered frames are kept in
+    an LRU cache keyed by (seed, index).
+    """
+
+    BLOCK_SIZE = 4096
+
+    def __init__(self, template: List[dict], canvas_width: int = 80, canvas_height: int = 24,
+                 fill_char: str = ' ', fonts: Optional[Dict[str, dict]] = None,
+                 frame_cache_size: int = 1024):
+        """
+        Args:
+            template (list): An Asc3 program whose command arguments may be
+                IntRange or Choice values.
+            canvas_width (int): The width of the canvas variants render on.
+            canvas_height (int): The height of the canvas variants render on.
+            fill_char (str): The fill character of that canvas.
+            fonts (dict): Fonts defined on that canvas, by font name.
+            frame_cache_size (int): The most rendered frames kept.
+
+        Raises:
+            ValueError: If an IntRange is empty or a Choice has no options.
+        """
+        self.template = template
+        self.frame_cache_size = frame_cache_size
+        # (command index, argument name, spec) for every variable argument
+        self.parameters: List[Tuple[int, str, Any]] = [
+            (position, key, value)
+            for position, cmd in enumerate(template)
+            for key, value in cmd.items()
+            if isinstance(value, (IntRange, Choice))
+        ]
+        for position, key, spec in self.parameters:
+            command = template[position].get('command')
+            if isinstance(spec, IntRange) and spec.high <= spec.low:
+                raise ValueError(f"Argument '{key}' of {command} (command {position}) is an empty range: "
+                                 f"IntRange({spec.low}, {spec.high}) needs high greater than low.")
+            if isinstance(spec, Choice) and not len(spec.options):
+                raise ValueError(f"Argument '{key}' of {command} (command {position}) is a Choice with no options.")
+        self._blocks: Dict[Tuple[int, int], np.ndarray] = {}
+        self._frames: OrderedDict = OrderedDict()
+        self._canvas = (canvas_width, canvas_height, fill_char)
+        # Fonts are compiled once and shared by the cores variants render on
+        core = Asc3Core(canvas_width=canvas_width, canvas_height=canvas_height, fill_char=fill_char)
+        for font_name, font_map in (fonts or {}).items():
+            core.define_font(font_name, font_map)
+        self._fonts = core.fonts
+
+    def draw(self, seed: int, start: int, stop: int) -> np.ndarray:
+        """
+        Draws the parameters of variants start..stop without caching them.
+
+        Returns:
+            np.ndarray: An (n, P) int64 array. Ranges hold the drawn value and
+            choices hold the index of the drawn option.
+        """
+        indices = np.arange(start, stop, dtype=np.int64)
+        values = np.empty((indices.size, len(self.parameters)), dtype=np.int64)
+        for stream, (_, _, spec) in enumerate(self.parameters):
+            if isinstance(spec, IntRange):
+                low, count = spec.low, spec.high - spec.low
+            else:
+                low, count = 0, len(spec.options)
+            values[:, stream] = low + np.floor(draw_uniform(seed, indices, stream) * count).astype(np.int64)
+        return values
+
+    def pregenerate(self, seed: int, count: int):
+        """Draws and caches the parameters of variants 0..count."""
+        for block in range(-(-count // self.BLOCK_SIZE)):
+            self._block(seed, block)
+
+    def parameters_of(self, seed: int, index: int) -> np.ndarray:
+        """Returns the cached parameter row of one variant."""
+        block, row = divmod(index, self.BLOCK_SIZE)
+        return self._block(seed, block)[row]
+
+    def program(self, seed: int, index: int) -> List[dict]:
+        """
+        Builds the Asc3 program of one variant.
+
+        Args:
+            seed (int): The variant seed.
+            index (int): The variant number.
+
+        Returns:
+            list: The template with every variable argument fixed.
+        """
+        program = [dict(cmd) for cmd in self.template]
+        for (position, key, spec), value in zip(self.parameters, self.parameters_of(seed, index).tolist()):
+            program[position][key] = value if isinstance(spec, IntRange) else spec.options[value]
+        return program
+
+    def render(self, seed: int, index: int) -> str:
+        """
+        Renders one variant, or returns it from the frame cache.
+
+        Every variant renders on a new core holding only the generator's
+        fonts, so the cursor, styles and fonts a variant leaves behind never
+        change another and a frame is the same whatever was rendered before.
+
+        Args:
+            seed (int): The variant seed.
+            index (int): The variant number.
+
+        Returns:
+            str: The rendered frame.
+        """
+        key = (seed, index)
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+            return frame
+
+        width, height, fill_char = self._canvas
+        core = Asc3Core(canvas_width=width, canvas_height=height, fill_char=fill_char)
+        core.fonts = dict(self._fonts)
+        core.run_program(self.program(seed, index))
+        frame = core.render()
+        self._frames[key] = frame
+        if len(self._frames) > self.frame_cache_size:
+            self._frames.popitem(last=False)
+        return frame
+
+    def clear_cache(self):
+        """Forgets every cached parameter block and frame."""
+        self._blocks.clear()
+        self._frames.clear()
+
+    def _block(self, seed: int, block: int) -> np.ndarray:
+        values = self._blocks.get((seed, block))
+        if values is None:
+            start = block * self.BLOCK_SIZE
+            values = self.draw(seed, start, start + self.BLOCK_SIZE)
+            self._blocks[(seed, block)] = values
+        return values
@@ -0,0 +1,141 @@
+# asc3_viewport.py
+#
+# Clip rectangles and scrollable viewports for Asc3 canvases. A clip
+# rectangle limits drawing to part of a canvas: glyphs and glyph rows outside
+# it are rejected before any of their cells are looked at. A viewport is a
+# window of fixed size onto a canvas that can be scrolled around; rendering
+# it only reads the cells inside the window, so panning around a very large
+# canvas costs the same as rendering a small one.
+
+from contextlib import contextmanager
+from typing import List, NamedTuple
+
+from asc3_width import WIDE_PAD, strip_pad
+
+
+class ClipRect(NamedTuple):
+    """A rectangle of canvas cells; right and bottom are exclusive."""
+    left: int
+    top: int
+    right: int
+    bottom: int
+
+    @classmethod
+    def of(cls, x: int, y: int, width: int, height: int) -> 'ClipRect':
+        """Builds a rectangle from its position and size."""
+        return cls(x, y, x + width, y + height)
+
+    @property
+    def width(self) -> int:
+        return max(self.right - self.left, 0)
+
+    @property
+    def height(self) -> int:
+        return max(self.bottom - self.top, 0)
+
+    def intersect(self, other: 'ClipRect') -> 'ClipRect':
+        """Returns the overlap of two rectangles, which may be empty."""
+        return ClipRect(max(self.left, other.left), max(self.top, other.top),
+                        min(self.right, other.right), min(self.bottom, other.bottom))
+
+
+class Viewport:
+    """
+    A scrollable window onto the canvas of a core (paper_py or
+    ASC3-SymLangCore).
+
+    The window is width x height cells and its top-left corner sits at the
+    scroll offset. Rendering slices only the visible part of each visible
+    row; scrolling just moves the offset.
+    """
+
+    def __init__(self, core, width: int, height: int, x: int = 0, y: int = 0):
+        """
+        Args:
+            core: The core whose canvas is shown.
+            width (int): The width of the window in cells.
+            height (int): The height of the window in cells.
+            x (int): The initial horizontal scroll offset.
+            y (int): The initial vertical scroll offset.
+        """
+        self.core = core
+        self.width = width
+        self.height = height
+        self.x = 0
+        self.y = 0
+        self.scroll_to(x, y)
+
+    @property
+    def rect(self) -> ClipRect:
+        """The canvas cells under the window."""
+        return ClipRect.of(self.x, self.y, self.width, self.height)
+
+    def scroll_to(self, x: int, y: int):
+        """
+        Moves the window so its top-left corner is at (x, y), keeping it on
+        the canvas where the canvas is large enough.
+        """
+        canvas_height = len(self.core.canvas)
+        canvas_width = len(self.core.canvas[0]) if canvas_height else 0
+        self.x = max(min(x, canvas_width - self.width), 0)
+        self.y = max(min(y, canvas_height - self.height), 0)
+
+    def scroll_by(self, dx: int, dy: int):
+        """Moves the window by (dx, dy) cells."""
+        self.scroll_to(self.x + dx, self.y + dy)
+
+    @contextmanager
+    def clipped(self):
+        """
+        Clips drawing on the core to the window for the duration of a with
+        block, so only visible cells are drawn. The core must support
+        set_clip (see paper_py).
+        """
+        previous = self.core.clip
+        self.core.set_clip(self.x, self.y, self.width, self.height)
+        try:
+            yield self
+        finally:
+            self.core.clip = previous
+
+    def _cells(self, row: List[str]) -> List[str]:
+        """
+        Slices the visible cells of a row. A double-width character cut in
+        half by the window edge is shown as a space.
+        """
+        cells = row[self.x:self.x + self.width]
+        if cells and cells[0] == WIDE_PAD:
+            cells[0] = ' '
+        end = self.x + self.width
+        if cells and end < len(row) and row[end] == WIDE_PAD:
+            cells[-1] = ' '
+        return cells
+
+    def visible_rows(self) -> List[str]:
+        """Returns the text of every visible row."""
+        return [''.join(self._cells(row)) for row in self.core.canvas[self.y:self.y + self.height]]
+
+    def render(self) -> str:
+        """
+        Renders the window into a single string.
+
+        Returns:
+            str: The visible part of the canvas.
+        """
+        self.core.diagnostics.report()
+        return strip_pad("\n".join(self.visible_rows()))
+
+    def render_ansi(self) -> str:
+        """
+        Renders the window with ANSI escape sequences for its styles.
+
+        Returns:
+            str: The visible part of the canvas with colors.
+        """
+        self.core.diagnostics.report()
+        palette = self.core.palette
+        lines = []
+        for y in range(self.y, min(self.y + self.height, len(self.core.canvas))):
+            cells = self._cells(self.core.canvas[y])
+            lines.append(palette.render_row(cells, self.core.style_rows[y][self.x:self.x + len(cells)]))
+        return strip_pad("\n".join(lines))
@@ -0,0 +1,146 @@
+# asc3_width.py
+#
+# Terminal display widths. Most characters take one column, East Asian wide
+# and fullwidth characters take two, and combining marks and other format
+# characters take none. Widths are looked up in a table that is filled in
+# once per distinct codepoint, so the cost of unicodedata is never paid per
+# drawn cell.
+#
+# On a canvas a double-width character occupies two cells: the character
+# itself followed by WIDE_PAD. Renderers and exporters drop the pad cells.
+# A cell can also hold a character with its combining marks, so a row joined
+# into text is not always one character per cell; cell_offsets maps cells to
+# offsets in that text.
+
+import unicodedata
+from itertools import accumulate
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+# Fills the second cell of a double-width character
+WIDE_PAD = '\x00'
+
+_UNKNOWN = 255
+
+
+def _compute_width(char: str) -> int:
+    """Works out the display width of one character."""
+    if char == WIDE_PAD:
+        return 0
+    category = unicodedata.category(char)
+    if category in ('Mn', 'Me', 'Cf', 'Cc') or unicodedata.combining(char):
+        return 0
+    if unicodedata.east_asian_width(char) in ('W', 'F'):
+        return 2
+    return 1
+
+
+class WidthTable:
+    """
+    A lazily filled display-width table covering every codepoint.
+
+    Single characters are looked up through a dict and whole arrays of
+    codepoints through a NumPy table; both are filled the first time a
+    codepoint is seen.
+    """
+
+    def __init__(self):
+        self._known: Dict[str, int] = {}
+        self._table = np.full(0x110000, _UNKNOWN, dtype=np.uint8)
+
+    def width(self, char: str) -> int:
+        """Returns the display width of one character."""
+        width = self._known.get(char)
+        if width is None:
+            width = self._known[char] = _compute_width(char)
+            self._table[ord(char)] = width
+        return width
+
+    def widths(self, codes: np.ndarray) -> np.ndarray:
+        """Returns the display width of every codepoint in an array."""
+        widths = self._table[codes]
+        unknown = widths == _UNKNOWN
+        if unknown.any():
+            for code in np.unique(codes[unknown]).tolist():
+                self.width(chr(code))
+            widths = self._table[codes]
+        return widths
+
+    def text_width(self, text: str) -> int:
+        """Returns the number of columns a string takes in a terminal."""
+        if text.isascii():
+            return len(text)
+        codes = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+        return int(self.widths(codes).sum(dtype=np.int64))
+
+
+# The table shared by every font and core
+WIDTHS = WidthTable()
+
+
+def split_cells(line: str) -> List[str]:
+    """
+    Splits a line into canvas cells.
+
+    A double-width character is followed by a WIDE_PAD cell, and zero-width
+    characters such as combining marks join the cell before them.
+
+    Args:
+        line (str): The line to split.
+
+    Returns:
+        list: One string per canvas cell.
+    """
+    if line.isascii():
+        return list(line)
+    cells: List[str] = []
+    for char in line:
+        width = WIDTHS.width(char)
+        if width == 0 and cells:
+            cells[-2 if cells[-1] == WIDE_PAD else -1] += char
+        elif width == 2:
+            cells.append(char)
+            cells.append(WIDE_PAD)
+        else:
+            cells.append(char)
+    return cells
+
+
+def strip_pad(text: str) -> str:
+    """Removes the pad cells of double-width characters from rendered text."""
+    return text.replace(WIDE_PAD, '')
+
+
+def cell_offsets(row: Union[str, Sequence[str]]) -> Tuple[str, Optional[List[int]]]:
+    """
+    Joins a row of cells into text and maps the cells to offsets in it.
+
+    Args:
+        row: The cells of the row, or a string with one character per cell.
+
+    Returns:
+        Tuple of the text and the offset of every cell in it followed by the
+        length of the text, or None for the offsets when every cell is one
+        character, so cell indices are offsets already.
+    """
+    text = row if isinstance(row, str) else ''.join(row)
+    if len(text) == len(row):
+        return text, None
+    return text, list(accumulate(map(len, row), initial=0))
+
+
+def text_cells(text: str) -> List[str]:
+    """
+    Splits text joined from canvas cells back into the cells: zero-width
+    characters join the cell before them, except WIDE_PAD, which is a cell.
+    """
+    if text.isascii():
+        return list(text)
+    cells: List[str] = []
+    for char in text:
+        if cells and char != WIDE_PAD and WIDTHS.width(char) == 0:
+            cells[-1] += char
+        else:
+            cells.append(char)
+    return cells
@@ -0,0 +1,151 @@
+# benchmarks.py
+#
+# Benchmark suite for the Asc3 renderers. Run it from the repository root:
+#
+#     python benchmarks.py
+#
+# Each benchmark prints a small table of best-of-N wall clock timings.
+
+import time
+
+
+def _best_of(fn, repeat=3):
+    """
+    Runs a callable several times and returns the fastest wall clock time.
+
+    Args:
+        fn (callable): The zero-argument callable to time.
+        repeat (int): How many times to run it.
+
+    Returns:
+        float: The best time in seconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_paper3d_workers(grid=(120, 120, 120), canvas=(400, 200), workers=(1, 2, 4, 8), repeat=3):
+    """
+    Reports how Paper3d rasterization scales with the number of workers,
+    rasterizing every grid line, and how long level of detail takes.
+
+    Args:
+        grid (tuple): The (width, height, depth) of the 3D grid.
+        canvas (tuple): The (width, height) of the output canvas.
+        workers (tuple): The worker counts to measure.
+        repeat (int): Runs per worker count; the best one is reported.
+    """
+    from Paper3d import generate_paper3d_design
+
+    width, height, depth = grid
+    canvas_width, canvas_height = canvas
+    print(f"Paper3d {width}x{height}x{depth} grid on a {canvas_width}x{canvas_height} canvas")
+    print(f"{'workers':>8} {'seconds':>10} {'speedup':>8}")
+    baseline = None
+    for count in workers:
+        elapsed = _best_of(lambda: generate_paper3d_design(
+            width, height, depth, cell_size=3.0, perspective_factor=0.005,
+            canvas_width=canvas_width, canvas_height=canvas_height, workers=count, lod=False), repeat)
+        baseline = baseline or elapsed
+        print(f"{count:>8} {elapsed:>10.3f} {baseline / elapsed:>7.2f}x")
+    elapsed = _best_of(lambda: generate_paper3d_design(
+        width, height, depth, cell_size=3.0, perspective_factor=0.005,
+        canvas_width=canvas_width, canvas_height=canvas_height), repeat)
+    print(f"{'lod':>8} {elapsed:>10.3f} {baseline / elapsed:>7.2f}x")
+
+
+def bench_write_many(labels=20000, canvas=(1000, 500), repeat=3):
+    """
+    Compares write_many against sequential set_style and write_text calls.
+
+    Args:
+        labels (int): The number of labels to write.
+        canvas (tuple): The (width, height) of the canvas.
+        repeat (int): Runs per mode; the best one is reported.
+    """
+    import random
+    from paper_py import Asc3Core
+
+    font = {
+        'A': ["  _  ", " / \\ ", "/___\\", "\\   /", " \\ / "],
+        'S': [" ____ ", "/ __ \\", "\\___ \\", " ____/", "/____/"],
+        'C': ["  ___ ", " / __|", "| (__ ", " \\___|", "     "],
+        '3': [" ____ ", "|___ \\", "  _  |", " ___/ ", "|____/"],
+    }
+    width, height = canvas
+    rng = random.Random(0)
+    writes = [('basic', ''.join(rng.choice('ASC3') for _ in range(rng.randint(4, 12))),
+               rng.randint(-10, width), rng.randint(-3, height), rng.choice(['title', 'label']))
+              for _ in range(labels)]
+
+    def run(bulk):
+        core = Asc3Core(canvas_width=width, canvas_height=height)
+        core.define_font('basic', font)
+        start = time.perf_counter()
+        if bulk:
+            core.write_many(writes)
+        else:
+            for font_name, text, x, y, style in writes:
+                core.set_style(style, x=x, y=y)
+                core.write_text(font_name, text)
+        return time.perf_counter() - start
+
+    sequential = min(run(False) for _ in range(repeat))
+    bulk = min(run(True) for _ in range(repeat))
+    print(f"{labels} labels on a {width}x{height} canvas")
+    print(f"{'sequential':>12} {sequential:>10.3f}")
+    print(f"{'write_many':>12} {bulk:>10.3f} {sequential / bulk:>7.2f}x")
+
+
+def bench_network3d(counts=(10000, 100000, 1000000), repeat=1):
+    """
+    Times the spatial-hash neighbour search of the 3d-network generator.
+
+    Args:
+        counts (tuple): The node counts to measure.
+        repeat (int): Runs per node count; the best one is reported.
+    """
+    from network3d import find_edges, scatter_nodes
+
+    print("3d-network neighbour search at the page's node density")
+    print(f"{'nodes':>8} {'edges':>8} {'seconds':>10}")
+    for count in counts:
+        positions = scatter_nodes(count)
+        edges = []
+        elapsed = _best_of(lambda: edges.append(find_edges(positions)), repeat)
+        print(f"{count:>8} {len(edges[-1]):>8} {elapsed:>10.3f}")
+
+
+def bench_life(size=1000, warmup=300, generations=100):
+    """
+    Reports the generations per second of a Life soup when every
+    generation is written back to the canvas.
+
+    Args:
+        size (int): The side of the square board and canvas.
+        warmup (int): Generations run first, so the soup has settled.
+        generations (int): Generations timed, one step() each.
+    """
+    from paper_py import Asc3Core
+    from asc3_life import Automaton
+
+    automaton = Automaton(Asc3Core(canvas_width=size, canvas_height=size))
+    automaton.randomize(0.3, seed=0)
+    automaton.step(warmup)
+    start = time.perf_counter()
+    written = sum(automaton.step() for _ in range(generations))
+    elapsed = time.perf_counter() - start
+    print(f"Life soup on a {size}x{size} board, written back every generation")
+    print(f"{'gen/s':>8} {'cells/gen':>10}")
+    print(f"{generations / elapsed:>8.1f} {written // generations:>10}")
+
+
+if __name__ == '__main__':
+    bench_paper3d_workers()
+    bench_write_many()
+    bench_network3d()
+    bench_life()
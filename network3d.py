@@ -0,0 +1,154 @@
+# network3d.py
+#
+# Generator for the 3d-network page. Nodes are scattered in a cube and every
+# pair closer than the connection distance is joined by an edge. Instead of
+# testing all n^2/2 pairs, nodes are bucketed in a uniform grid of cells as
+# wide as the connection distance, so each node is only tested against the
+# nodes in its own and neighbouring cells. The result is written as flat
+# little-endian buffers the page loads straight into a BufferGeometry:
+#
+#     python network3d.py 1000000 network
+#
+# writes network.nodes.f32 (x, y, z per node) and network.edges.u32 (two
+# node indices per edge); open 3d-network?data=network to view them.
+
+import argparse
+import time
+from typing import Optional, Tuple
+
+import numpy as np
+
+# The page's defaults: 250 spheres in a 400-unit cube, joined below 50 units
+SPHERE_COUNT = 250
+CONNECTION_DISTANCE = 50.0
+EXTENT = 400.0
+
+# Number of nodes whose candidate pairs are expanded at once, to bound memory
+_PAIR_CHUNK = 1 << 16
+
+# Neighbour cell offsets that cover every pair of distinct cells exactly once
+_HALF_OFFSETS = [(dx, dy, dz)
+                 for dz in (0, 1) for dy in (-1, 0, 1) for dx in (-1, 0, 1)
+                 if (dz, dy, dx) > (0, 0, 0)]
+
+
+def scatter_nodes(count: int, extent: Optional[float] = None, seed: int = 0) -> np.ndarray:
+    """
+    Scatters nodes uniformly in a cube centred on the origin.
+
+    Args:
+        count (int): The number of nodes.
+        extent (float): The side of the cube. By default the cube grows with
+            the node count so the density, and so the average number of
+            connections per node, matches the page's 250 nodes.
+        seed (int): The random seed.
+
+    Returns:
+        np.ndarray: An (count, 3) float32 array of positions.
+    """
+    if extent is None:
+        extent = EXTENT * (count / SPHERE_COUNT) ** (1 / 3)
+    rng = np.random.default_rng(seed)
+    return ((rng.random((count, 3), dtype=np.float32) - 0.5) * extent).astype(np.float32)
+
+
+def find_edges(positions: np.ndarray, distance: float = CONNECTION_DISTANCE) -> np.ndarray:
+    """
+    Finds every pair of nodes closer than distance using a spatial hash.
+
+    Args:
+        positions (np.ndarray): An (N, 3) array of node positions.
+        distance (float): The connection distance.
+
+    Returns:
+        np.ndarray: An (E, 2) uint32 array of node index pairs (i, j) with
+        i < j, sorted by i and then j, which is the order the page's nested
+        loop would find them in.
+    """
+    positions = np.asarray(positions, dtype=np.float32)
+    if len(positions) < 2:
+        return np.empty((0, 2), dtype=np.uint32)
+
+    # Bucket nodes into cells; the padding ring keeps neighbour ids distinct
+    cells = np.floor((positions - positions.min(axis=0)) / distance).astype(np.int64) + 1
+    gx, gy, _ = cells.max(axis=0) + 2
+    cell_id = (cells[:, 2] * gy + cells[:, 1]) * gx + cells[:, 0]
+    order = np.argsort(cell_id, kind='stable')
+    sorted_ids = cell_id[order]
+    sorted_pos = positions[order]
+    limit = np.float32(distance) ** 2
+
+    pairs = []
+    for start in range(0, len(order), _PAIR_CHUNK):
+        stop = min(start + _PAIR_CHUNK, len(order))
+        ids = sorted_ids[start:stop]
+        for dx, dy, dz in [(0, 0, 0)] + _HALF_OFFSETS:
+            target = ids + (dz * gy + dy) * gx + dx
+            lo = np.searchsorted(sorted_ids, target, 'left')
+            hi = np.searchsorted(sorted_ids, target, 'right')
+            if (dx, dy, dz) == (0, 0, 0):
+                lo = np.maximum(lo, np.arange(start + 1, stop + 1))
+            counts = np.maximum(hi - lo, 0)
+            owner = np.repeat(np.arange(start, stop), counts)
+            other = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(owner.size)
+            delta = sorted_pos[owner] - sorted_pos[other]
+            close = np.einsum('ij,ij->i', delta, delta) < limit
+            pairs.append(np.stack((order[owner[close]], order[other[close]]), axis=1))
+
+    edges = np.concatenate(pairs)
+    edges.sort(axis=1)
+    edges = edges[np.lexsort((edges[:, 1], edges[:, 0]))]
+    return edges.astype(np.uint32)
+
+
+def generate_network(count: int = SPHERE_COUNT, distance: float = CONNECTION_DISTANCE,
+                     extent: Optional[float] = None, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Generates a network like the 3d-network page does.
+
+    Returns:
+        Tuple of the (N, 3) float32 node positions and the (E, 2) uint32 edges.
+    """
+    positions = scatter_nodes(count, extent, seed)
+    return positions, find_edges(positions, distance)
+
+
+def export_network(prefix: str, positions: np.ndarray, edges: np.ndarray):
+    """
+    Writes a network as flat little-endian binary buffers.
+
+    Args:
+        prefix (str): The output path prefix.
+        positions (np.ndarray): The node positions, written as float32 to
+            prefix.nodes.f32.
+        edges (np.ndarray): The edges, written as uint32 to prefix.edges.u32.
+    """
+    np.ascontiguousarray(positions, dtype='<f4').tofile(f"{prefix}.nodes.f32")
+    np.ascontiguousarray(edges, dtype='<u4').tofile(f"{prefix}.edges.u32")
+
+
+def load_network(prefix: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Reads a network written by export_network.
+
+    Returns:
+        Tuple of the (N, 3) float32 node positions and the (E, 2) uint32 edges.
+    """
+    positions = np.fromfile(f"{prefix}.nodes.f32", dtype='<f4').reshape(-1, 3)
+    edges = np.fromfile(f"{prefix}.edges.u32", dtype='<u4').reshape(-1, 2)
+    return positions, edges
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a 3d-network graph as binary buffers.")
+    parser.add_argument('count', type=int, nargs='?', default=SPHERE_COUNT, help="number of nodes")
+    parser.add_argument('prefix', nargs='?', default='network', help="output path prefix")
+    parser.add_argument('--distance', type=float, default=CONNECTION_DISTANCE, help="connection distance")
+    parser.add_argument('--extent', type=float, default=None, help="side of the cube (default: page density)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    nodes, links = generate_network(args.count, args.distance, args.extent, args.seed)
+    export_network(args.prefix, nodes, links)
+    print(f"{len(nodes)} nodes, {len(links)} edges in {time.perf_counter() - start:.2f}s")
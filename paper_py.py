@@ -4,6 +4,19 @@
 # ASC3/4 symbolic art. The Asc3Core class provides a canvas-like
 # interface for creating text-based visuals with defined styles and fonts.
 
+import sys
+from array import array
+from collections import deque
+
+import numpy as np
+
+from asc3_diagnostics import DIAGNOSTICS
+from asc3_fonts import CompiledFont
+from asc3_styles import Style, StylePalette, blank_style_row, parse_color
+from asc3_viewport import ClipRect
+from asc3_width import WIDE_PAD, WIDTHS, strip_pad, text_cells
+
+
 class Asc3Core:
     """
     A core class for generating structured ASCII art.
@@ -12,7 +25,12 @@ class Asc3Core:
     to write text and set styles, ultimately rendering the final
     text-based output.
     """
-    def __init__(self, canvas_width=80, canvas_height=24, fill_char=' '):
+
+    # Number of labels write_many places per batch, to bound temporary arrays.
+    WRITE_MANY_CHUNK = 1024
+
+    def __init__(self, canvas_width=80, canvas_height=24, fill_char=' ',
+                 history_limit=16 * 1024 * 1024, palette=None, diagnostics=None):
         """
         Initializes the Asc3Core canvas and state.
 
@@ -20,17 +38,42 @@ class Asc3Core:
             canvas_width (int): The width of the drawing canvas.
             canvas_height (int): The height of the drawing canvas.
             fill_char (str): The character used to fill the canvas initially.
+            history_limit (int): Approximate bytes of saved rows kept for
+                undo; the oldest snapshots are dropped beyond it.
+            palette (StylePalette): The palette to intern styles into, to
+                share one between cores. By default the core has its own.
+            diagnostics (Diagnostics): The channel problems are recorded in.
+                By default it is the shared DIAGNOSTICS channel, whose
+                messages and counters any core reports when it renders.
         """
         self.canvas_width = canvas_width
         self.canvas_height = canvas_height
         self.fill_char = fill_char
-        self.styles = {'default': {'color': 'white'}}
+        # Styles are interned in a palette; the canvas keeps one row of style
+        # ids per row of characters.
+        self.palette = StylePalette() if palette is None else palette
+        # Problems are recorded here rather than printed, and reported by
+        # render() (see asc3_diagnostics).
+        self.diagnostics = DIAGNOSTICS if diagnostics is None else diagnostics
+        self.styles = {'default': {'color': 'white', 'id': self.palette.intern('white')}}
         self.fonts = {}
         self.current_style_name = 'default'
         self.current_style = self.styles[self.current_style_name]
         self.cursor_x = 0
         self.cursor_y = 0
+        # Drawing is limited to this rectangle when set (see set_clip)
+        self.clip = None
         self.canvas = self._create_canvas()
+        self.style_rows = self._create_style_rows()
+        self.history_limit = history_limit
+        # Undo history: one {row index: (saved row, saved style row)} dict per
+        # snapshot, oldest first, plus the number of older snapshots dropped.
+        self._history = deque()
+        self._history_bytes = deque()
+        self._history_total = 0
+        self._history_dropped = 0
+        # Sequence number of the last frame applied with apply_delta.
+        self.frame_seq = None
     
     def _create_canvas(self):
         """
@@ -41,38 +84,169 @@ class Asc3Core:
             for _ in range(self.canvas_height)
         ]
 
-    def define_font(self, font_name, font_map):
+    def _create_style_rows(self):
+        """
+        Creates the style id rows of an empty canvas.
+        """
+        return [blank_style_row(self.canvas_width) for _ in range(self.canvas_height)]
+
+    def define_font(self, font_name, font_map, letter_spacing=1):
         """
         Defines a new font for use on the canvas.
 
         A font is a dictionary where each key is a character and its value
         is a list of strings representing the character's ASCII art shape.
+        The font is stored compiled, with a precomputed width table.
 
         Args:
             font_name (str): The name to assign to the new font.
             font_map (dict): A dictionary mapping characters to their ASCII art.
+            letter_spacing (int): Blank columns inserted between characters.
+        """
+        self.fonts[font_name] = CompiledFont(font_map, letter_spacing)
+
+    def remove_font(self, font_name):
+        """
+        Removes a defined font. Its glyph rows are released from the shared
+        row pool once nothing else uses the font.
+
+        Args:
+            font_name (str): The name of the font to remove.
+        """
+        if self.fonts.pop(font_name, None) is None:
+            self.diagnostics.error(f"Font '{font_name}' not defined.")
+
+    def define_variant(self, font_name, base_font, scale=1, mirror_h=False, mirror_v=False,
+                       rotate=0, bold=False):
         """
-        self.fonts[font_name] = font_map
+        Defines a font derived from a defined font: scaled up, mirrored,
+        rotated or emboldened (see CompiledFont.variant). Variants are cached
+        on the base font, so defining one again costs a lookup.
+
+        Args:
+            font_name (str): The name to assign to the variant.
+            base_font (str): The name of the font it is derived from.
+            scale (int): Repeat every cell this many times across and down.
+            mirror_h (bool): Mirror glyphs left to right.
+            mirror_v (bool): Mirror glyphs top to bottom.
+            rotate (int): Rotate glyphs by this many quarter turns clockwise.
+            bold (bool): Thicken glyphs by overstriking them.
+        """
+        if base_font not in self.fonts:
+            self.diagnostics.error(f"Font '{base_font}' not defined.")
+            return
+        try:
+            self.fonts[font_name] = self.fonts[base_font].variant(scale, mirror_h, mirror_v, rotate, bold)
+        except ValueError as e:
+            self.diagnostics.error(str(e))
 
-    def set_style(self, style_name='default', color='white', x=0, y=0):
+    def set_style(self, style_name='default', color='white', x=0, y=0,
+                  background=None, bold=False, underline=False):
         """
         Sets the current drawing style and cursor position.
 
+        A style is defined the first time its name is used; the attributes
+        given later for the same name are ignored.
+
         Args:
             style_name (str): The name of the style to set.
-            color (str): The color for the text (e.g., 'cyan', 'magenta').
+            color: The text color: a name (e.g., 'cyan', 'magenta'), a
+                256-color index, '#rrggbb' or an (r, g, b) tuple.
             x (int): The new horizontal cursor position.
             y (int): The new vertical cursor position.
+            background: The background color, in the same forms, or None.
+            bold (bool): Whether the text is bold.
+            underline (bool): Whether the text is underlined.
+
+        Raises:
+            ValueError: If the style is new and the palette is full.
         """
-        # Note: This is a simplified style system. A full implementation
-        # would need to handle ANSI color codes or other formatting.
         if style_name not in self.styles:
-            self.styles[style_name] = {'color': color}
+            try:
+                style = Style(parse_color(color), parse_color(background), bool(bold), bool(underline))
+            except ValueError as e:
+                self.diagnostics.error(str(e))
+                return
+            style_id = self.palette.intern_style(style)
+            self.styles[style_name] = {'color': color, 'background': background,
+                                       'bold': bold, 'underline': underline, 'id': style_id}
         self.current_style_name = style_name
         self.current_style = self.styles[style_name]
         self.cursor_x = x
         self.cursor_y = y
 
+    def set_clip(self, x, y, width, height):
+        """
+        Limits drawing to a rectangle of the canvas.
+
+        write_text, write_many and write_text_box leave every cell outside
+        the rectangle alone, except that a double-width character cut in
+        half by a write at the edge is blanked. A double-width character
+        of a glyph cut in half by the edge itself is drawn as the fill
+        character. Glyphs and glyph rows outside it are skipped
+        before any of their cells are visited, so drawing into a small clip
+        costs in proportion to what lands inside it.
+
+        Args:
+            x (int): The left edge of the rectangle.
+            y (int): The top edge of the rectangle.
+            width (int): The width of the rectangle.
+            height (int): The height of the rectangle.
+        """
+        self.clip = ClipRect.of(x, y, width, height)
+
+    def reset_clip(self):
+        """
+        Lets drawing reach the whole canvas again.
+        """
+        self.clip = None
+
+    def _clip_bounds(self):
+        """
+        Returns the drawable rectangle: the clip within the canvas.
+        """
+        bounds = ClipRect(0, 0, self.canvas_width, self.canvas_height)
+        return bounds if self.clip is None else bounds.intersect(self.clip)
+
+    def clear(self):
+        """
+        Clears the canvas back to the fill character.
+        """
+        for y in range(self.canvas_height):
+            self._save_row(y)
+            self.canvas[y] = [self.fill_char] * self.canvas_width
+            self.style_rows[y] = blank_style_row(self.canvas_width)
+
+    def run_program(self, program):
+        """
+        Executes an Asc3 program.
+
+        A program is a list of command dicts, for example
+        {'command': 'write_text', 'font': 'basic', 'text': 'ASC'}. The
+        supported commands are define_font (font, font_map and optionally
+        letter_spacing), define_variant (font, base_font and the
+        define_variant options), set_style (the set_style arguments),
+        write_text (font and text) and clear.
+
+        Args:
+            program (list): The commands to execute, in order.
+        """
+        for cmd in program:
+            args = dict(cmd)
+            command_type = args.pop('command')
+            if command_type == 'set_style':
+                self.set_style(**args)
+            elif command_type == 'write_text':
+                self.write_text(args['font'], args['text'])
+            elif command_type == 'define_font':
+                self.define_font(args['font'], args['font_map'], args.get('letter_spacing', 1))
+            elif command_type == 'define_variant':
+                self.define_variant(args.pop('font'), args.pop('base_font'), **args)
+            elif command_type == 'clear':
+                self.clear()
+            else:
+                self.diagnostics.error(f"Unknown command: {command_type}")
+
     def write_text(self, font_name, text):
         """
         Writes a string of text to the canvas using a defined font.
@@ -82,33 +256,462 @@ class Asc3Core:
             text (str): The text to write.
         """
         if font_name not in self.fonts:
-            print(f"Error: Font '{font_name}' not defined.")
+            self.diagnostics.error(f"Font '{font_name}' not defined.")
             return
 
         font_map = self.fonts[font_name]
-        
+        style_id = self.current_style['id']
+        left, top, right, bottom = self._clip_bounds()
+
+        # A line of text above or below the clip only moves the cursor
+        if self.cursor_y >= bottom or self.cursor_y + font_map.height <= top or left >= right:
+            advances = font_map.advances
+            for char in text:
+                if char in advances:
+                    self.cursor_x += advances[char]
+                else:
+                    self.diagnostics.missing_glyph(font_name, char)
+            return
+
+        # Double-width characters must never be cut in half, so glyphs are
+        # drawn with _draw_wide where the font or the cells around the text
+        # hold any
+        wide = font_map.has_wide
+        if not wide:
+            extents, advances = font_map.extents, font_map.advances
+            start = end = x = self.cursor_x
+            for char in text:
+                if char in advances:
+                    end = max(end, x + extents[char])
+                    x += advances[char]
+                    start = min(start, x)
+            start, end = max(max(start, left) - 1, 0), min(end, right) + 1
+            wide = any(WIDE_PAD in self.canvas[y][start:end]
+                       for y in range(max(self.cursor_y, top), min(self.cursor_y + font_map.height, bottom)))
+
         # Iterate through each character in the text
         for char in text:
             if char in font_map:
-                char_art = font_map[char]
-                char_height = len(char_art)
-                char_width = len(char_art[0])
-
-                # Draw each line of the character
-                for y_offset, line in enumerate(char_art):
-                    for x_offset, pixel in enumerate(line):
-                        canvas_x = self.cursor_x + x_offset
-                        canvas_y = self.cursor_y + y_offset
-                        
-                        # Only draw if the pixel is not a space
-                        if pixel != ' ':
-                            if 0 <= canvas_x < self.canvas_width and 0 <= canvas_y < self.canvas_height:
-                                self.canvas[canvas_y][canvas_x] = pixel
+                char_art = font_map.glyph_rows[char]
+                char_width = font_map.widths[char]
+
+                # Skip glyphs outside the clip, and only visit the rows and
+                # columns of the rest that fall inside it
+                x, y = self.cursor_x, self.cursor_y
+                if x < right and x + font_map.extents[char] > left:
+                    first_x = max(left - x, 0)
+                    for y_offset in range(max(top - y, 0), min(bottom - y, len(char_art))):
+                        line = char_art[y_offset]
+                        last_x = min(right - x, len(line))
+                        if wide:
+                            if line[first_x:last_x].count(' ') < last_x - first_x:
+                                self._writable_row(y + y_offset)
+                                self._draw_wide(y + y_offset, x, line, first_x, last_x, style_id)
+                            continue
+
+                        # Rows are only copied into the snapshot once
+                        # something is drawn on them
+                        row = None
+                        for x_offset in range(first_x, last_x):
+                            pixel = line[x_offset]
+
+                            # Only draw if the pixel is not a space
+                            if pixel != ' ':
+                                if row is None:
+                                    row = self._writable_row(y + y_offset)
+                                    style_row = self.style_rows[y + y_offset]
+                                row[x + x_offset] = pixel
+                                style_row[x + x_offset] = style_id
 
                 # Advance the cursor for the next character
-                self.cursor_x += char_width + 1  # Add a space between characters
+                self.cursor_x += char_width + font_map.letter_spacing
+            else:
+                self.diagnostics.missing_glyph(font_name, char)
+
+    def _draw_wide(self, y, x, line, first_x, last_x, style_id):
+        """
+        Draws cells first_x to last_x of a glyph row at column x of canvas
+        row y where either holds double-width characters. A glyph's wide
+        character cut in half by the clip is drawn as the fill character,
+        and characters on the canvas that the glyph cuts in half are blanked.
+        """
+        row, style_row = self.canvas[y], self.style_rows[y]
+        columns = []
+        for x_offset in range(first_x, last_x):
+            pixel = line[x_offset]
+            if pixel != ' ':
+                if x_offset == first_x and pixel == WIDE_PAD:
+                    pixel = self.fill_char
+                elif x_offset == last_x - 1 and last_x < len(line) and line[last_x] == WIDE_PAD:
+                    pixel = self.fill_char
+                row[x + x_offset] = pixel
+                style_row[x + x_offset] = style_id
+                columns.append(x + x_offset)
+        self._mend_wide(y, columns)
+
+    def _mend_wide(self, y, columns):
+        """
+        Blanks the halves of double-width characters left without their
+        other half on row y by writes to the given columns. The row must
+        be writable.
+        """
+        row = self.canvas[y]
+        last = len(row) - 1
+        orphans = []
+        for x in sorted({x + offset for x in columns for offset in (-1, 0, 1)}):
+            if not 0 <= x <= last:
+                continue
+            cell = row[x]
+            if cell == WIDE_PAD:
+                if x == 0 or WIDTHS.width(row[x - 1][0]) != 2:
+                    orphans.append(x)
+            elif WIDTHS.width(cell[0]) == 2 and (x == last or row[x + 1] != WIDE_PAD):
+                orphans.append(x)
+        for x in orphans:
+            row[x] = self.fill_char
+
+    def write_many(self, writes):
+        """
+        Writes a batch of labels to the canvas in one pass.
+
+        The result is the same as calling set_style(style, x=x, y=y) and then
+        write_text(font, text) for every entry in order, including which
+        write wins where labels overlap. Writes are grouped by font, all glyph
+        placements are resolved at once and the winning cells are scattered
+        onto the canvas together.
+
+        Args:
+            writes (list): (font_name, text, x, y, style) tuples. A style of
+                None keeps the current style.
+        """
+        writes = list(writes)
+        if not writes:
+            return
+        fonts, texts, xs, ys, styles = zip(*writes)
+
+        for style in set(styles):
+            if style is not None and style not in self.styles:
+                self.styles[style] = {'color': 'white', 'background': None, 'bold': False,
+                                      'underline': False, 'id': self.palette.intern('white')}
+
+        # The style each write draws in, carrying the last one forward
+        style_ids = np.empty(len(writes), dtype=np.uint16)
+        style_id = self.current_style['id']
+        for index, style in enumerate(styles):
+            if style in self.styles:
+                style_id = self.styles[style]['id']
+            style_ids[index] = style_id
+
+        # A cell is ordered by the position of the character that drew it in
+        # the concatenation of all texts, which is the sequential write order
+        lengths = np.fromiter(map(len, texts), dtype=np.int64, count=len(texts))
+        text_start = np.cumsum(lengths) - lengths
+
+        by_font = {}
+        for index, font_name in enumerate(fonts):
+            by_font.setdefault(font_name, []).append(index)
+
+        # Fonts with multi-codepoint cells cannot be packed into codes; their
+        # writes go through write_text instead, in order
+        if any(self.fonts[font_name].has_clusters for font_name in by_font if font_name in self.fonts):
+            for font_name, text, x, y, style in writes:
+                if style is not None:
+                    self.set_style(style, x=x, y=y)
+                else:
+                    self.cursor_x, self.cursor_y = x, y
+                self.write_text(font_name, text)
+            return
+
+        # Latest write to each cell, as (order << 21) | character code. The
+        # maximum key of a cell is its latest write and carries its character.
+        # The extra slot at the end absorbs padding and clipped cells.
+        latest = np.full(self.canvas_width * self.canvas_height + 1, -1, dtype=np.int64)
+        clip = self._clip_bounds()
+        end_x = {}
+        for font_name, indices in by_font.items():
+            if font_name not in self.fonts:
+                self.diagnostics.error(f"Font '{font_name}' not defined.")
+                continue
+            font_map = self.fonts[font_name]
+            for lo in range(0, len(indices), self.WRITE_MANY_CHUNK):
+                chunk = indices[lo:lo + self.WRITE_MANY_CHUNK]
+                placement = font_map.place([texts[i] for i in chunk], [xs[i] for i in chunk],
+                                           [ys[i] for i in chunk], self.canvas_width, self.canvas_height, clip)
+                for char, count in placement.missing.items():
+                    self.diagnostics.missing_glyph(font_name, char, count)
+                char_order = text_start[chunk][placement.label] + placement.char_index
+                keys = (char_order[placement.char][:, None] << 21) | placement.codes
+                np.maximum.at(latest, placement.flat.ravel(), keys.ravel())
+            end_x[indices[-1]] = int(placement.end_x[-1])
+
+        # The order of a cell's character tells which write, and so which
+        # style, drew it
+        flat = np.flatnonzero(latest[:-1] >= 0)
+        keys = latest[flat]
+        char_style = np.repeat(style_ids, lengths)
+        self._blit(flat, (keys & 0x1FFFFF).astype(np.uint32), char_style[keys >> 21])
+
+        # Leave the style and cursor where the last sequential call would
+        for style in reversed(styles):
+            if style in self.styles:
+                self.current_style_name = style
+                self.current_style = self.styles[style]
+                break
+        last = len(writes) - 1
+        self.cursor_x = end_x.get(last, xs[last])
+        self.cursor_y = ys[last]
+
+    def _blit(self, flat, codes, style_ids):
+        """
+        Writes characters and style ids to cells given by flat canvas index.
+
+        Args:
+            flat (np.ndarray): Distinct flat cell indices.
+            codes (np.ndarray): The uint32 character code of each cell.
+            style_ids (np.ndarray): The uint16 style id of each cell.
+        """
+        width = self.canvas_width
+        # A wide character cut in half by the clip is drawn as the fill character
+        left, _, right, _ = self._clip_bounds()
+        columns = flat % width
+        codes = np.where(((codes == 0) & (columns == left))
+                         | ((columns == right - 1) & (WIDTHS.widths(codes) == 2)),
+                         np.uint32(ord(self.fill_char)), codes)
+
+        text = ''.join(''.join(row) for row in self.canvas)
+        if len(text) != width * self.canvas_height:
+            # Some cells hold more than one character; fall back to per-cell
+            # writes. NumPy reads the pad code back as an empty string.
+            written = {}
+            for cell, char, style_id in zip(flat.tolist(), codes.view('<U1').tolist(), style_ids.tolist()):
+                self._writable_row(cell // width)[cell % width] = char or WIDE_PAD
+                self.style_rows[cell // width][cell % width] = style_id
+                written.setdefault(cell // width, []).append(cell % width)
+            for y, xs in written.items():
+                self._mend_wide(y, xs)
+            return
+
+        buffer = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32).copy()
+        buffer[flat] = codes
+        # Blank the halves of wide characters the writes left without the
+        # other half: a pad not after a wide character, or a wide character
+        # not before a pad
+        cells = np.unique(np.concatenate((flat - 1, flat, flat + 1)))
+        cells = cells[(cells >= 0) & (cells < buffer.size)]
+        column = cells % width
+        after = buffer[np.minimum(cells + 1, buffer.size - 1)]
+        before = WIDTHS.widths(buffer[np.maximum(cells - 1, 0)])
+        orphan = np.where(buffer[cells] == 0, (column == 0) | (before != 2),
+                          (WIDTHS.widths(buffer[cells]) == 2) & ((column == width - 1) | (after != 0)))
+        buffer[cells[orphan]] = ord(self.fill_char)
+        text = buffer.tobytes().decode('utf-32-le')
+        plane = np.frombuffer(b''.join(self.style_rows), dtype=np.uint16).copy()
+        plane[flat] = style_ids
+        touched = np.zeros(self.canvas_height, dtype=bool)
+        touched[flat // width] = True
+        touched[cells[orphan] // width] = True
+        for y in np.flatnonzero(touched).tolist():
+            self._save_row(y)
+            self.canvas[y] = list(text[y * width:(y + 1) * width])
+            self.style_rows[y] = array('H', plane[y * width:(y + 1) * width].tobytes())
+
+    def measure_text(self, font_name, text):
+        """
+        Measures how many columns a string takes when written with a font.
+
+        Args:
+            font_name (str): The name of the font to use.
+            text (str): The text to measure.
+
+        Returns:
+            int: The width of the text in canvas columns.
+        """
+        if font_name not in self.fonts:
+            self.diagnostics.error(f"Font '{font_name}' not defined.")
+            return 0
+        return self.fonts[font_name].measure(text)
+
+    def layout_text(self, font_name, text, box_width=None, align='left'):
+        """
+        Wraps and aligns a string without drawing it.
+
+        Layouts are cached per font, text and box width, so laying out the
+        same string again is a lookup.
+
+        Args:
+            font_name (str): The name of the font to use.
+            text (str): The text to lay out.
+            box_width (int): The width to wrap to, or None to only split on newlines.
+            align (str): One of 'left', 'center' or 'right'.
+
+        Returns:
+            TextLayout: The positioned lines, or None if the font is not defined.
+        """
+        if font_name not in self.fonts:
+            self.diagnostics.error(f"Font '{font_name}' not defined.")
+            return None
+        return self.fonts[font_name].layout(text, box_width, align)
+
+    def write_text_box(self, font_name, text, x, y, box_width=None, align='left'):
+        """
+        Writes wrapped and aligned text into a box on the canvas.
+
+        Args:
+            font_name (str): The name of the font to use.
+            text (str): The text to write.
+            x (int): The left edge of the box.
+            y (int): The top edge of the box.
+            box_width (int): The width to wrap to, or None to only split on newlines.
+            align (str): One of 'left', 'center' or 'right'.
+
+        Returns:
+            TextLayout: The layout that was written, or None if the font is not defined.
+        """
+        layout = self.layout_text(font_name, text, box_width, align)
+        if layout is None:
+            return None
+
+        line_height = self.fonts[font_name].height
+        for row, line in enumerate(layout.lines):
+            self.cursor_x = x + line.x
+            self.cursor_y = y + row * line_height
+            self.write_text(font_name, line.text)
+        return layout
+
+    def apply_delta(self, delta):
+        """
+        Applies a canvas delta (see asc3_delta) to the canvas.
+
+        A keyframe resets the canvas to its size and content. Any other delta
+        only applies on top of the frame it was encoded against; deltas for
+        other frames are refused until the next keyframe arrives. Run styles
+        are ids in the core's palette, as from_dict and from_bytes intern
+        them when given it.
+
+        Args:
+            delta (Delta): The delta to apply.
+
+        Returns:
+            bool: True if the delta was applied.
+        """
+        if delta.keyframe:
+            if (delta.width, delta.height) != (self.canvas_width, self.canvas_height):
+                self.canvas_width, self.canvas_height = delta.width, delta.height
+                self.canvas = self._create_canvas()
+                self.style_rows = self._create_style_rows()
+                self._drop_history()
             else:
-                print(f"Warning: Character '{char}' not in font '{font_name}'.")
+                self.clear()
+        elif delta.base != self.frame_seq:
+            self.diagnostics.warning(f"Delta for frame {delta.seq} does not apply to frame {self.frame_seq}.")
+            return False
+
+        for run in delta.runs:
+            if 0 <= run.row < self.canvas_height and 0 <= run.col < self.canvas_width:
+                cells = text_cells(run.text)[:self.canvas_width - run.col]
+                end = run.col + len(cells)
+                self._writable_row(run.row)[run.col:end] = cells
+                self.style_rows[run.row][run.col:end] = array('H', [run.style]) * len(cells)
+                self._mend_wide(run.row, (run.col, end - 1))
+        self.frame_seq = delta.seq
+        return True
+
+    def snapshot(self):
+        """
+        Marks the current canvas state so it can be restored later.
+
+        Nothing is copied here. Rows are shared with the snapshot until they
+        are next written, and only then is the old row saved, so taking a
+        snapshot is O(1) and the history grows with the size of each edit.
+        Edits must go through the core's drawing methods to be tracked.
+
+        Returns:
+            int: An id to pass to restore().
+        """
+        self._history.append({})
+        self._history_bytes.append(0)
+        return self._history_dropped + len(self._history) - 1
+
+    def undo(self):
+        """
+        Restores the canvas to the most recent snapshot and discards it.
+
+        Only the rows written since that snapshot are touched.
+
+        Returns:
+            bool: False if there was no snapshot to undo.
+        """
+        if not self._history:
+            return False
+        for y, (row, style_row) in self._history.pop().items():
+            self.canvas[y] = row
+            self.style_rows[y] = style_row
+        self._history_total -= self._history_bytes.pop()
+        return True
+
+    def restore(self, snapshot_id):
+        """
+        Restores the canvas to a snapshot, discarding every later snapshot.
+
+        The snapshot itself is kept, so edits made after a restore branch off
+        from it and can be rolled back by restoring it again.
+
+        Args:
+            snapshot_id (int): An id returned by snapshot().
+
+        Returns:
+            bool: False if the snapshot was dropped or does not exist.
+        """
+        if not self._history_dropped <= snapshot_id < self._history_dropped + len(self._history):
+            self.diagnostics.error(f"Snapshot {snapshot_id} is not in the history.")
+            return False
+        while self._history_dropped + len(self._history) > snapshot_id:
+            self.undo()
+        self.snapshot()
+        return True
+
+    def _save_row(self, y):
+        """
+        Saves row y into the latest snapshot before its first change.
+
+        Returns:
+            bool: True if the row was saved and must now be replaced rather
+            than modified in place.
+        """
+        if not self._history or y in self._history[-1]:
+            return False
+        row, style_row = self.canvas[y], self.style_rows[y]
+        size = sys.getsizeof(row) + sys.getsizeof(style_row)
+        self._history[-1][y] = (row, style_row)
+        self._history_bytes[-1] += size
+        self._history_total += size
+        if self._history_total > self.history_limit:
+            self._trim_history()
+        return True
+
+    def _writable_row(self, y):
+        """
+        Returns row y, copying it and its style row first if a snapshot still
+        shares them. The style row is then writable as self.style_rows[y].
+        """
+        if self._save_row(y):
+            self.canvas[y] = list(self.canvas[y])
+            self.style_rows[y] = array('H', self.style_rows[y])
+        return self.canvas[y]
+
+    def _drop_history(self):
+        """Forgets every snapshot, for when the canvas is replaced outright."""
+        self._history_dropped += len(self._history)
+        self._history.clear()
+        self._history_bytes.clear()
+        self._history_total = 0
+
+    def _trim_history(self):
+        """Drops the oldest snapshots until the history fits its limit."""
+        while len(self._history) > 1 and self._history_total > self.history_limit:
+            self._history.popleft()
+            self._history_total -= self._history_bytes.popleft()
+            self._history_dropped += 1
 
     def render(self):
         """
@@ -119,7 +722,22 @@ class Asc3Core:
         """
         # This simple render method joins the canvas rows.
         # A more advanced version would add ANSI color codes based on styles.
-        return "\n".join(["".join(row) for row in self.canvas])
+        self.diagnostics.report()
+        return strip_pad("\n".join(["".join(row) for row in self.canvas]))
+
+    def render_ansi(self):
+        """
+        Renders the canvas with ANSI escape sequences for its styles.
+
+        Escape sequences are looked up from the palette by style id and only
+        emitted where the style changes along a row.
+
+        Returns:
+            str: The rendered art with colors.
+        """
+        self.diagnostics.report()
+        return strip_pad("\n".join(self.palette.render_row(row, style_row)
+                                   for row, style_row in zip(self.canvas, self.style_rows)))
 
 
 # Example Usage (for testing purposes)
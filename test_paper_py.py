@@ -0,0 +1,80 @@
+# test_paper_py.py
+#
+# Regression checks for Asc3Core. Run them from the repository root:
+#
+#     python -m pytest -q
+
+from asc3_delta import Delta, Run
+from paper_py import Asc3Core
+
+
+def _core(width=8):
+    """Returns a one-row core with a font holding a wide and a narrow glyph."""
+    core = Asc3Core(canvas_width=width, canvas_height=1, fill_char='.')
+    core.define_font('f', {'W': ['漢'], 'x': ['x']}, letter_spacing=0)
+    return core
+
+
+def _write(core, text, x, many=False):
+    """Writes text at column x with write_text or write_many."""
+    if many:
+        core.write_many([('f', text, x, 0, None)])
+    else:
+        core.set_style(x=x, y=0)
+        core.write_text('f', text)
+
+
+def test_overwriting_pad_blanks_wide_character():
+    for many in (False, True):
+        core = _core()
+        _write(core, 'W', 0)
+        _write(core, 'x', 1, many)
+        assert core.canvas[0][:2] == ['.', 'x']
+        assert core.render() == '.x......'
+    # A font without wide characters still keeps those on the canvas whole
+    core = _core()
+    core.define_font('narrow', {'x': ['x']})
+    _write(core, 'W', 0)
+    core.set_style(x=1, y=0)
+    core.write_text('narrow', 'x')
+    assert core.render() == '.x......'
+
+
+def test_overwriting_wide_character_blanks_pad():
+    for many in (False, True):
+        core = _core()
+        _write(core, 'W', 0)
+        _write(core, 'x', 0, many)
+        assert core.canvas[0][:2] == ['x', '.']
+        assert core.render() == 'x.......'
+
+
+def test_wide_character_in_last_column_is_filled():
+    for many in (False, True):
+        core = _core(5)
+        _write(core, 'W', 4, many)
+        assert core.render() == '.....'
+    core = _core()
+    core.set_clip(0, 0, 3, 1)
+    _write(core, 'W', 2)
+    assert core.render() == '........'
+
+
+def test_delta_runs_keep_wide_characters_whole():
+    core = _core()
+    _write(core, 'W', 0)
+    core.frame_seq = 0
+    core.apply_delta(Delta(seq=1, base=0, keyframe=False, width=8, height=1, runs=[Run(0, 1, 'x')]))
+    assert core.render() == '.x......'
+    core.apply_delta(Delta(seq=2, base=1, keyframe=False, width=8, height=1, runs=[Run(0, 7, '漢')]))
+    assert core.render() == '.x......'
+
+
+def test_blank_glyph_rows_are_not_saved_in_snapshots():
+    core = Asc3Core(canvas_width=8, canvas_height=3)
+    core.define_font('f', {'A': ['   ', ' A ', '   ']})
+    core.snapshot()
+    core.write_text('f', 'A')
+    assert list(core._history[-1]) == [1]
+    assert core.undo()
+    assert core.render() == '\n'.join([' ' * 8] * 3)